@@ -6,8 +6,23 @@ vessels, drums and separators in chemical technology."""
 from tkinter import *
 from tkinter import ttk
 from tkinter import filedialog
+from itertools import count
+from types import MappingProxyType
 import openpyxl
 
+from vessel_tables import MaterialTable, PipeTable, stress_below
+
+
+def freeze(table):
+    """Read-only view of nested dictionary"""
+    return MappingProxyType({key: freeze(value) if isinstance(value, dict) else value for key, value in table.items()})
+
+
+# Inner diameter of pipes (m) by nominal diameter and schedule, allowable stress (1000 psi) vs temperature (F)
+# and density (kg/m^3) of shell materials. Tables are read from tables directory on first use (see vessel_tables):
+ND_VOC, METAL_STRESS = PipeTable(), MaterialTable()
+METAL_DENSITY = METAL_STRESS.densities
+
 
 
 def k_value_calculation(carry_over, demister, surface_tension, liq1_density, vapor_density):
@@ -69,7 +84,7 @@ def calculate_required_demister_area(actual_gas_rate, allowable_gas_velocity, de
 
 def calculate_demister_dimensions(required_demister_area):
     """Calculation of demister dimensions which can be used for any vessel, but can be used
-    for circle demister only. To update for rectangular demister in future."""
+    for circle demister only. Round and rectangular pads of catalog are matched by vessel_demisters."""
     try:
         demister_dimensions = (4 * float(required_demister_area) / 3.1415) ** 0.5
         return round(demister_dimensions, 3)
@@ -285,21 +300,18 @@ def calc_nozzle_momentum(vap_mass_flow, vapor_density, liquid1_mass_flow, liquid
 
 
 def calc_allowable_stress(design_temperature, material_list, material):
-    """This function converts design temperature to F from C, creates temperature list, places
-    design temperature in F to that list, finds left and right neighbour."""
+    """This function converts design temperature to F from C and takes stress of material at the
+    table temperature below it. Material list is MaterialTable or dictionary of stresses by temperature
+    of every material. None for unknown material or temperature above table."""
     try:
         design_temperature_F = float(design_temperature) * 1.8 + 32
-        t_list = [-20, 300, 400, 500, 600, 650, 700, 750, 800, 850, 900, 950, 1000, 1050, design_temperature_F]
-        t_list.sort()
-        a = t_list.index(design_temperature_F)
-        t_lower, t_higher = t_list[a-1], t_list[a+1]
-        try:
-            all_stress_lower = float(material_list[material][str(t_lower)])
-            all_stress_higher = float(material_list[material][str(t_lower)])
-            prorate_stress = (design_temperature_F - t_lower) / (t_higher - t_lower) *\
-                             (float(all_stress_higher) - float(all_stress_lower)) + float(all_stress_lower)
-            return round(prorate_stress, 3)
-        except KeyError: pass
+        if isinstance(material_list, MaterialTable):
+            stress = material_list.stress(material, design_temperature_F)
+        else:
+            grid = sorted((float(t), float(value)) for t, value in material_list.get(material, {}).items())
+            stress = stress_below([t for t, value in grid], [value for t, value in grid], design_temperature_F)
+        if stress is not None:
+            return round(stress, 3)
     except ValueError: pass
 
 
@@ -395,17 +407,187 @@ def calc_length_to_diameter_ratio(tan_to_tan_length, vessel_diameter):
     except ValueError: pass
 
 
-def get_separation_quality(vessel_diameter, min_vessel_diameter, entry):
+def get_separation_quality(vessel_diameter, min_vessel_diameter, entry=None):
+    """This function compares chosen and minimal diameter as numbers and colours result entry,
+    if entry is given. None if one of diameters is not a number."""
     try:
-        if vessel_diameter >= min_vessel_diameter:
-            entry.configure(fg='green')
+        if float(vessel_diameter) >= float(min_vessel_diameter):
+            if entry is not None:
+                entry.configure(fg='green')
             return 'OK'
         else:
-            entry.configure(fg='red')
+            if entry is not None:
+                entry.configure(fg='red')
             return 'Not OK'
     except ValueError: pass
 
 
+# Names of 13 process data rows in the same order as N3:N15 of Data file and data input boxes:
+DATA_FIELDS = ('temperature', 'pressure', 'vapor_mass_flow', 'vapor_density', 'vapor_viscosity', 'vapor_mw',
+               'liquid1_mass_flow', 'liquid1_density', 'liquid1_viscosity', 'liquid2_mass_flow',
+               'liquid2_density', 'liquid2_viscosity', 'surface_tension')
+# Names of nozzles in the same order as nozzle rows of calculation tab:
+NOZZLE_NAMES = ('inlet', 'vapor_outlet', 'liquid1_outlet', 'liquid2_outlet')
+# All inputs of one vertical 2-phase vessel. Fields ending with '_rewrite' are heights, which are
+# overwritten by engineer in GUI, if they are empty calculated value is taken. k_correlation selects
+# K value correlation of batch engine (see vessel_engine.K_CORRELATIONS), empty is the one of GUI.
+CASE_FIELDS = DATA_FIELDS + ('carry_over', 'demister', 'k_correlation', 'k_value_rewrite', 'vl_safety_factor',
+                             'vessel_diameter', 'head_and_bottom', 'vessel_orientation', 'vessel_phase',
+                             'vessel_application', 't1', 't2', 't3', 'bottom_to_lsal_rewrite', 'lsal_to_lal_height_rewrite',
+                             'lal_to_lah_height_rewrite', 'lah_to_lsah_height_rewrite', 'lsah_to_inlet_rewrite',
+                             'inlet_to_demister_rewrite', 'demister_to_tangent_rewrite', 'tan_to_tan_rewrite') + \
+    tuple(name + suffix for name in NOZZLE_NAMES for suffix in ('_dn', '_sch')) + \
+    ('design_pressure', 'design_temperature', 'corrosion_allowance', 'joint_efficiency', 'material')
+# Inputs of GUI, which are not used by sizing chain, they are kept in project file together with CASE_FIELDS:
+GUI_FIELDS = ('project', 'client', 'vessel_name', 'vessel_id', 'compartment_type', 'insulation_type',
+              'liquid1_factor', 'liquid2_factor', 't11', 't12', 't13', 'demister_height_rewrite')
+# Results of sizing in order of calculation together with function, which calculates each of them:
+RESULT_CHAIN = (('k_value', 'k_value_calculation'),
+                ('allowable_gas_velocity', 'calculate_allowable_gas_velocity'),
+                ('actual_gas_rate', 'calculate_actual_gas_rate'),
+                ('min_diameter', 'vertical_vessel_min_diameter'),
+                ('required_demister_area', 'calculate_required_demister_area'),
+                ('demister_diameter', 'calculate_demister_dimensions'),
+                ('cross_area', 'calculate_cross_area'),
+                ('actual_gas_velocity', 'calculate_actual_gas_velocity'),
+                ('bottom_to_lsal', 'calculate_bottom_to_LSAL'),
+                ('bottom_volume', 'calc_bottom_volume_for_vertical_sep'),
+                ('lsal_to_lal_inventory', 'calc_liquid_zone_inventory'),
+                ('lsal_to_lal_height', 'calc_liquid_zone_height_for_vertical_vessel'),
+                ('lal_to_lah_inventory', 'calc_liquid_zone_inventory'),
+                ('lal_to_lah_height', 'calc_liquid_zone_height_for_vertical_vessel'),
+                ('lah_to_lsah_inventory', 'calc_liquid_zone_inventory'),
+                ('lah_to_lsah_height', 'calc_liquid_zone_height_for_vertical_vessel'),
+                ('lsal_to_lal_inventory_recalc', 'recalculate_liquid_inventory'),
+                ('lal_to_lah_inventory_recalc', 'recalculate_liquid_inventory'),
+                ('lah_to_lsah_inventory_recalc', 'recalculate_liquid_inventory'),
+                ('lsah_to_inlet', 'calculate_lsah_to_inlet'),
+                ('inlet_to_demister', 'calc_height_from_inlet_nozzle_for_vertical_vessel'),
+                ('demister_height', 'set_demister_height'),
+                ('demister_to_tangent', 'calc_height_from_top_of_demister_to_tangent_of_vertical_vessel'),
+                ('tan_to_tan', 'calc_tan_to_tan_height')) + \
+    tuple((name + '_id', 'ND_VOC') for name in NOZZLE_NAMES) + \
+    tuple((name + '_velocity', 'calc_nozzle_velocity') for name in NOZZLE_NAMES) + \
+    tuple((name + '_momentum', 'calc_nozzle_momentum') for name in NOZZLE_NAMES) + \
+    (('allowable_stress', 'calc_allowable_stress'),
+     ('design_stress', 'calc_design_stress'),
+     ('material_density', 'choose_material_density'),
+     ('shell_thickness', 'calc_shell_thickness'),
+     ('head_thickness', 'calc_head_thickness'),
+     ('shell_area', 'calc_shell_surf_area'),
+     ('head_area', 'calc_head_surf_area'),
+     ('shell_weight', 'calc_weight'),
+     ('head_weight', 'calc_weight'),
+     ('total_weight', 'calc_total_weight'),
+     ('l_d_ratio', 'calc_length_to_diameter_ratio'),
+     ('separation', 'get_separation_quality'),
+     ('vessel_volume', 'calc_vessel_volume'))
+RESULT_FIELDS = tuple(field for field, function in RESULT_CHAIN)
+
+
+def size_vertical_separator(case):
+    """This function runs the same chain of calculations as update of GUI, but for one case given as
+    dictionary with CASE_FIELDS keys. Values are passed between functions as strings, exactly as GUI
+    does through its variables. Empty rewrite fields take calculated value. If chain fails on division
+    by zero, remaining results stay None, same as GUI values are not updated on that tick."""
+    results = dict.fromkeys(RESULT_FIELDS)
+    get = case.get
+
+    def rewrite(field, result):
+        value = get(field, '')
+        return str(results[result]) if value == '' else str(value)
+
+    try:
+        demister = get('demister', False)
+        liq1_density, vapor_density = str(get('liquid1_density', '')), str(get('vapor_density', ''))
+        vessel_diameter, head_and_bottom = str(get('vessel_diameter', '')), get('head_and_bottom', 'None')
+        # Velocity calculation:
+        results['k_value'] = k_value_calculation(str(get('carry_over', '')), demister,
+                                                 str(get('surface_tension', '')), liq1_density, vapor_density)
+        results['allowable_gas_velocity'] = calculate_allowable_gas_velocity(
+            rewrite('k_value_rewrite', 'k_value'), liq1_density, vapor_density, str(get('vl_safety_factor', '')))
+        results['actual_gas_rate'] = calculate_actual_gas_rate(str(get('vapor_mass_flow', '')), vapor_density)
+        results['min_diameter'] = vertical_vessel_min_diameter(str(results['actual_gas_rate']),
+                                                               str(results['allowable_gas_velocity']))
+        results['required_demister_area'] = calculate_required_demister_area(
+            str(results['actual_gas_rate']), str(results['allowable_gas_velocity']), demister)
+        results['demister_diameter'] = calculate_demister_dimensions(str(results['required_demister_area']))
+        results['cross_area'] = calculate_cross_area(vessel_diameter)
+        results['actual_gas_velocity'] = calculate_actual_gas_velocity(str(results['actual_gas_rate']),
+                                                                       str(results['cross_area']))
+        # Liquid zones:
+        orientation = get('vessel_orientation', 'V')
+        results['bottom_to_lsal'] = calculate_bottom_to_LSAL(head_and_bottom, vessel_diameter, orientation)
+        bottom_to_lsal = rewrite('bottom_to_lsal_rewrite', 'bottom_to_lsal')
+        results['bottom_volume'] = calc_bottom_volume_for_vertical_sep(head_and_bottom, vessel_diameter,
+                                                                       bottom_to_lsal, orientation)
+        zones = (('lsal_to_lal', 't1', True), ('lal_to_lah', 't2', False), ('lah_to_lsah', 't3', False))
+        for zone, residence_time, zone1 in zones:
+            results[zone + '_inventory'] = calc_liquid_zone_inventory(
+                str(get('liquid1_mass_flow', '')), liq1_density, str(get(residence_time, '')))
+            results[zone + '_height'] = calc_liquid_zone_height_for_vertical_vessel(
+                str(results[zone + '_inventory']), str(results['cross_area']), vessel_diameter,
+                head_and_bottom, get('vessel_phase', 2), zone1)
+        zone_heights = [rewrite(zone + '_height_rewrite', zone + '_height') for zone, t, z in zones]
+        for (zone, residence_time, zone1), height in zip(zones, zone_heights):
+            results[zone + '_inventory_recalc'] = recalculate_liquid_inventory(height, str(results['cross_area']))
+        # Vapor zone and demister:
+        results['lsah_to_inlet'] = calculate_lsah_to_inlet(vessel_diameter)
+        if orientation == 'V':
+            results['inlet_to_demister'] = calc_height_from_inlet_nozzle_for_vertical_vessel(
+                get('vessel_application', 2), bottom_to_lsal, demister, head_and_bottom, vessel_diameter)
+        results['demister_height'] = set_demister_height(orientation, demister)
+        results['demister_to_tangent'] = calc_height_from_top_of_demister_to_tangent_of_vertical_vessel(
+            vessel_diameter, head_and_bottom, str(results['demister_diameter']), demister)
+        results['tan_to_tan'] = calc_tan_to_tan_height(
+            bottom_to_lsal, *zone_heights, rewrite('lsah_to_inlet_rewrite', 'lsah_to_inlet'),
+            rewrite('inlet_to_demister_rewrite', 'inlet_to_demister'), str(results['demister_height']),
+            rewrite('demister_to_tangent_rewrite', 'demister_to_tangent'))
+        # Nozzles, vapor outlet gets vapor only, liquid outlets get their liquid only:
+        flows = {'inlet': ('vapor_mass_flow', 'liquid1_mass_flow', 'liquid2_mass_flow'),
+                 'vapor_outlet': ('vapor_mass_flow', None, None),
+                 'liquid1_outlet': (None, 'liquid1_mass_flow', None),
+                 'liquid2_outlet': (None, None, 'liquid2_mass_flow')}
+        for name in NOZZLE_NAMES:
+            inner_diameter = ND_VOC.inner_diameter(str(get(name + '_dn', '')), str(get(name + '_sch', '')))
+            results[name + '_id'] = inner_diameter or ''
+            mass_flows = ['0' if field is None else str(get(field, '')) for field in flows[name]]
+            args = (mass_flows[0], vapor_density, mass_flows[1], liq1_density, mass_flows[2],
+                    str(get('liquid2_density', '')))
+            results[name + '_velocity'] = calc_nozzle_velocity(*args, results[name + '_id'])
+            results[name + '_momentum'] = calc_nozzle_momentum(*args, str(results[name + '_velocity']))
+        # Wall thickness and weight:
+        material = get('material', '')
+        design_pressure, corrosion_allowance = str(get('design_pressure', '')), str(get('corrosion_allowance', ''))
+        joint_efficiency = str(get('joint_efficiency', ''))
+        results['allowable_stress'] = calc_allowable_stress(str(get('design_temperature', '')), METAL_STRESS,
+                                                            material)
+        results['design_stress'] = calc_design_stress(str(results['allowable_stress']))
+        results['material_density'] = choose_material_density(material, METAL_DENSITY)
+        results['shell_thickness'] = calc_shell_thickness(design_pressure, vessel_diameter,
+                                                          str(results['design_stress']), joint_efficiency,
+                                                          corrosion_allowance)
+        results['head_thickness'] = calc_head_thickness(design_pressure, vessel_diameter,
+                                                        str(results['design_stress']), joint_efficiency,
+                                                        corrosion_allowance, head_and_bottom)
+        tan_to_tan = rewrite('tan_to_tan_rewrite', 'tan_to_tan')
+        results['shell_area'] = calc_shell_surf_area(vessel_diameter, str(results['shell_thickness']), tan_to_tan)
+        results['head_area'] = calc_head_surf_area(vessel_diameter, str(results['shell_thickness']),
+                                                   head_and_bottom)
+        results['shell_weight'] = calc_weight(str(results['shell_thickness']), str(results['shell_area']),
+                                              str(results['material_density']))
+        results['head_weight'] = calc_weight(str(results['head_thickness']), str(results['head_area']),
+                                             str(results['material_density']))
+        results['total_weight'] = calc_total_weight(str(results['shell_weight']), str(results['head_weight']))
+        # Results tab:
+        results['l_d_ratio'] = calc_length_to_diameter_ratio(tan_to_tan, vessel_diameter)
+        results['separation'] = get_separation_quality(vessel_diameter, str(results['min_diameter']))
+        results['vessel_volume'] = calc_vessel_volume(tan_to_tan, vessel_diameter, head_and_bottom)
+    except (ZeroDivisionError, TypeError):
+        pass
+    return results
+
+
 def fetch_button_action(root, data_input_boxes):
     """This Function is for fetching data from excel file, mainly Data file.
     Data is taken from N column from certain rows. Address Data file if any
@@ -417,6 +599,7 @@ def fetch_button_action(root, data_input_boxes):
         data_input_boxes[i].delete(first=0, last=None)
         cell = sheet['N' + str(i + 3)].value
         data_input_boxes[i].insert(0, str(round(cell, 3)))
+    return root.filename
 
 
 def output_button_action(root, liq1_flow, liq1_density, vapor_flow, vapor_mol_weight, vapor_density,
@@ -428,7 +611,16 @@ def output_button_action(root, liq1_flow, liq1_density, vapor_flow, vapor_mol_we
     further clarification needed."""
     root.filename = filedialog.askopenfilename(initialdir='C:/', title='Choose data file')
     wb = openpyxl.load_workbook(root.filename)
-    sheet = wb.active
+    fill_spec_sheet(wb.active, liq1_flow, liq1_density, vapor_flow, vapor_mol_weight, vapor_density, oper_temp,
+                    oper_pressure, design_temperature, design_pressure, shell_id, tan_to_tan_length, corr_allowance,
+                    insulation, shell_material, demister)
+    wb.save(root.filename)
+
+
+def fill_spec_sheet(sheet, liq1_flow, liq1_density, vapor_flow, vapor_mol_weight, vapor_density,
+                    oper_temp, oper_pressure, design_temperature, design_pressure, shell_id,
+                    tan_to_tan_length, corr_allowance, insulation, shell_material, demister):
+    """Fills F column (rows 2-19) of Spec sheet, values are given as GUI entries keep them"""
     sheet['F' + str(2)] = liq1_flow
     sheet['F' + str(3)] = liq1_density
     sheet['F' + str(4)] = vapor_flow
@@ -452,7 +644,6 @@ def output_button_action(root, liq1_flow, liq1_density, vapor_flow, vapor_mol_we
         sheet['F' + str(19)] = 'Yes'
     elif demister is False:
         sheet['F' + str(19)] = 'No'
-    wb.save(root.filename)
 
 
 
@@ -496,10 +687,59 @@ def disable_demister(value, demister_box, demister):
         demister_box.configure(state=ACTIVE)
 
 
-def main():
-    import openpyxl
+# Delay between input and recalculation of vessel, ms:
+UPDATE_DELAY = 100
+# Some values of update are read before they are set in the same pass, second pass settles them:
+SETTLE_PASSES = 2
+
+
+class Scheduler:
+    """One timer for all vessels of session. Vessel is recalculated only when it is visible and its
+    input was changed, so session with many vessels costs nothing at idle. visible is function which
+    gives visible vessel, vessels are any keys (names of their frames in GUI)."""
+
+    def __init__(self, root, visible):
+        self.root = root
+        self.visible = visible
+        self.updates = {}
+        self.dirty = set()
+        self.pending = None
+
+    def add(self, vessel, update):
+        self.updates[vessel] = update
+        self.changed(vessel)
+
+    def remove(self, vessel):
+        self.updates.pop(vessel, None)
+        self.dirty.discard(vessel)
+
+    def changed(self, vessel=None):
+        """Marks vessel (visible one by default) for recalculation"""
+        vessel = self.visible() if vessel is None else vessel
+        if vessel in self.updates:
+            self.dirty.add(vessel)
+            self.shown()
+
+    def shown(self):
+        """Schedules recalculation of visible vessel, if it was changed while hidden"""
+        if self.pending is None and self.visible() in self.dirty:
+            self.pending = self.root.after(UPDATE_DELAY, self.run)
+
+    def run(self):
+        self.pending = None
+        vessel = self.visible()
+        if vessel in self.dirty:
+            self.dirty.discard(vessel)
+            for _ in range(SETTLE_PASSES):
+                self.updates[vessel]()
+
+
+def build_vessel(parent, changed, watch=None):
+    """Fills parent frame with tabs of one vessel. changed is called when choice of vessel is
+    changed from menu, watch is called with Data file fetched by vessel. Returns update function
+    of vessel, which recalculates all its values, and inputs of vessel."""
     def update():
-        """This function is intended for update of GUI every 1 second."""
+        """This function updates all calculated values of vessel."""
         try:
             # for velocity variables:
             k_value_var.set(str(k_value_calculation(carry_over.get(), demister.get(), data_input_boxes[12].get(),
@@ -562,10 +802,7 @@ def main():
             except KeyError: pass
             # nozzle data updates:
             for i, variable in enumerate(internalDiameterVarList):
-                try:
-                    variable.set('')
-                    variable.set(nd_voc[dn_var_list[i].get()][sch_var_list[i].get()])
-                except KeyError: pass
+                variable.set(nd_voc.inner_diameter(dn_var_list[i].get(), sch_var_list[i].get()) or '')
             # Nozzle velocity updates
             speedVarList[0].set(str(calc_nozzle_velocity(data_input_boxes[2].get(), data_input_boxes[3].get(),
                                                          data_input_boxes[6].get(), data_input_boxes[7].get(),
@@ -632,44 +869,32 @@ def main():
 
         except ZeroDivisionError:
             pass
-        root.after(500, update)
 
-    # Initializing tkinter, setting title and window size:
-    root = Tk()
-    root.title("Vessel sizing")
-    root.geometry("1200x800")
-
-    # Configure columns and rows in grid to automatically resize window:
-    Grid.columnconfigure(root, 0, weight=1)
-    Grid.rowconfigure(root, 0, weight=1)
-
-    # Adding menu:
-    my_menu = Menu(root)
-    root.config(menu=my_menu)
-    file_menu = Menu(my_menu)
-    help_menu = Menu(my_menu)
-    my_menu.add_cascade(label='File', menu=file_menu)
-    my_menu.add_cascade(label='Help', menu=help_menu)
-    file_menu.add_command(label='Exit', command=root.quit)
+    # Configure columns and rows in grid to automatically resize vessel frame:
+    Grid.columnconfigure(parent, 0, weight=1)
+    Grid.rowconfigure(parent, 0, weight=1)
 
     # Adding tabs
-    my_tabs = ttk.Notebook(root)
+    my_tabs = ttk.Notebook(parent)
     my_tabs.grid(sticky="nsew")
 
     my_tab1 = Frame(my_tabs, width=1024, height=800)
     my_tab2 = Frame(my_tabs, width=1024, height=800)
     my_tab3 = Frame(my_tabs, width=1024, height=800)
     my_tab4 = Frame(my_tabs, width=1024, height=800)
+    my_tab5 = Frame(my_tabs, width=1024, height=800)
 
     my_tab1.grid(sticky="nsew")
     my_tab2.grid(sticky="nsew")
     my_tab3.grid(sticky="nsew")
     my_tab4.grid(sticky="nsew")
+    my_tab5.grid(sticky="nsew")
 
     my_tabs.add(my_tab1, text='Data')
     my_tabs.add(my_tab2, text='Calculation')
     my_tabs.add(my_tab3, text='Result')
     my_tabs.add(my_tab4, text='Drawing')
+    my_tabs.add(my_tab5, text='What-if')
 
     # Filling Data tab (my_tab1):
     # Creating header for initial data
@@ -709,8 +934,12 @@ def main():
         data_input_boxes[i].grid(column=2, row=i + 2)
 
     # Adding fetch button, to be able to get data from excel data file:
-    fetch_button = Button(my_tab1, text='Fetch', width=10, command=lambda: fetch_button_action(my_tab1,
-                                                                                               data_input_boxes))
+    def fetch():
+        path = fetch_button_action(my_tab1, data_input_boxes)
+        if watch is not None:
+            watch(path)
+
+    fetch_button = Button(my_tab1, text='Fetch', width=10, command=fetch)
     fetch_button.grid(column=2)
 
     # Adding header for vessel choice:
@@ -802,14 +1031,18 @@ def main():
     project_name = Label(my_tab1, text='Project', padx=25).grid(column=4, row=1, sticky=W, columnspan=2)
     client_name = Label(my_tab1, text='Client', padx=25).grid(column=4, row=2, sticky=W, columnspan=2)
     # Adding input boxes for project and client
-    project_name_box = Entry(my_tab1, width=33, justify=CENTER).grid(column=5, row=1, columnspan=2)
-    client_name_box = Entry(my_tab1, width=33, justify=CENTER).grid(column=5, row=2, columnspan=2)
+    project_name_box = Entry(my_tab1, width=33, justify=CENTER)
+    project_name_box.grid(column=5, row=1, columnspan=2)
+    client_name_box = Entry(my_tab1, width=33, justify=CENTER)
+    client_name_box.grid(column=5, row=2, columnspan=2)
     # Adding labels for vor vessel name and tag
     vessel_name = Label(my_tab1, text='Vessel name', padx=25).grid(column=4, row=3, sticky=W, columnspan=2)
     vessel_id = Label(my_tab1, text='Vessel ID', padx=25).grid(column=4, row=4, sticky=W)
     # Adding input boxes for vessel name and tag
-    vessel_name_box = Entry(my_tab1, width=33, justify=CENTER).grid(column=5, row=3, columnspan=2)
-    vessel_id_box = Entry(my_tab1, width=33, justify=CENTER).grid(column=5, row=4, columnspan=2)
+    vessel_name_box = Entry(my_tab1, width=33, justify=CENTER)
+    vessel_name_box.grid(column=5, row=3, columnspan=2)
+    vessel_id_box = Entry(my_tab1, width=33, justify=CENTER)
+    vessel_id_box.grid(column=5, row=4, columnspan=2)
 
     # Header for safety factors:
     safety_factors = Label(my_tab1, text='Safety factors:', font=('Helvetica 10 bold'), padx=25)
@@ -1034,56 +1267,11 @@ def main():
     tan_to_tan_uom = Label(my_tab2, text='m').grid(column=7, row=28, sticky=W, padx=10)
 
     # Nozzle data
-    # Creating nominal_diameter_vocabulary to be able to find inner diameter of different pipes:
-    nd_voc = {'1.5': {'5S': '0.045', '10S': '0.0427', 'std': '0.0409', '40': '0.0409',
-                      'XS': '0.0381', '80': '0.0381', '160': '0.034', 'XXS': '0.028'},
-              '2': {'5S': '0.057', '10S': '0.0548', 'std': '0.0525', '40': '0.0525',
-                    'XS': '0.0493', '80': '0.0493', '160': '0.0428', 'XXS': '0.038'},
-              '3': {'5S': '0.0847', '10S': '0.0828', 'std': '0.0779', '40': '0.0779',
-                    'XS': '0.0737', '80': '0.0737', '160': '0.0666', 'XXS': '0.058'},
-              '4': {'5S': '0.11', '10S': '0.108', 'std': '0.102', '40': '0.102',
-                    'XS': '0.0972', '80': '0.0972', '120': '0.092', '160': '0.0873', 'XXS': '0.08'},
-              '6': {'5S': '0.163', '10S': '0.161', 'std': '0.154', '40': '0.154',
-                    'XS': '0.146', '80': '0.146', '120': '0.14', '160': '0.132', 'XXS': '0.124'},
-              '8': {'5S': '0.214', '10S': '0.212', '20': '0.206', '30': '0.205', 'std': '0.203',
-                    '40': '0.203', '60': '0.198', 'XS': '0.194', '80': '0.194', '100': '0.189',
-                    '120': '0.183', '140': '0.178', '160': '0.173', 'XXS': '0.175'},
-              '10': {'5S': '0.266', '10S': '0.265', '20': '0.26', '30': '0.257', 'std': '0.255',
-                     '40': '0.255', '60': '0.248', 'XS': '0.248', '80': '0.243', '100': '0.237',
-                     '120': '0.23', '140': '0.222', '160': '0.216', 'XXS': '0.222'},
-              '12': {'5S': '0.316', '10S': '0.315', '20': '0.311', '30': '0.307', 'std': '0.305',
-                     '40': '0.303', '60': '0.295', 'XS': '0.298', '80': '0.289', '100': '0.281',
-                     '120': '0.273', '140': '0.267', '160': '0.257', 'XXS': '0.237'},
-              '14': {'5S': '0.348', '10S': '0.346', '10': '0.343', '20': '0.34', '30': '0.337',
-                     'std': '0.337', '40': '0.333', '60': '0.325', 'XS': '0.33', '80': '0.318',
-                     '100': '0.308', '120': '0.3', '140': '0.292', '160': '0.284'},
-              '16': {'5S': '0.398', '10S': '0.398', '10': '0.394', '20': '0.391', '30': '0.387',
-                     'std': '0.387', '40': '0.381', '60': '0.373', 'XS': '0.381', '80': '0.364',
-                     '100': '0.354', '120': '0.344', '140': '0.333', '160': '0.325'},
-              '18': {'5S': '0.449', '10S': '0.448', '10': '0.445', '20': '0.441', '30': '0.435',
-                     'std': '0.438', '40': '0.429', '60': '0.419', 'XS': '0.432', '80': '0.41',
-                     '100': '0.398', '120': '0.387', '140': '0.378', '160': '0.367'},
-              '20': {'5S': '0.498', '10S': '0.497', '10': '0.495', '20': '0.489', '30': '0.483',
-                     'std': '0.489', '40': '0.478', '60': '0.467', 'XS': '0.483', '80': '0.456',
-                     '100': '0.443', '120': '0.432', '140': '0.419', '160': '0.408'},
-              '24': {'5S': '0.599', '10S': '0.597', '10': '0.597', '20': '0.591', '30': '0.581',
-                     'std': '0.581', '40': '0.575', '60': '0.56', 'XS': '0.584', '80': '0.548',
-                     '100': '0.532', '120': '0.518', '140': '0.505', '160': '0.491'},
-              '26': {'10': '0.645', '20': '0.635', 'std': '0.641', 'XS': '0.635'},
-              '28': {'10': '0.695', '20': '0.686', '30': '0.679', 'std': '0.692', 'XS': '0.686'},
-              '30': {'5S': '0.749', '10S': '0.746', '10': '0.746', '20': '0.737', '30': '0.73',
-                     'std': '0.743', 'XS': '0.737'},
-              '32': {'10': '0.797', '20': '0.784', '30': '0.781', 'std': '0.794', '40': '0.778',
-                     'XS': '0.787'},
-              '34': {'10': '0.848', '20': '0.838', '30': '0.832', 'std': '0.845', '40': '0.829',
-                     'XS': '0.838'},
-              '36': {'10': '0.899', '20': '0.889', '30': '0.883', 'std': '0.895', '40': '0.876',
-                     'XS': '0.889'},
-              '42': {'std': '1.048', 'XS': '1.041'}}
+    # Nominal diameter vocabulary to be able to find inner diameter of different pipes:
+    nd_voc = ND_VOC
     # Creating list of nominal diameters and list of schedules for pipes:
-    dn_list = ['1.5', '2', '3', '4', '6', '8', '10', '12', '14', '16', '18', '20', '24','26', '28', '30',
-               '32', '34', '36', '42']
-    sch_list = ['5S', '10S', '10', '20', '30', 'std', '40', '60', 'XS', '80', '100', '120', '140', '160', 'XS']
+    dn_list = list(nd_voc)
+    sch_list = nd_voc.schedules()
     dn_menus = {}
     sch_menus = {}
     # Creating variables and list of variables for drop down menus:
@@ -1132,35 +1320,8 @@ def main():
         rhoVsqrEntries[i].grid(column=13, row=3 + i)
 
     # Estimation of wall thickness and vessel weight
-    metal_stress = {'CS': {'-20': '17.1', '300': '17.1', '400': '17.1', '500': '17.1', '600': '16.4', '650': '15.8',
-                           '700': '15.3', '750': '13', '800': '10.8', '850': '8.7', '900': '5.9', '950': '4',
-                           '1000': '2.5', '1050': '0.1'},
-                    'KCS': {'-20': '20', '300': '20', '400': '20', '500': '20', '600': '19.4', '650': '18.8',
-                                  '700': '18.1', '750': '14.8', '800': '12', '850': '9.3', '900': '6.7', '950': '4',
-                                  '1000': '2.5', '1050': '0'},
-                    '0.5Mo': {'-20': '21.4', '300': '21.4', '400': '21.4', '500': '21.4', '600': '21.4', '650': '21.4',
-                              '700': '21.4', '750': '21.4', '800': '21.4', '850': '20', '900': '13.7', '950': '8.2',
-                              '1000': '4.8', '1050': '0'},
-                    '1.25Cr-0.5Mo': {'-20': '21.4', '300': '21.4', '400': '21.4', '500': '21.4', '600': '21.4',
-                                     '650': '21.4', '700': '21.4', '750': '21.4', '800': '21.4', '850': '20.2',
-                                     '900': '13.7', '950': '9.3','1000': '6.3', '1050': '4.2'},
-                    '2.25Cr-1Mo': {'-20': '21.4', '300': '20.9', '400': '20.6', '500': '20.5', '600': '20.4',
-                                   '650': '20.2', '700': '20', '750': '19.7', '800': '19.3', '850': '18.7',
-                                   '900': '15.8', '950': '11.4', '1000': '7.8', '1050': '5.1'},
-                    '5Cr-0.5Mo': {'-20': '21.4', '300': '20.8', '400': '20.6', '500': '20.5', '600': '20.2',
-                                  '650': '19.9', '700': '19.5', '750': '18.9', '800': '18.2', '850': '14.3',
-                                  '900': '10.9', '950': '8','1000': '5.8', '1050': '4.2'},
-                    'SS316': {'-20': '20', '300': '15.6', '400': '14.3', '500': '13.3', '600': '12.6', '650': '12.3',
-                              '700': '12.1', '750': '11.9', '800': '11.8', '850': '11.6', '900': '11.5', '950': '11.4',
-                              '1000': '11.3', '1050': '11.2'},
-                    'SS321': {'-20': '20', '300': '16.5', '400': '15.3', '500': '14.3', '600': '13.5', '650': '13.2',
-                              '700': '13', '750': '12.7', '800': '12.6', '850': '12.4', '900': '12.3', '950': '12.1',
-                              '1000': '12', '1050': '9.6'},
-                    'SS347': {'-20': '20', '300': '17.1', '400': '16', '500': '15', '600': '14.3', '650': '14',
-                              '700': '13.8', '750': '13.7', '800': '13.6', '850': '13.5', '900': '13.4', '950': '13.4',
-                              '1000': '13.4', '1050': '12.1'}}
-    metal_density = {'CS': '7840', 'KCS': '7840', '0.5Mo': '7840', '1.25Cr-0.5Mo': '7840', '2.25Cr-1Mo': '7800',
-                     '5Cr-0.5Mo': '7750', 'SS316': '7990', 'SS321': '9010', 'SS347': '8000'}
+    metal_stress = METAL_STRESS
+    metal_density = METAL_DENSITY
     # Create header:
     Label(my_tab2, text='Wall thickness and vessel weight:', font=('Helvetica 10 bold'), padx=10) \
         .grid(sticky=W, columnspan=4, column=8, row=7)
@@ -1241,14 +1402,221 @@ def main():
          insulation_type.get(), material_var.get(), demister.get()))
     output_button.grid(column=1)
 
+    # Choices from drop down menus are not key or mouse events of vessel frame:
+    for variable in dn_var_list + sch_var_list + [material_var]:
+        variable.trace_add('write', changed)
+
+    # Entries and variables of all inputs by names of CASE_FIELDS and GUI_FIELDS:
+    inputs = {field: data_input_boxes[i] for i, field in enumerate(DATA_FIELDS)}
+    inputs.update({'carry_over': carry_over, 'demister': demister, 'k_value_rewrite': k_value,
+                   'vl_safety_factor': vapor_liquid_factor, 'vessel_diameter': vessel_diameter,
+                   'head_and_bottom': head_and_bottom, 'vessel_orientation': vessel_orientation,
+                   'vessel_phase': vessel_phase, 'vessel_application': vessel_application,
+                   't1': t1_box, 't2': t2_box, 't3': t3_box, 'bottom_to_lsal_rewrite': bottom_entry_rewrite,
+                   'lsal_to_lal_height_rewrite': lsalToLalHeightRewrite,
+                   'lal_to_lah_height_rewrite': lalToLahHeightRewrite,
+                   'lah_to_lsah_height_rewrite': lahToLsahHeightRewrite,
+                   'lsah_to_inlet_rewrite': lsahToInletEntryRewrite,
+                   'inlet_to_demister_rewrite': inletToDemisterEntryRewrite,
+                   'demister_to_tangent_rewrite': demisterToTangentRewrite, 'tan_to_tan_rewrite': tan_to_tan_rewrite,
+                   'design_pressure': mech_entries[0], 'design_temperature': mech_entries[1],
+                   'corrosion_allowance': mech_entries[2], 'joint_efficiency': mech_entries[3],
+                   'material': material_var})
+    inputs.update({name + '_dn': variable for name, variable in zip(NOZZLE_NAMES, dn_var_list)})
+    inputs.update({name + '_sch': variable for name, variable in zip(NOZZLE_NAMES, sch_var_list)})
+    inputs.update({'project': project_name_box, 'client': client_name_box, 'vessel_name': vessel_name_box,
+                   'vessel_id': vessel_id_box, 'compartment_type': compartment_type,
+                   'insulation_type': insulation_type, 'liquid1_factor': liquid1_factor,
+                   'liquid2_factor': liquid2_factor, 't11': t11_box, 't12': t12_box, 't13': t13_box,
+                   'demister_height_rewrite': demisterHeightRewrite})
+
+    # Filling what-if tab: sliders change copy of vessel inputs, chart is redrawn on every move of slider
+    from vessel_engine import parse_case, to_float
+    from vessel_whatif import CurveChart, SLIDERS, curves, diameter_range, moved_sliders
+    whatif_chart = CurveChart(Canvas(my_tab5, width=600, height=360, bg='white'))
+    whatif_chart.canvas.grid(column=1, row=0, rowspan=len(SLIDERS) + 2, padx=10, pady=10)
+    whatif_case, whatif_diameters, whatif_scales, whatif_taken = {}, [], {}, {}
+
+    def whatif_moved():
+        return moved_sliders(whatif_taken, {field: scale.get() for field, scale in whatif_scales.items()})
+
+    def whatif_redraw(*args):
+        if whatif_diameters:
+            case = dict(whatif_case, **whatif_moved())
+            whatif_chart.draw(whatif_diameters, curves(case, whatif_diameters), case['vessel_diameter'])
+
+    def whatif_take():
+        """Takes inputs of vessel as base case of sliders"""
+        whatif_case.clear()
+        whatif_case.update(parse_case(read_inputs(inputs)))
+        whatif_diameters[:] = diameter_range(whatif_case)
+        whatif_scales['vessel_diameter'].configure(from_=round(whatif_diameters[0], 2),
+                                                   to=round(whatif_diameters[-1], 2))
+        for field, scale in whatif_scales.items():
+            value = to_float(whatif_case.get(field))
+            if value is not None:
+                scale.set(value)
+        whatif_taken.clear()
+        whatif_taken.update({field: scale.get() for field, scale in whatif_scales.items()})
+        whatif_redraw()
+
+    def whatif_apply():
+        """Puts values of sliders moved since inputs were taken into entries of vessel"""
+        moved = whatif_moved()
+        if moved:
+            write_inputs(inputs, moved)
+            changed()
+
+    for i, (field, label, low, high, resolution) in enumerate(SLIDERS):
+        whatif_scales[field] = Scale(my_tab5, label=label, from_=low, to=high, resolution=resolution,
+                                     orient=HORIZONTAL, length=250, command=whatif_redraw)
+        whatif_scales[field].grid(column=0, row=i, padx=10, sticky=W)
+    Button(my_tab5, text='Take inputs', width=12, command=whatif_take).grid(column=0, row=len(SLIDERS), sticky=W,
+                                                                            padx=10)
+    Button(my_tab5, text='Apply to vessel', width=12, command=whatif_apply).grid(column=0, row=len(SLIDERS) + 1,
+                                                                                 sticky=W, padx=10)
+    my_tabs.bind('<<NotebookTabChanged>>',
+                 lambda event: whatif_take() if my_tabs.select() == str(my_tab5) else None)
+    return update, inputs
+
+
+def read_inputs(inputs):
+    """Values of vessel inputs (see build_vessel) as dictionary"""
+    return {field: widget.get() for field, widget in inputs.items()}
+
+
+def write_inputs(inputs, values):
+    """Puts values into vessel inputs at once, nothing is recalculated. Entries, which are disabled
+    (for example liquid 2 inputs of 2-phase vessel), are enabled for writing."""
+    for field, value in values.items():
+        widget = inputs.get(field)
+        if isinstance(widget, Entry):
+            state = widget.cget('state')
+            widget.configure(state=NORMAL)
+            widget.delete(0, END)
+            widget.insert(0, value)
+            widget.configure(state=state)
+        elif widget is not None:
+            widget.set(value)
+
+
+def main():
+    import openpyxl
+    from vessel_project import save_project, load_project
+    from vessel_watch import DataWatcher, WATCH_PERIOD
+    # Initializing tkinter, setting title and window size:
+    root = Tk()
+    root.title("Vessel sizing")
+    root.geometry("1200x800")
 
+    # Configure columns and rows in grid to automatically resize window:
+    Grid.columnconfigure(root, 0, weight=1)
+    Grid.rowconfigure(root, 0, weight=1)
+
+    # Every vessel of session is one tab, all of them are recalculated by one scheduler:
+    # Vessel frame is filled when it is shown first time, till then its values wait in pending:
+    vessel_tabs = ttk.Notebook(root)
+    vessel_tabs.grid(sticky="nsew")
+    scheduler = Scheduler(root, vessel_tabs.select)
+    numbers = count(1)
+    inputs, pending = {}, {}
+    # Data files fetched by vessels are watched by one poll of all of them, only while there are any:
+    watchers, watching = {}, []
+
+    def add_vessel(name=None, values=None):
+        frame = Frame(vessel_tabs)
+        vessel_tabs.add(frame, text=name or 'Vessel ' + str(next(numbers)))
+        pending[str(frame)] = values or {}
+        return frame
+
+    def show_vessel():
+        vessel = vessel_tabs.select()
+        if vessel in pending:
+            update, inputs[vessel] = build_vessel(root.nametowidget(vessel),
+                                                  lambda *args: scheduler.changed(vessel),
+                                                  lambda path: watch_vessel(vessel, path))
+            write_inputs(inputs[vessel], pending.pop(vessel))
+            scheduler.add(vessel, update)
+        scheduler.shown()
+
+    def close_vessel(vessel=None):
+        vessel = vessel or vessel_tabs.select()
+        if vessel:
+            scheduler.remove(vessel)
+            watchers.pop(vessel, None)
+            inputs.pop(vessel, None)
+            pending.pop(vessel, None)
+            root.nametowidget(vessel).destroy()
+
+    def watch_vessel(vessel, path):
+        watchers[vessel] = DataWatcher(path)
+        status_box.configure(text='Watching data file: ' + path)
+        if not watching:
+            watching.append(root.after(WATCH_PERIOD, poll_watchers))
+
+    def poll_watchers():
+        watching.clear()
+        for vessel, watcher in list(watchers.items()):
+            changes = watcher.poll()
+            if changes:
+                write_inputs(inputs[vessel], changes)
+                scheduler.changed(vessel)
+                status_box.configure(text='Data file changed, updated: ' + ', '.join(changes))
+        if watchers:
+            watching.append(root.after(WATCH_PERIOD, poll_watchers))
+
+    def stop_watching():
+        if watchers.pop(vessel_tabs.select(), None) is not None:
+            status_box.configure(text='Data file is not watched')
+
+    def save_project_action():
+        path = filedialog.asksaveasfilename(title='Save project', defaultextension='.vsproj',
+                                            filetypes=[('Vessel sizing project', '*.vsproj')])
+        if path:
+            save_project(path, [(vessel_tabs.tab(vessel, 'text'),
+                                 read_inputs(inputs[vessel]) if vessel in inputs else pending[vessel])
+                                for vessel in vessel_tabs.tabs()])
+            status_box.configure(text='Project saved: ' + path)
+
+    def open_project_action():
+        path = filedialog.askopenfilename(title='Open project', filetypes=[('Vessel sizing project', '*.vsproj')])
+        if not path:
+            return
+        try:
+            vessels = load_project(path)
+        except (OSError, ValueError) as error:
+            status_box.configure(text='Project is not opened: ' + str(error))
+            return
+        for vessel in vessel_tabs.tabs():
+            close_vessel(vessel)
+        frames = [add_vessel(name, values) for name, values in vessels]
+        if frames:
+            vessel_tabs.select(frames[0])
+        status_box.configure(text='Project opened: ' + path)
+
+    # Adding menu:
+    my_menu = Menu(root)
+    root.config(menu=my_menu)
+    file_menu = Menu(my_menu)
+    help_menu = Menu(my_menu)
+    my_menu.add_cascade(label='File', menu=file_menu)
+    my_menu.add_cascade(label='Help', menu=help_menu)
+    file_menu.add_command(label='New vessel', command=lambda: vessel_tabs.select(add_vessel()))
+    file_menu.add_command(label='Open project', command=open_project_action)
+    file_menu.add_command(label='Save project', command=save_project_action)
+    file_menu.add_command(label='Stop watching data file', command=stop_watching)
+    file_menu.add_command(label='Close vessel', command=close_vessel)
+    file_menu.add_command(label='Exit', command=root.quit)
 
+    # Any input goes to visible vessel, only it is recalculated:
+    root.bind_all('<KeyRelease>', lambda event: scheduler.changed())
+    root.bind_all('<ButtonRelease>', lambda event: scheduler.changed())
+    vessel_tabs.bind('<<NotebookTabChanged>>', lambda event: show_vessel())
 
     # Adding status box
     status_box = Label(root, text='', bd=1, relief=SUNKEN, anchor=W)
     status_box.grid(sticky=W + E)
-    # Running update function to check and update all calculated values every 1 sec
-    update()
+    vessel_tabs.select(add_vessel())
     # starting main loop
     root.mainloop()
 
@@ -8,7 +8,7 @@ a = Analysis(
     ['vessel_calc.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('tables/*.csv', 'tables')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -2,6 +2,8 @@ import unittest
 from vessel_calc import calc_bottom_volume_for_vertical_sep
 from vessel_calc import calc_nozzle_velocity
 from vessel_calc import calc_allowable_stress
+from vessel_calc import get_separation_quality
+from vessel_calc import Scheduler, SETTLE_PASSES
 
 class MyTestCase(unittest.TestCase):
     def test_bottom_volume_calculation1(self):
@@ -43,5 +45,61 @@ class MyTestCase(unittest.TestCase):
                               '1000': '13.4', '1050': '12.1'}}, '1.25Cr-0.5Mo')
         self.assertAlmostEqual(allowable_stress, 21.4, 3)
 
+
+class Timer:
+    """Stand-in of Tk root, keeps callbacks of after until fire is called"""
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, delay, callback):
+        self.callbacks.append(callback)
+        return len(self.callbacks)
+
+    def fire(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+class SchedulerTestCase(unittest.TestCase):
+    def test_only_visible_changed_vessel(self):
+        timer, visible, calls = Timer(), ['v0'], []
+        scheduler = Scheduler(timer, lambda: visible[0])
+        for i in range(50):
+            scheduler.add('v' + str(i), lambda i=i: calls.append(i))
+        timer.fire()
+        self.assertEqual(calls, [0] * SETTLE_PASSES)
+        # Idle session does not schedule anything:
+        timer.fire()
+        self.assertEqual(timer.callbacks, [])
+        self.assertEqual(len(calls), SETTLE_PASSES)
+        # Hidden vessels are recalculated when shown:
+        visible[0] = 'v7'
+        scheduler.shown()
+        scheduler.changed()
+        self.assertEqual(len(timer.callbacks), 1)
+        timer.fire()
+        self.assertEqual(calls[SETTLE_PASSES:], [7] * SETTLE_PASSES)
+        scheduler.remove('v7')
+        scheduler.changed()
+        self.assertEqual(timer.callbacks, [])
+
+
+class Entry:
+    def configure(self, **options):
+        self.options = options
+
+
+class SeparationQualityTestCase(unittest.TestCase):
+    def test_diameters_are_compared_as_numbers(self):
+        # Texts of entries were compared as strings before, '10' >= '2.5' gave 'Not OK':
+        entry = Entry()
+        self.assertEqual(get_separation_quality('10', '2.5', entry), 'OK')
+        self.assertEqual(entry.options, {'fg': 'green'})
+        self.assertEqual(get_separation_quality('1.8', '1.885', entry), 'Not OK')
+        self.assertEqual(entry.options, {'fg': 'red'})
+        self.assertEqual(get_separation_quality('2', '2.0'), 'OK')
+        self.assertIsNone(get_separation_quality('', '2.5'))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,108 @@
+"""Catalog of standard demister pads: round and rectangular mesh and vane pads of tables/demisters.csv
+(vendor catalogs are added as extension files, see vessel_tables.py). For required demister area and
+vessel diameter the smallest pad is taken, which covers the area and fits in DEMISTER_FIT of the
+diameter (round pad by its diameter, rectangular one by its diagonal), the same check as the chain
+does for height from demister to tangent.
+
+Batch of cases is matched at once: pads are sorted by size which must fit, cases by allowed size.
+Going through cases from the smallest vessel, pads which fit are put into list sorted by area, and
+the smallest pad which covers the area is found by bisection of that list.
+
+Usage:
+    python vessel_demisters.py case.json --kind vane
+"""
+
+import argparse
+import json
+from array import array
+from bisect import bisect_left, insort
+
+from vessel_engine import parse_case, size_cases, to_float
+from vessel_tables import LazyTable, TABLES_DIRECTORY
+
+# Pad must be smaller than this share of vessel diameter:
+DEMISTER_FIT = 0.75
+DEMISTER_KINDS = ('mesh', 'vane')
+
+
+def pad_area(shape, width, length):
+    """Area of pad, m^2, with the same pi as calculate_demister_dimensions"""
+    return 3.1415 / 4 * width ** 2 if shape == 'round' else width * length
+
+
+def pad_fit(shape, width, length):
+    """Size of pad which must fit in vessel, m"""
+    return width if shape == 'round' else (width ** 2 + length ** 2) ** 0.5
+
+
+class DemisterCatalog(LazyTable):
+    """Mapping of pad name to pad dictionary (kind, shape, width, length, area)"""
+    kind = 'demisters'
+
+    def build(self, rows):
+        pads = {}
+        for pad, kind, shape, width, length in rows:
+            if kind not in DEMISTER_KINDS or shape not in ('round', 'rect'):
+                raise ValueError('Pad %s has unknown kind %r or shape %r' % (pad, kind, shape))
+            pads[pad] = (kind, shape, width, length)
+        names = sorted(pads, key=lambda pad: (pad_fit(*pads[pad][1:]), pad))
+        return (tuple(names), tuple(pads[pad][0] for pad in names), tuple(pads[pad][1] for pad in names),
+                array('d', [pads[pad][2] for pad in names]), array('d', [pads[pad][3] for pad in names]),
+                array('d', [pad_area(*pads[pad][1:]) for pad in names]),
+                array('d', [pad_fit(*pads[pad][1:]) for pad in names]), {pad: i for i, pad in enumerate(names)})
+
+    def pad(self, i):
+        names, kinds, shapes, widths, lengths, areas = self.loaded()[:6]
+        return {'pad': names[i], 'kind': kinds[i], 'shape': shapes[i], 'width': widths[i], 'length': lengths[i],
+                'area': round(areas[i], 4)}
+
+    def __getitem__(self, pad):
+        return self.pad(self.loaded()[7][pad])
+
+    def __iter__(self):
+        return iter(self.loaded()[0])
+
+    def __len__(self):
+        return len(self.loaded()[0])
+
+    def match(self, areas, diameters, kind=None):
+        """The smallest pad for every required area (m^2) and vessel diameter (m), None where area or
+        diameter is None or not positive, or no pad fits. Kind limits pads to mesh or vane ones."""
+        names, kinds, shapes, widths, lengths, pad_areas, fits, positions = self.loaded()
+        queries = sorted((diameter * DEMISTER_FIT, area, i) for i, (area, diameter) in enumerate(zip(areas, diameters))
+                         if area is not None and diameter is not None and area > 0 and diameter > 0)
+        matches = [None] * len(areas)
+        fitting, j = [], 0
+        for limit, area, i in queries:
+            while j < len(names) and fits[j] < limit:
+                if kind is None or kinds[j] == kind:
+                    insort(fitting, (pad_areas[j], j))
+                j += 1
+            k = bisect_left(fitting, (area, -1))
+            if k < len(fitting):
+                matches[i] = self.pad(fitting[k][1])
+        return matches
+
+
+DEMISTERS = DemisterCatalog(TABLES_DIRECTORY)
+
+
+def match_cases(cases, kind=None, catalog=DEMISTERS):
+    """Pad of catalog for every case with demister, sized by engine, None for cases without one"""
+    results = size_cases(cases)
+    return catalog.match([result['required_demister_area'] for result in results],
+                         [to_float(case.get('vessel_diameter')) for case in cases], kind)
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Smallest catalog demister pad for case')
+    arguments.add_argument('case', help='JSON file with case')
+    arguments.add_argument('--kind', choices=DEMISTER_KINDS)
+    options = arguments.parse_args()
+    with open(options.case, encoding='utf-8') as file:
+        case = parse_case(json.load(file))
+    print(json.dumps(match_cases([dict(case, demister=True)], options.kind)[0], indent=2))
+
+
+if __name__ == '__main__':
+    main()
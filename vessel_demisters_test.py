@@ -0,0 +1,49 @@
+import random
+import time
+import unittest
+from vessel_demisters import DEMISTERS, DEMISTER_FIT, match_cases
+from vessel_engine import size_cases
+from vessel_golden import generate_cases
+
+
+def smallest_pad(area, diameter, kind=None):
+    pads = [pad for pad in map(DEMISTERS.__getitem__, DEMISTERS) if kind in (None, pad['kind'])
+            and pad['area'] >= area and (pad['width'] if pad['shape'] == 'round' else
+                                         (pad['width'] ** 2 + pad['length'] ** 2) ** 0.5) < DEMISTER_FIT * diameter]
+    return min(pads, key=lambda pad: pad['area'])['area'] if pads else None
+
+
+class DemisterTestCase(unittest.TestCase):
+    def test_smallest_fitting_pad(self):
+        rnd = random.Random(5)
+        areas = [rnd.uniform(0.01, 6) for i in range(300)] + [None, 0, 1]
+        diameters = [rnd.uniform(0.3, 5) for i in range(300)] + [2, 2, None]
+        for kind in (None, 'vane'):
+            matches = DEMISTERS.match(areas, diameters, kind)
+            for area, diameter, pad in zip(areas[:300], diameters, matches):
+                self.assertAlmostEqual(pad and pad['area'], smallest_pad(area, diameter, kind), 3)
+                if pad is not None:
+                    self.assertIn(kind, (None, pad['kind']))
+            self.assertEqual(matches[300:], [None] * 3)
+
+    def test_round_pad_of_chain(self):
+        cases = [case for case in generate_cases(200) if case['demister']]
+        results = size_cases(cases)
+        for case, result, pad in zip(cases, results, match_cases(cases, 'mesh')):
+            if result['demister_diameter'] + 0.05 < float(case['vessel_diameter']) * DEMISTER_FIT:
+                self.assertLessEqual(pad['area'], round(3.1415 / 4 * (result['demister_diameter'] + 0.05) ** 2, 4))
+            if pad is not None:
+                self.assertGreaterEqual(pad['area'], result['required_demister_area'])
+
+    def test_batch_speed(self):
+        rnd = random.Random(6)
+        areas = [rnd.uniform(0.01, 6) for i in range(20000)]
+        diameters = [rnd.uniform(0.3, 5) for i in range(20000)]
+        DEMISTERS.match(areas[:1], diameters[:1])
+        start = time.perf_counter()
+        self.assertEqual(len(DEMISTERS.match(areas, diameters)), 20000)
+        self.assertLess(time.perf_counter() - start, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+"""Grade efficiency of gravity section of vertical separator and predicted carry-over to demister.
+Droplet settles against upward gas flow with terminal velocity of sphere by explicit drag relation of
+Haider and Levenspiel: Vt* = 1 / (18 / d*^2 + 0.591 / d*^0.5), where d* and Vt* are diameter and
+velocity made dimensionless by gas density, gas viscosity and density difference. It holds from
+Stokes to Newton regime, so no iteration of drag coefficient is needed.
+
+Gas velocity over cross area is not flat: turbulent profile u = u_max * (1 - r/R)^(1/7), u_max is
+60/49 of mean velocity (actual_gas_velocity). Droplet is captured where local gas velocity is below
+its terminal velocity, so captured share of droplets of one size is the area share of that ring:
+1 - (1 - (Vt/u_max)^7)^2, and all droplets with Vt >= u_max are captured.
+
+Terminal velocities depend on process data only, they are calculated once for all size bins of all
+cases. Efficiency at other gas velocity (other vessel diameter) needs one pass over bins only."""
+
+import math
+from array import array
+from bisect import bisect_left
+
+GRAVITY = 9.81
+# Maximum velocity of 1/7 power law profile in pipe as multiple of mean velocity:
+PROFILE_PEAK = 60 / 49
+# Default droplet size bins, m:
+BINS = 1000
+MIN_DROPLET, MAX_DROPLET = 1e-6, 2e-3
+NEGLIGIBLE = 0.05
+
+
+def terminal_velocities(diameters, liquid_density, vapor_density, vapor_viscosity):
+    """Terminal velocities (m/s) of droplets of given diameters (m), viscosity is in cP as in Data file"""
+    viscosity = vapor_viscosity / 1000
+    difference = liquid_density - vapor_density
+    length = (viscosity ** 2 / (GRAVITY * vapor_density * difference)) ** (1 / 3)
+    velocity = (viscosity * GRAVITY * difference / vapor_density ** 2) ** (1 / 3)
+    velocities = array('d')
+    for d in diameters:
+        size = d / length
+        velocities.append(velocity / (18 / size ** 2 + 0.591 / size ** 0.5))
+    return velocities
+
+
+def rosin_rammler(mean_diameter, spread, bins=BINS, smallest=MIN_DROPLET, largest=MAX_DROPLET):
+    """Droplet size bins of Rosin-Rammler distribution, mass share below d is 1 - exp(-(d/mean)^spread).
+    Returns diameters (m, geometric middle of log spaced bins) and mass shares of bins. Shares below
+    the smallest and above the largest bin are added to them, so shares sum to 1."""
+    ratio = (largest / smallest) ** (1 / bins)
+    edges = [smallest * ratio ** i for i in range(bins + 1)]
+    below = [1 - math.exp(-(edge / mean_diameter) ** spread) for edge in edges]
+    shares = array('d', [upper - lower for lower, upper in zip(below, below[1:])])
+    shares[0] += below[0]
+    shares[-1] += 1 - below[-1]
+    return array('d', [(lower * upper) ** 0.5 for lower, upper in zip(edges, edges[1:])]), shares
+
+
+def captured_share(terminal_velocity, peak_velocity):
+    """Share of droplets of one size settled in gravity section"""
+    if terminal_velocity >= peak_velocity:
+        return 1.0
+    return 1 - (1 - (terminal_velocity / peak_velocity) ** 7) ** 2
+
+
+def settled_share(terminal, shares, tail, gas_velocity):
+    """Share of droplets settled at mean gas velocity, terminal velocities of bins are increasing and
+    tail[j] is share of bins from j to the end"""
+    peak = gas_velocity * PROFILE_PEAK
+    if peak <= 0:
+        return 1.0
+    # Bins with terminal velocity above peak gas velocity are captured completely, bins below
+    # NEGLIGIBLE share of it are captured less than 2*NEGLIGIBLE^7 and are skipped:
+    first, last = bisect_left(terminal, peak * NEGLIGIBLE), bisect_left(terminal, peak)
+    return tail[last] + sum(share * (1 - (1 - (velocity / peak) ** 7) ** 2)
+                            for share, velocity in zip(shares[first:last], terminal[first:last]))
+
+
+class GravitySection:
+    """Droplet size bins of inlet liquid (diameters and mass shares, see rosin_rammler) for many
+    cases, cases are dictionaries with DATA_FIELDS keys as in vessel_engine. Case with missing or
+    wrong process data gets None results."""
+
+    def __init__(self, cases, diameters, shares):
+        self.shares = shares
+        self.tail = array('d', [0.0] * (len(shares) + 1))
+        for j in range(len(shares) - 1, -1, -1):
+            self.tail[j] = self.tail[j + 1] + shares[j]
+        self.terminal = []
+        for case in cases:
+            try:
+                self.terminal.append(terminal_velocities(diameters, float(case['liquid1_density']),
+                                                         float(case['vapor_density']),
+                                                         float(case['vapor_viscosity'])))
+            except (ValueError, TypeError, ZeroDivisionError, KeyError):
+                # Not a number, zero viscosity or liquid lighter than vapor (complex root):
+                self.terminal.append(None)
+
+    def efficiency(self, gas_velocities):
+        """Share of inlet droplets (by mass) settled in gravity section of every case at its mean
+        gas velocity (m/s)"""
+        return [None if terminal is None or gas_velocity is None else
+                settled_share(terminal, self.shares, self.tail, gas_velocity)
+                for terminal, gas_velocity in zip(self.terminal, gas_velocities)]
+
+    def grade_efficiency(self, case, gas_velocity):
+        """Captured share of every droplet size bin of one case (index of case)"""
+        peak = gas_velocity * PROFILE_PEAK
+        return [captured_share(v, peak) if peak > 0 else 1.0 for v in self.terminal[case]]
+
+    def carry_over(self, cases, gas_velocities, entrainment=1.0):
+        """Liquid carried over to demister, kg/h. entrainment is share of liquid 1 flow which enters
+        gravity section as droplets."""
+        return [None if e is None else round(float(case['liquid1_mass_flow']) * entrainment * (1 - e), 3)
+                for case, e in zip(cases, self.efficiency(gas_velocities))]
+
+    def min_diameters(self, gas_rates, max_carry_over, tolerance=1e-6):
+        """Smallest vessel diameter (m) of every case, which keeps carried over share of droplets
+        within max_carry_over, gas rate is actual_gas_rate in m^3/s. Mean gas velocity is found by
+        bisection, terminal velocities are not calculated again. Velocity is not taken above the
+        one at which the largest droplets start to be carried over."""
+        diameters = []
+        for terminal, gas_rate in zip(self.terminal, gas_rates):
+            if terminal is None or gas_rate is None:
+                diameters.append(None)
+                continue
+            # All droplets settle at the lowest velocity, not all of them at the highest one:
+            low, high = terminal[0] / PROFILE_PEAK, terminal[-1] / PROFILE_PEAK
+            if 1 - settled_share(terminal, self.shares, self.tail, high) <= max_carry_over:
+                low = high
+            while high - low > tolerance * high:
+                middle = (low + high) / 2
+                if 1 - settled_share(terminal, self.shares, self.tail, middle) <= max_carry_over:
+                    low = middle
+                else:
+                    high = middle
+            diameters.append(round((4 * gas_rate / low / math.pi) ** 0.5, 3))
+        return diameters
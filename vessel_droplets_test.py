@@ -0,0 +1,43 @@
+import math
+import unittest
+from vessel_droplets import GravitySection, rosin_rammler, terminal_velocities
+from vessel_engine import size_cases
+from vessel_golden import generate_cases
+
+
+class DropletTestCase(unittest.TestCase):
+    def test_terminal_velocity(self):
+        # Small droplets settle by Stokes law, large ones by Newton law with drag coefficient about 0.44:
+        small, large = terminal_velocities([1e-5, 5e-3], 700, 10, 0.012)
+        self.assertAlmostEqual(small / (9.81 * 1e-10 * 690 / 18 / 0.012e-3), 1, 1)
+        self.assertAlmostEqual(large / (4 / 3 * 9.81 * 5e-3 * 690 / 10 / 0.44) ** 0.5, 1, 1)
+
+    def test_efficiency(self):
+        cases = generate_cases(50)
+        results = size_cases(cases)
+        diameters, shares = rosin_rammler(150e-6, 2.5)
+        self.assertAlmostEqual(sum(shares), 1, 9)
+        section = GravitySection(cases + [dict(cases[0], vapor_density='')], diameters, shares)
+        self.assertEqual(section.efficiency([0.0] * 51)[:50], [1.0] * 50)
+        velocities = [result['actual_gas_velocity'] for result in results] + [1.0]
+        slow, fast = section.efficiency(velocities), section.efficiency([v * 2 for v in velocities])
+        self.assertTrue(all(a >= b for a, b in zip(slow[:50], fast[:50])))
+        self.assertIsNone(slow[50])
+        self.assertAlmostEqual(section.carry_over(cases, velocities)[0],
+                               float(cases[0]['liquid1_mass_flow']) * (1 - slow[0]), 2)
+        grade = section.grade_efficiency(0, velocities[0])
+        self.assertEqual(grade[-1], 1.0)
+        self.assertAlmostEqual(sum(g * s for g, s in zip(grade, shares)), slow[0], 6)
+
+    def test_min_diameters(self):
+        cases = generate_cases(20)
+        rates = [result['actual_gas_rate'] for result in size_cases(cases)]
+        section = GravitySection(cases, *rosin_rammler(150e-6, 2.5))
+        diameters = section.min_diameters(rates, 0.01)
+        fits = section.efficiency([rate / (math.pi / 4 * (d + 0.0005) ** 2) for rate, d in zip(rates, diameters)])
+        fails = section.efficiency([rate / (math.pi / 4 * (d - 0.005) ** 2) for rate, d in zip(rates, diameters)])
+        self.assertTrue(all(1 - share <= 0.01 for share in fits))
+        self.assertTrue(all(1 - share > 0.01 for share in fails))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,686 @@
+"""Batch sizing engine for vertical 2-phase separators.
+Cases are transposed to columns and every step of the GUI chain is calculated for the whole
+column at once. Results are the same as size_vertical_separator gives for each case, including
+rounding on every step, so both can be checked against golden corpus (see vessel_golden.py).
+
+Every column goes together with column of error codes, 0 is valid value. Code of failed value
+keeps kind of error in low bits (MISSING, NOT_NUMBER, ...) and names fields, which caused it, in
+high bits (see field_bit and describe_error). Steps are not calculated for values with error code,
+they get None and code of their arguments, so bad case does not raise and does not stop the batch.
+Where calc functions would raise (division by zero, root of negative number, temperature above
+stress table), step checks its arguments first and gives error code instead. Entries which are not
+finite numbers, and diameter, flows, densities and residence times which are not positive, get error
+code when they are read. Overflow, division by zero and value which is not finite are caught in every
+calculated value as well. Unlike GUI chain, which stops on such error, only results depending on
+failed value are lost."""
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+from vessel_calc import CASE_FIELDS, RESULT_FIELDS, NOZZLE_NAMES, METAL_STRESS, METAL_DENSITY, ND_VOC, freeze
+from vessel_calc import calc_allowable_stress, choose_material_density
+from vessel_strapping import interpolate
+
+# Cases are sized by chunks to keep temporary columns small:
+CHUNK_SIZE = 256
+FT = 0.3048
+
+# Souders-Brown K values of other standards, m/s. GPSA: K of vertical vessel with and without mesh
+# pad, multiplied by correction for operating pressure (psig of GPSA table converted to kg/cm^2):
+GPSA_K = freeze({True: 0.35 * FT, False: 0.18 * FT})
+GPSA_PRESSURE = tuple(psig / 14.2233 for psig in (0, 150, 300, 600, 1150))
+GPSA_CORRECTION = (1.0, 0.9, 0.85, 0.8, 0.75)
+# York design limits of demisters:
+YORK_K = freeze({'york_mesh': 0.35 * FT, 'york_vane': 0.5 * FT})
+# API 12J vertical separators of 5 and 10 ft height, lower K without and upper K with mist extractor:
+API_12J_HEIGHT = (5 * FT, 10 * FT)
+API_12J_K = freeze({False: (0.12 * FT, 0.18 * FT), True: (0.24 * FT, 0.35 * FT)})
+
+# Kinds of errors, low bits of error code:
+MISSING = 1         # empty entry
+NOT_NUMBER = 2      # entry is not a number
+NOT_POSITIVE = 4    # zero or negative value is divided by or rooted, or given for positive quantity
+DENSITY_ORDER = 8   # liquid density is not higher than vapor density
+UNKNOWN_CHOICE = 16  # unknown material, head, orientation, application, demister option or nozzle size
+OUT_OF_RANGE = 32   # design temperature is above stress table, pressure is too high for material or value overflows
+ERROR_KINDS = (('missing', MISSING), ('not_number', NOT_NUMBER), ('not_positive', NOT_POSITIVE),
+               ('density_order', DENSITY_ORDER), ('unknown_choice', UNKNOWN_CHOICE), ('out_of_range', OUT_OF_RANGE))
+# Values of fields missing in case, as GUI chain takes them, other fields are empty:
+CASE_DEFAULTS = freeze({'demister': False, 'head_and_bottom': 'None', 'vessel_orientation': 'V', 'vessel_phase': 2,
+                        'vessel_application': 2})
+# Case fields and result fields, which caused error, are marked by bits above kinds:
+FIELD_SHIFT = 8
+CODE_FIELDS = CASE_FIELDS + RESULT_FIELDS
+FIELD_INDEX = freeze({field: index for index, field in enumerate(CODE_FIELDS)})
+
+
+def field_bit(*fields):
+    """Bits of error code, which name given case or result fields"""
+    bits = 0
+    for field in fields:
+        bits |= 1 << (FIELD_SHIFT + FIELD_INDEX[field])
+    return bits
+
+
+def describe_error(code):
+    """Names of error kinds and names of fields of error code"""
+    kinds = tuple(name for name, kind in ERROR_KINDS if code & kind)
+    fields = tuple(field for index, field in enumerate(CODE_FIELDS) if code >> (FIELD_SHIFT + index) & 1)
+    return kinds, fields
+
+
+def to_float(value):
+    """Converts value to float same way as calc functions do, None is returned instead of ValueError
+    and for nan or infinity"""
+    try:
+        value = float(value)
+    except (ValueError, TypeError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def parse_case(record):
+    """Restores types of case read from text (CSV or JSON): demister is boolean, vessel phase and
+    application are integers, other values are kept as strings same as in GUI entries"""
+    case = {}
+    for field, value in record.items():
+        if field == 'demister':
+            case[field] = value is True or str(value).strip().lower() in ('true', '1', 'yes')
+        elif field in ('vessel_phase', 'vessel_application'):
+            try:
+                case[field] = int(value)
+            except (ValueError, TypeError):
+                case[field] = value
+        else:
+            case[field] = '' if value is None else str(value)
+    return case
+
+
+def to_columns(cases):
+    """Transposes list of case dictionaries to dictionary of columns with CASE_FIELDS keys"""
+    columns = {}
+    for field in CASE_FIELDS:
+        default = CASE_DEFAULTS.get(field, '')
+        columns[field] = [case.get(field, default) for case in cases]
+    return columns
+
+
+def to_rows(results, count):
+    """Transposes dictionary of result columns back to list of result dictionaries"""
+    columns = [results[field] for field in RESULT_FIELDS]
+    return [dict(zip(RESULT_FIELDS, values)) for values in zip(*columns)] if count else []
+
+
+def number_column(columns, field):
+    """Converts column of case field to floats. Returns values and error codes, empty or not
+    numeric entry gets None with MISSING or NOT_NUMBER code of this field."""
+    bit = field_bit(field)
+    values, codes = [], []
+    for raw in columns[field]:
+        value = to_float(raw)
+        values.append(value)
+        if value is None:
+            codes.append(bit | (MISSING if raw is None or str(raw).strip() == '' else NOT_NUMBER))
+        else:
+            codes.append(0)
+    return values, codes
+
+
+def positive_column(columns, field, zero_allowed=False):
+    """The same as number_column, but value which is not positive (negative, if zero is allowed)
+    gets None with NOT_POSITIVE code of this field"""
+    values, codes = number_column(columns, field)
+    bit = NOT_POSITIVE | field_bit(field)
+    for row, value in enumerate(values):
+        if value is not None and (value < 0 if zero_allowed else value <= 0):
+            values[row], codes[row] = None, bit
+    return values, codes
+
+
+def rewrite_column(columns, field, calculated):
+    """Empty rewrite takes calculated value and its error code, otherwise rewrite value is used"""
+    values, codes = number_column(columns, field)
+    return ([value if raw == '' else rewrite for raw, value, rewrite in zip(columns[field], calculated[0], values)],
+            [code if raw == '' else rewrite for raw, code, rewrite in zip(columns[field], calculated[1], codes)])
+
+
+def plain(values):
+    """Column without errors, for choices which are checked by step itself"""
+    return values, [0] * len(values)
+
+
+def calculate(function, *args):
+    """Value of function and 0, or None and error code, if function overflows or divides by zero or
+    its value is not finite"""
+    try:
+        value = function(*args)
+    except OverflowError:
+        return None, OUT_OF_RANGE
+    except ZeroDivisionError:
+        return None, NOT_POSITIVE
+    if isinstance(value, float) and not math.isfinite(value):
+        return None, OUT_OF_RANGE
+    return value, 0
+
+
+def step(function, check, *arguments):
+    """Applies function element by element to arguments given as (values, codes). Element with
+    error code in any argument gets None and all codes of arguments. check, if it is given, returns
+    error code of valid arguments, on which function would fail, or 0. Element, whose function
+    overflows, divides by zero or gives value which is not finite, gets None and error code too."""
+    values, codes = [], []
+    for args, arg_codes in zip(zip(*[argument[0] for argument in arguments]),
+                               zip(*[argument[1] for argument in arguments])):
+        code = 0
+        if any(arg_codes):
+            for arg_code in arg_codes:
+                code |= arg_code
+        elif check is not None:
+            code = check(*args)
+        if code:
+            values.append(None)
+            codes.append(code)
+        else:
+            value, code = calculate(function, *args)
+            values.append(value)
+            codes.append(code)
+    return values, codes
+
+
+def standard_k_value(columns):
+    """K value of GUI chain: carry-over correlation without demister, max(0.08, 0.15*(rl/rv-1)^-0.2)
+    with demister"""
+    liq1_density, rl_codes = positive_column(columns, 'liquid1_density')
+    vapor_density, rv_codes = positive_column(columns, 'vapor_density')
+    carry_over, co_codes = number_column(columns, 'carry_over')
+    surface_tension, st_codes = number_column(columns, 'surface_tension')
+    densities = field_bit('liquid1_density', 'vapor_density')
+    k_value, k_codes = [], []
+    for dem, co, st, rl, rv, co_code, st_code, rl_code, rv_code in zip(
+            columns['demister'], carry_over, surface_tension, liq1_density, vapor_density, co_codes, st_codes,
+            rl_codes, rv_codes):
+        if dem == False:
+            code = co_code | st_code | rl_code | rv_code
+            if not code and rl == rv:
+                code = DENSITY_ORDER | densities
+            elif not code and co < 0:
+                code = NOT_POSITIVE | field_bit('carry_over')
+            elif not code and st / (rl - rv) < 0:
+                code = DENSITY_ORDER | densities if rl < rv else NOT_POSITIVE | field_bit('surface_tension')
+            if not code:
+                k, code = calculate(lambda: round(3.145 * co ** (1 / 3) * (st / 1000 / (rl - rv)) ** 0.25, 3))
+            k_value.append(None if code else k)
+        elif dem == True:
+            code = rl_code | rv_code
+            if not code and rl / rv - 1 <= 0:
+                code = DENSITY_ORDER | densities
+            if not code:
+                k, code = calculate(lambda: round(max(0.08, 0.15 * (rl / rv - 1) ** - 0.2), 3))
+            k_value.append(None if code else k)
+        else:
+            code = 0
+            k_value.append(0)
+        k_codes.append(code)
+    return k_value, k_codes
+
+
+def gpsa_k_value(columns):
+    """GPSA K value of vertical vessel with or without mesh pad, corrected for operating pressure"""
+    return step(lambda dem, p: round(GPSA_K[dem == True] * interpolate(GPSA_PRESSURE, GPSA_CORRECTION, p), 3),
+                None, plain(columns['demister']), number_column(columns, 'pressure'))
+
+
+def york_k_value(kind):
+    """York design limit of mesh or vane demister, vessel without demister gets error code"""
+    def york(columns):
+        return ([round(YORK_K[kind], 3) if dem is True else None for dem in columns['demister']],
+                [0 if dem is True else UNKNOWN_CHOICE | field_bit('demister') for dem in columns['demister']])
+    return york
+
+
+def api_12j_k_value(columns):
+    """API 12J K value of vertical separator by its height. Tangent to tangent rewrite is taken as
+    height, 10 ft if it is empty."""
+    height = rewrite_column(columns, 'tan_to_tan_rewrite', plain([API_12J_HEIGHT[-1]] * len(columns['demister'])))
+    return step(lambda dem, h: round(interpolate(API_12J_HEIGHT, API_12J_K[dem == True], h), 3), None,
+                plain(columns['demister']), height)
+
+
+# K value correlations of batch engine, selected by k_correlation field of case. Every correlation
+# takes dictionary of case columns and returns K value column with error codes, other correlations
+# are added to this dictionary the same way:
+K_CORRELATIONS = {'': standard_k_value, 'standard': standard_k_value, 'gpsa': gpsa_k_value,
+                  'york_mesh': york_k_value('york_mesh'), 'york_vane': york_k_value('york_vane'),
+                  'api_12j': api_12j_k_value}
+
+
+def k_value_column(columns):
+    """K values of cases by their correlations. Cases are grouped by correlation, so every
+    correlation is called once for all its cases."""
+    groups = {}
+    for row, name in enumerate(columns['k_correlation']):
+        groups.setdefault(name, []).append(row)
+    if len(groups) == 1 and next(iter(groups)) in K_CORRELATIONS:
+        return K_CORRELATIONS[next(iter(groups))](columns)
+    count = len(columns['k_correlation'])
+    values, codes = [None] * count, [0] * count
+    for name, rows in groups.items():
+        if name not in K_CORRELATIONS:
+            for row in rows:
+                codes[row] = UNKNOWN_CHOICE | field_bit('k_correlation')
+            continue
+        part = {field: [column[row] for row in rows] for field, column in columns.items()}
+        for row, value, code in zip(rows, *K_CORRELATIONS[name](part)):
+            values[row], codes[row] = value, code
+    return values, codes
+
+
+def velocity_stage(columns):
+    """K value, gas velocities, minimal diameter, demister and cross area"""
+    liq1_density, vapor_density = positive_column(columns, 'liquid1_density'), positive_column(columns, 'vapor_density')
+    densities = field_bit('liquid1_density', 'vapor_density')
+    demister = columns['demister']
+    k_value, k_codes = k_value_column(columns)
+    k_used = rewrite_column(columns, 'k_value_rewrite', (k_value, k_codes))
+
+    allowable = step(lambda k, rl, rv, sf: round(k * (rl / rv - 1) ** 0.5 * sf, 2),
+                     lambda k, rl, rv, sf: DENSITY_ORDER | densities if rl / rv - 1 < 0 else 0,
+                     k_used, liq1_density, vapor_density, number_column(columns, 'vl_safety_factor'))
+    gas_rate = step(lambda vm, rv: round(vm / rv / 3600, 3), None, positive_column(columns, 'vapor_mass_flow'),
+                    vapor_density)
+
+    def check_min_diameter(gr, agv):
+        if agv == 0:
+            return NOT_POSITIVE | field_bit('allowable_gas_velocity')
+        if 4 * gr / agv / 3.1415 < 0:
+            return NOT_POSITIVE | field_bit('allowable_gas_velocity' if agv < 0 else 'actual_gas_rate')
+        return 0
+
+    min_diameter = step(lambda gr, agv: round((4 * gr / agv / 3.1415) ** 0.5, 3), check_min_diameter,
+                        gas_rate, allowable)
+    demister_area, area_codes = [], []
+    for dem, gr, agv, gr_code, agv_code in zip(demister, gas_rate[0], allowable[0], gas_rate[1], allowable[1]):
+        code = gr_code | agv_code if dem == True else 0
+        if dem == True and not code and agv == 0:
+            code = NOT_POSITIVE | field_bit('allowable_gas_velocity')
+        area = 0
+        if dem == True and not code:
+            area, code = calculate(lambda: round(gr / agv, 3))
+        demister_area.append(None if code else area)
+        area_codes.append(code)
+    demister_area = (demister_area, area_codes)
+    demister_diameter = step(lambda area: round((4 * area / 3.1415) ** 0.5, 3),
+                             lambda area: NOT_POSITIVE | field_bit('required_demister_area') if area < 0 else 0,
+                             demister_area)
+    cross_area = step(lambda d: round(3.1415 / 4 * d ** 2, 3), None, positive_column(columns, 'vessel_diameter'))
+    gas_velocity = step(lambda gr, ca: round(gr / ca, 3),
+                        lambda gr, ca: 0 if ca else NOT_POSITIVE | field_bit('cross_area'), gas_rate, cross_area)
+    return {'k_value': (k_value, k_codes), 'allowable_gas_velocity': allowable, 'actual_gas_rate': gas_rate,
+            'min_diameter': min_diameter, 'required_demister_area': demister_area,
+            'demister_diameter': demister_diameter, 'cross_area': cross_area, 'actual_gas_velocity': gas_velocity}
+
+
+def zone_stage(columns, velocity):
+    """Liquid zones, vapor zone, demister and tangent to tangent height"""
+    diameter, d_codes = positive_column(columns, 'vessel_diameter')
+    head, orientation = columns['head_and_bottom'], columns['vessel_orientation']
+    demister, cross_area = columns['demister'], velocity['cross_area']
+    choice = {field: UNKNOWN_CHOICE | field_bit(field)
+              for field in ('vessel_orientation', 'vessel_application', 'demister')}
+    results = {}
+    results['bottom_to_lsal'] = ([(0.5 if hb == 'E' else None if d is None else round(-0.25 * d, 3))
+                                  if vo == 'V' else 0 for hb, d, vo in zip(head, diameter, orientation)],
+                                 [d_code if vo == 'V' and hb != 'E' else 0
+                                  for hb, d_code, vo in zip(head, d_codes, orientation)])
+    bottom, b_codes = rewrite_column(columns, 'bottom_to_lsal_rewrite', results['bottom_to_lsal'])
+    bottom_volume, volume_codes = [], []
+    for hb, d, b, vo, d_code, b_code in zip(head, diameter, bottom, orientation, d_codes, b_codes):
+        code = 0 if vo != 'V' else d_code | b_code if hb == 'E' else d_code
+        volume = 0
+        if not code and vo == 'V' and hb == 'E':
+            volume, code = calculate(lambda: round((0.0416667 * d + 0.25 * b) * 3.1415 * d ** 2, 3))
+        elif not code and vo == 'V':
+            volume, code = calculate(lambda: round(0.029889 * 3.1415 * d ** 3, 3))
+        volume_codes.append(code)
+        bottom_volume.append(None if code else volume)
+    results['bottom_volume'] = (bottom_volume, volume_codes)
+    liq1_flow = positive_column(columns, 'liquid1_mass_flow')
+    liq1_density = positive_column(columns, 'liquid1_density')
+    diameter = (diameter, d_codes)
+    heights = []
+    for zone, residence_time, zone1 in (('lsal_to_lal', 't1', True), ('lal_to_lah', 't2', False),
+                                        ('lah_to_lsah', 't3', False)):
+        inventory = step(lambda f, rho, t: round(f / rho * t / 60, 3), None,
+                         liq1_flow, liq1_density, positive_column(columns, residence_time))
+        height = step(lambda inv, ca, d, hb, phase: round(inv / ca + 0.02 * d, 3)
+                      if hb == 'S' and (phase == 2 and zone1 is True) else round(inv / ca, 3),
+                      lambda inv, ca, d, hb, phase: 0 if ca else NOT_POSITIVE | field_bit('cross_area'),
+                      inventory, cross_area, diameter, plain(head), plain(columns['vessel_phase']))
+        results[zone + '_inventory'], results[zone + '_height'] = inventory, height
+        heights.append(rewrite_column(columns, zone + '_height_rewrite', height))
+    for zone, height in zip(('lsal_to_lal', 'lal_to_lah', 'lah_to_lsah'), heights):
+        results[zone + '_inventory_recalc'] = step(lambda h, ca: round(h * ca, 3), None, height, cross_area)
+    results['lsah_to_inlet'] = step(lambda d: round(max(0.3 * d, 0.3), 3), None, diameter)
+    inlet_to_demister, inlet_codes = [], []
+    for vo, app, b, dem, hb, d, b_code, d_code in zip(orientation, columns['vessel_application'], bottom, demister,
+                                                      head, diameter[0], b_codes, d_codes):
+        if vo != 'V':
+            code = choice['vessel_orientation']
+        elif app == 1:
+            code = d_code | b_code
+        elif app != 2:
+            code = d_code or choice['vessel_application']
+        elif dem != True and dem != False:
+            code = d_code or choice['demister']
+        else:
+            code = d_code
+        inlet_codes.append(code)
+        if code:
+            inlet_to_demister.append(None)
+            continue
+        head_height = d / 4 if hb == 'E' else d / 2
+        if app == 1:
+            inlet_to_demister.append(round(b, 3))
+        elif dem == True:
+            inlet_to_demister.append(round(max(0.6, 0.6 * d), 3))
+        else:
+            inlet_to_demister.append(round(max(1, d, 0.6 + head_height) - head_height, 3))
+    results['inlet_to_demister'] = (inlet_to_demister, inlet_codes)
+    results['demister_height'] = (
+        [(0.15 if vo == 'V' else 0.1 if vo == 'H' else None) if dem is True else 0 if dem is False else None
+         for dem, vo in zip(demister, orientation)],
+        [(0 if vo in ('V', 'H') else choice['vessel_orientation']) if dem is True else
+         0 if dem is False else choice['demister'] for dem, vo in zip(demister, orientation)])
+    demister_to_tangent, tangent_codes = [], []
+    for dem, d, dd, hb, d_code, dd_code in zip(demister, diameter[0], velocity['demister_diameter'][0], head,
+                                               d_codes, velocity['demister_diameter'][1]):
+        code = d_code | dd_code if dem is True else 0 if dem is False else choice['demister']
+        tangent_codes.append(code)
+        if code:
+            demister_to_tangent.append(None)
+        elif dem is False:
+            demister_to_tangent.append(0)
+        elif d * 0.75 > dd:
+            demister_to_tangent.append(round(max(0.4 * d - d / (4 if hb == 'E' else 2), 0.15), 3))
+        else:
+            demister_to_tangent.append(0.15)
+    results['demister_to_tangent'] = (demister_to_tangent, tangent_codes)
+    parts = [(bottom, b_codes)] + heights + [
+        rewrite_column(columns, 'lsah_to_inlet_rewrite', results['lsah_to_inlet']),
+        rewrite_column(columns, 'inlet_to_demister_rewrite', results['inlet_to_demister']),
+        results['demister_height'],
+        rewrite_column(columns, 'demister_to_tangent_rewrite', results['demister_to_tangent'])]
+
+    def add(*values):
+        total = 0
+        for value in values:
+            total += value
+        return round(total, 3)
+
+    results['tan_to_tan'] = step(add, None, *parts)
+    return results
+
+
+def nozzle_stage(columns):
+    """Internal diameters, velocities and momentum of inlet and outlet nozzles. Nozzle without flow
+    and liquid 2 outlet of 2-phase vessel are not applicable: their values are kept as GUI chain
+    gives them (None where it fails), but without error code, so they are not reported as failures.
+    Zero flows are allowed here for this reason, negative flows get error code."""
+    vapor_flow, vm_codes = positive_column(columns, 'vapor_mass_flow', zero_allowed=True)
+    vapor_density, rv_codes = positive_column(columns, 'vapor_density')
+    liq1_flow, lm_codes = positive_column(columns, 'liquid1_mass_flow', zero_allowed=True)
+    liq1_density, rl_codes = positive_column(columns, 'liquid1_density')
+    liq2_flow, l2m_codes = positive_column(columns, 'liquid2_mass_flow', zero_allowed=True)
+    liq2_density, l2d_codes = number_column(columns, 'liquid2_density')
+    liq2_density_raw = [str(value) for value in columns['liquid2_density']]
+    two_phase = [str(phase) == '2' for phase in columns['vessel_phase']]
+    zeros, valid = [0.0] * len(vapor_flow), [0] * len(vapor_flow)
+    flows = {'inlet': (vapor_flow, liq1_flow, liq2_flow, vm_codes, lm_codes, l2m_codes),
+             'vapor_outlet': (vapor_flow, zeros, zeros, vm_codes, valid, valid),
+             'liquid1_outlet': (zeros, liq1_flow, zeros, valid, lm_codes, valid),
+             'liquid2_outlet': (zeros, zeros, liq2_flow, valid, valid, l2m_codes)}
+    flow_fields = {'inlet': ('vapor_mass_flow', 'liquid1_mass_flow', 'liquid2_mass_flow'),
+                   'vapor_outlet': ('vapor_mass_flow',), 'liquid1_outlet': ('liquid1_mass_flow',),
+                   'liquid2_outlet': ('liquid2_mass_flow',)}
+    liq2_density_bit = NOT_POSITIVE | field_bit('liquid2_density')
+    results = {}
+    for name in NOZZLE_NAMES:
+        ids, id_codes = [], []
+        size_bits = field_bit(name + '_dn', name + '_sch')
+        for dn, sch in zip(columns[name + '_dn'], columns[name + '_sch']):
+            pid = ND_VOC.inner_diameter(str(dn), str(sch)) or ''
+            ids.append(pid)
+            id_codes.append(0 if pid != '' else size_bits | (MISSING if '' in (str(dn), str(sch)) else UNKNOWN_CHOICE))
+        no_flow = NOT_POSITIVE | field_bit(*flow_fields[name])
+        velocity, momentum, velocity_codes, momentum_codes = [], [], [], []
+        not_applicable = []
+        for vm, lm, l2m, vm_code, lm_code, l2m_code, rv, rl, l2d_raw, l2d, rv_code, rl_code, l2d_code, pid, id_code, \
+                phase2 in zip(*flows[name], vapor_density, liq1_density, liq2_density_raw, liq2_density, rv_codes,
+                              rl_codes, l2d_codes, ids, id_codes, two_phase):
+            code = vm_code | rv_code | lm_code | rl_code
+            if not code and l2d_raw != '0':
+                code = l2m_code | l2d_code or (0 if l2d > 0 else liq2_density_bit)
+            not_applicable.append(name == 'liquid2_outlet' and phase2
+                                  or not code and vm == lm == 0 and (l2d_raw == '0' or l2m == 0))
+            code = code or id_code
+            if code:
+                velocity.append(None)
+                momentum.append(None)
+                velocity_codes.append(code)
+                momentum_codes.append(code)
+                continue
+            avf, alf = vm / rv, lm / rl
+            volume_flow = alf + avf if l2d_raw == '0' else alf + avf + l2m / l2d
+            v, code = calculate(lambda: round(volume_flow / 3600 / (float(pid) ** 2 * 3.1415 / 4), 3))
+            velocity.append(v)
+            velocity_codes.append(code)
+            if l2d_raw == '0':
+                mass_flow, volume_flow = vm + lm, avf + alf
+            else:
+                mass_flow, volume_flow = vm + lm + l2m, avf + alf + l2m / l2d
+            if not code:
+                code = 0 if volume_flow else no_flow
+            m = None
+            if not code:
+                m, code = calculate(lambda: round(v ** 2 * mass_flow / volume_flow, 1))
+            momentum.append(m)
+            momentum_codes.append(code)
+        for row, skip in enumerate(not_applicable):
+            if skip:
+                id_codes[row] = velocity_codes[row] = momentum_codes[row] = 0
+        results[name + '_id'] = (ids, id_codes)
+        results[name + '_velocity'] = (velocity, velocity_codes)
+        results[name + '_momentum'] = (momentum, momentum_codes)
+    return results
+
+
+def mechanical_stage(columns, velocity, zones):
+    """Allowable stress, wall thickness, surface areas, weights and result tab values.
+    Stress and density tables are looked up once for every distinct temperature and material."""
+    diameter = positive_column(columns, 'vessel_diameter')
+    head, material = columns['head_and_bottom'], columns['material']
+    temperature, t_codes = number_column(columns, 'design_temperature')
+    unknown_material = UNKNOWN_CHOICE | field_bit('material')
+    unknown_head = UNKNOWN_CHOICE | field_bit('head_and_bottom')
+    stress_lookup, density_lookup = {}, {}
+    allowable_stress, stress_codes, material_density, density_codes = [], [], [], []
+    for raw, t, t_code, mat in zip(columns['design_temperature'], temperature, t_codes, material):
+        key = (str(raw), mat)
+        if t_code:
+            stress = (None, t_code)
+        elif key in stress_lookup:
+            stress = stress_lookup[key]
+        elif t * 1.8 + 32 > METAL_STRESS.top_temperature(mat, float('inf')):
+            stress = stress_lookup[key] = (None, OUT_OF_RANGE | field_bit('design_temperature'))
+        else:
+            value = calc_allowable_stress(key[0], METAL_STRESS, mat)
+            stress = stress_lookup[key] = (value, 0 if value is not None else unknown_material)
+        allowable_stress.append(stress[0])
+        stress_codes.append(stress[1])
+        if mat not in density_lookup:
+            density_lookup[mat] = to_float(choose_material_density(mat, METAL_DENSITY))
+        material_density.append(density_lookup[mat])
+        density_codes.append(0 if density_lookup[mat] is not None else unknown_material)
+    allowable_stress, material_density = (allowable_stress, stress_codes), (material_density, density_codes)
+    design_stress = step(lambda s: round(s * 1000 / 14.2233, 3), None, allowable_stress)
+    pressure = number_column(columns, 'design_pressure')
+    joint_eff = number_column(columns, 'joint_efficiency')
+    corr_allowance = number_column(columns, 'corrosion_allowance')
+    too_high = OUT_OF_RANGE | field_bit('design_pressure', 'design_stress')
+    shell_thickness = step(lambda p, d, s, e, ca: max(round(p * d / (2 * s * e - 1.2 * p) * 1000 + ca, 3), 10),
+                           lambda p, d, s, e, ca: 0 if 2 * s * e - 1.2 * p else too_high,
+                           pressure, diameter, design_stress, joint_eff, corr_allowance)
+    head_factors = {'E': (2, 0.2), 'S': (4, 0.4)}
+    head_codes = [0 if hb in head_factors else unknown_head for hb in head]
+    head_thickness = step(lambda p, d, s, e, ca, hb: max(round(p * d / (head_factors[hb][0] * s * e -
+                                                                         head_factors[hb][1] * p) * 1000 + ca, 3), 10),
+                          lambda p, d, s, e, ca, hb: 0 if head_factors[hb][0] * s * e - head_factors[hb][1] * p
+                          else too_high,
+                          pressure, diameter, design_stress, joint_eff, corr_allowance, (head, head_codes))
+    tan_to_tan = rewrite_column(columns, 'tan_to_tan_rewrite', zones['tan_to_tan'])
+    shell_area = step(lambda d, t, l: round(3.1415 * (d + t / 2000) * l, 3), None, diameter, shell_thickness,
+                      tan_to_tan)
+    head_factor = ([1.09 if hb == 'E' else 1.571 if hb == 'S' else None for hb in head], head_codes)
+    head_area = step(lambda f, d, t: round(f * (d + t / 2000) ** 2, 3), None, head_factor, diameter, shell_thickness)
+    shell_weight = step(lambda t, a, rho: round(t / 1000 * a * rho, 3), None, shell_thickness, shell_area,
+                        material_density)
+    head_weight = step(lambda t, a, rho: round(t / 1000 * a * rho, 3), None, head_thickness, head_area,
+                       material_density)
+    total_weight = step(lambda sw, hw: round(sw + 2 * hw, 1), None, shell_weight, head_weight)
+    l_d_ratio = step(lambda l, d: round(l / d, 1), None, tan_to_tan, diameter)
+    separation = step(lambda d, md: 'OK' if d >= md else 'Not OK', None, diameter, velocity['min_diameter'])
+    volume_factor = ([1 / 3 if hb == 'E' else 2 / 3 if hb == 'S' else None for hb in head], head_codes)
+    vessel_volume = step(lambda f, l, d: round((l + f * d) * 3.1415 * d ** 2 / 4, 1), None,
+                         volume_factor, tan_to_tan, diameter)
+    return {'allowable_stress': allowable_stress, 'design_stress': design_stress,
+            'material_density': ([choose_material_density(mat, METAL_DENSITY) for mat in material], density_codes),
+            'shell_thickness': shell_thickness, 'head_thickness': head_thickness, 'shell_area': shell_area,
+            'head_area': head_area, 'shell_weight': shell_weight, 'head_weight': head_weight,
+            'total_weight': total_weight, 'l_d_ratio': l_d_ratio, 'separation': separation,
+            'vessel_volume': vessel_volume}
+
+
+# Stages of sizing in order of calculation, with case fields and results of earlier stages, which
+# every stage reads. Stage gives the same results for the same values of them, so vessel_stages
+# sizes again only stages and cases, where one of them is changed:
+STAGES = ('velocity', 'zones', 'nozzles', 'mechanical')
+STAGE_INPUTS = freeze({
+    'velocity': (('vapor_mass_flow', 'vapor_density', 'liquid1_density', 'surface_tension', 'pressure', 'carry_over',
+                  'demister', 'k_correlation', 'k_value_rewrite', 'vl_safety_factor', 'vessel_diameter',
+                  'tan_to_tan_rewrite'), ()),
+    'zones': (('liquid1_mass_flow', 'liquid1_density', 'demister', 'vessel_diameter', 'head_and_bottom',
+               'vessel_orientation', 'vessel_phase', 'vessel_application', 't1', 't2', 't3', 'bottom_to_lsal_rewrite',
+               'lsal_to_lal_height_rewrite', 'lal_to_lah_height_rewrite', 'lah_to_lsah_height_rewrite',
+               'lsah_to_inlet_rewrite', 'inlet_to_demister_rewrite', 'demister_to_tangent_rewrite'),
+              ('cross_area', 'demister_diameter')),
+    'nozzles': (('vapor_mass_flow', 'vapor_density', 'liquid1_mass_flow', 'liquid1_density', 'liquid2_mass_flow',
+                 'liquid2_density', 'vessel_phase') +
+                tuple(name + suffix for name in NOZZLE_NAMES for suffix in ('_dn', '_sch')), ()),
+    'mechanical': (('vessel_diameter', 'head_and_bottom', 'material', 'design_temperature', 'design_pressure',
+                    'joint_efficiency', 'corrosion_allowance', 'tan_to_tan_rewrite'), ('min_diameter', 'tan_to_tan'))})
+# Tables, which stages look up, results of stage change with their files:
+STAGE_TABLES = freeze({'velocity': (), 'zones': (), 'nozzles': (ND_VOC,), 'mechanical': (METAL_STRESS,)})
+
+
+def run_stage(stage, columns, results):
+    """Results of one stage as {field: (values, codes)}, columns shall have STAGE_INPUTS fields of
+    stage and results shall have its results of earlier stages"""
+    if stage == 'velocity':
+        return velocity_stage(columns)
+    if stage == 'zones':
+        return zone_stage(columns, results)
+    if stage == 'nozzles':
+        return nozzle_stage(columns)
+    return mechanical_stage(columns, results, results)
+
+
+def size_columns(columns):
+    """Sizes all cases given as columns. Returns dictionary of result columns and dictionary of
+    their error code columns."""
+    results = {}
+    for stage in STAGES:
+        results.update(run_stage(stage, columns, results))
+    return ({field: results[field][0] for field in RESULT_FIELDS},
+            {field: results[field][1] for field in RESULT_FIELDS})
+
+
+def error_rows(codes, count):
+    """{field: error code} dictionaries of failed result fields of every case, codes are error code
+    columns of size_columns"""
+    failed = [field for field in RESULT_FIELDS if any(codes[field])]
+    return [{field: code for field, code in zip(failed, row) if code}
+            for row in (zip(*[codes[field] for field in failed]) if failed else [()] * count)]
+
+
+def size_chunk(chunk):
+    """Result dictionaries and {field: error code} dictionaries of list of cases, sized as one set of columns"""
+    values, codes = size_columns(to_columns(chunk))
+    return to_rows(values, len(chunk)), error_rows(codes, len(chunk))
+
+
+def size_cases_with_errors(cases):
+    """Sizes list of cases and returns list of result dictionaries in the same order and list of
+    {field: error code} of failed result fields of every case, empty for valid case"""
+    results, errors = [], []
+    for start in range(0, len(cases), CHUNK_SIZE):
+        chunk_results, chunk_errors = size_chunk(cases[start:start + CHUNK_SIZE])
+        results.extend(chunk_results)
+        errors.extend(chunk_errors)
+    return results, errors
+
+
+def size_cases_in_threads(cases, executor=None, workers=None):
+    """The same as size_cases_with_errors, but chunks of cases are sized in thread pool: executor of
+    caller or new pool of workers threads. Executor shall not be the pool, which runs the callers
+    (for example request handlers of web backend): caller waits for its chunks, so when all workers
+    are busy with callers, chunks are never started. Give handlers of such pool their own executor
+    for chunks, or call size_cases_with_errors. Engine keeps nothing between calls and its tables
+    are read-only, so any amount of calls may run at once. On free-threaded CPython chunks are sized
+    in parallel, with GIL threads only take turns."""
+    chunks = [cases[start:start + CHUNK_SIZE] for start in range(0, len(cases), CHUNK_SIZE)]
+    if executor is None:
+        with ThreadPoolExecutor(workers) as pool:
+            return size_cases_in_threads(cases, pool)
+    results, errors = [], []
+    for chunk_results, chunk_errors in executor.map(size_chunk, chunks):
+        results.extend(chunk_results)
+        errors.extend(chunk_errors)
+    return results, errors
+
+
+def size_cases(cases):
+    """Sizes list of cases and returns list of result dictionaries in the same order"""
+    return size_cases_with_errors(cases)[0]
+
+
+def compare_k_correlations(cases, names=None):
+    """K value, allowable gas velocity and minimal diameter of all cases by every correlation (all
+    of K_CORRELATIONS by default) in one call, K value rewrite of cases is not used.
+    Returns {correlation: {field: column}}, failed values are None."""
+    columns = to_columns(cases)
+    columns['k_value_rewrite'] = [''] * len(cases)
+    comparison = {}
+    for name in names or [name for name in K_CORRELATIONS if name]:
+        columns['k_correlation'] = [name] * len(cases)
+        velocity = velocity_stage(columns)
+        comparison[name] = {field: velocity[field][0] for field in ('k_value', 'allowable_gas_velocity',
+                                                                    'min_diameter')}
+    return comparison
+
+
+def error_report(errors):
+    """Summary of errors of size_cases_with_errors: amount of failed cases, amount of failures of
+    every result field and every error kind, and failed cases by index with their fields, kinds of
+    error and case fields which caused it"""
+    fields, kinds, cases = {}, {}, {}
+    for index, case_errors in enumerate(errors):
+        if not case_errors:
+            continue
+        cases[index] = {}
+        for field, code in case_errors.items():
+            fields[field] = fields.get(field, 0) + 1
+            error_kinds, causes = describe_error(code)
+            for kind in error_kinds:
+                kinds[kind] = kinds.get(kind, 0) + 1
+            cases[index][field] = {'kinds': error_kinds, 'causes': causes}
+    return {'cases': len(errors), 'failed': len(cases), 'fields': fields, 'kinds': kinds, 'failed_cases': cases}
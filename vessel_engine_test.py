@@ -0,0 +1,176 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from vessel_calc import RESULT_FIELDS
+from vessel_engine import size_cases, size_cases_with_errors, error_report, describe_error, compare_k_correlations
+from vessel_engine import size_cases_in_threads, to_columns, run_stage, STAGES, STAGE_INPUTS
+from vessel_engine import MISSING, DENSITY_ORDER, OUT_OF_RANGE, to_float
+from vessel_golden import generate_cases
+
+
+class ErrorMaskTestCase(unittest.TestCase):
+    def test_density_order(self):
+        case = generate_cases(1)[0]
+        case['vapor_density'] = str(float(case['liquid1_density']) + 1)
+        results, errors = size_cases_with_errors([case])
+        self.assertIsNone(results[0]['k_value'])
+        self.assertTrue(errors[0]['k_value'] & DENSITY_ORDER)
+        self.assertEqual(describe_error(errors[0]['min_diameter']),
+                         (('density_order',), ('vapor_density', 'liquid1_density')))
+        # Weight does not depend on densities:
+        self.assertNotIn('total_weight', errors[0])
+        self.assertEqual(results[0]['total_weight'], size_cases(generate_cases(1))[0]['total_weight'])
+
+    def test_empty_residence_time(self):
+        case = generate_cases(1)[0]
+        case['t2'] = ''
+        results, errors = size_cases_with_errors([case])
+        self.assertEqual(describe_error(errors[0]['lal_to_lah_height']), (('missing',), ('t2',)))
+        self.assertTrue(errors[0]['tan_to_tan'] & MISSING)
+        self.assertIsNone(results[0]['vessel_volume'])
+        self.assertIsNotNone(results[0]['lsal_to_lal_height'])
+
+    def test_dirty_batch(self):
+        cases = generate_cases(100)
+        clean = size_cases(cases)
+        cases[3]['design_temperature'] = '1000'
+        cases[7]['liquid1_density'] = 'abc'
+        cases[9]['vessel_diameter'] = '0'
+        results, errors = size_cases_with_errors(cases)
+        report = error_report(errors)
+        # Generated cases leave some nozzles without size, other fields fail only in changed cases:
+        failed = {index for index, case_errors in report['failed_cases'].items()
+                  if [field for field in case_errors if not field.endswith(('_id', '_velocity', '_momentum'))]}
+        self.assertEqual(failed, {3, 7, 9})
+        self.assertTrue(errors[3]['allowable_stress'] & OUT_OF_RANGE)
+        self.assertEqual(report['failed_cases'][7]['k_value']['kinds'], ('not_number',))
+        self.assertEqual(report['failed_cases'][9]['actual_gas_velocity'],
+                         {'kinds': ('not_positive',), 'causes': ('vessel_diameter',)})
+        for index in set(range(100)) - failed:
+            self.assertEqual(results[index], clean[index])
+        # Generated cases are 2-phase, their liquid 2 outlet is not applicable:
+        for result, case_errors in zip(results, errors):
+            for field in RESULT_FIELDS:
+                if not field.endswith('_id') and not field.startswith('liquid2_outlet'):
+                    self.assertEqual(field in case_errors, result[field] is None, field)
+
+    def test_not_applicable_nozzles(self):
+        cases = generate_cases(200)
+        for case in cases[:100]:
+            case['liquid2_outlet_dn'], case['liquid2_outlet_sch'] = '4', 'unknown'
+        # Liquid 1 outlet without flow and without size:
+        cases[0].update(liquid1_mass_flow='0', liquid1_outlet_dn='', inlet_dn='4', inlet_sch='std', vapor_outlet_dn='4',
+                        vapor_outlet_sch='std')
+        results, errors = size_cases_with_errors(cases)
+        report = error_report(errors)
+        self.assertFalse([field for field in report['fields'] if field.startswith('liquid2_outlet')])
+        self.assertIsNone(results[0]['liquid1_outlet_momentum'])
+        # Liquid zones fail without liquid flow, nozzles do not:
+        self.assertEqual(describe_error(errors[0]['lsal_to_lal_height']), (('not_positive',), ('liquid1_mass_flow',)))
+        self.assertFalse([field for field in errors[0] if field.endswith(('_id', '_velocity', '_momentum'))])
+        # Nozzles with flow still fail without size:
+        sizes = [name + suffix for name in ('inlet', 'vapor_outlet', 'liquid1_outlet') for suffix in ('_dn', '_sch')]
+        unsized = [case for case in cases[1:] if '' in [case[size] for size in sizes]]
+        self.assertEqual(report['failed'], 1 + len(unsized))
+
+    def test_not_finite_entries(self):
+        self.assertIsNone(to_float('nan'))
+        self.assertIsNone(to_float('-inf'))
+        for field, result in (('vessel_diameter', 'total_weight'), ('vapor_density', 'min_diameter'),
+                              ('liquid1_mass_flow', 'tan_to_tan'), ('t1', 'vessel_volume')):
+            for value in ('nan', 'inf'):
+                case = dict(generate_cases(1)[0], **{field: value})
+                results, errors = size_cases_with_errors([case])
+                self.assertIsNone(results[0][result], (field, value))
+                self.assertEqual(describe_error(errors[0][result]), (('not_number',), (field,)), (field, value))
+
+    def test_not_positive_entries(self):
+        for field, value, result in (('vessel_diameter', '-2', 'total_weight'), ('vessel_diameter', '0', 'cross_area'),
+                                     ('vapor_mass_flow', '0', 'min_diameter'),
+                                     ('vapor_mass_flow', '-100', 'inlet_velocity'),
+                                     ('liquid1_mass_flow', '-100', 'lsal_to_lal_height'),
+                                     ('liquid1_density', '0', 'k_value'), ('vapor_density', '-1', 'actual_gas_rate'),
+                                     ('t1', '0', 'lsal_to_lal_inventory'), ('t3', '-5', 'tan_to_tan')):
+            case = dict(generate_cases(1)[0], inlet_dn='4', inlet_sch='std', **{field: value})
+            results, errors = size_cases_with_errors([case])
+            self.assertIsNone(results[0][result], (field, value))
+            self.assertEqual(describe_error(errors[0][result]), (('not_positive',), (field,)), (field, value))
+        # Zero flow of nozzle only makes it not applicable:
+        case = dict(generate_cases(1)[0], vapor_mass_flow='0', vapor_outlet_dn='4', vapor_outlet_sch='std')
+        self.assertNotIn('vapor_outlet_velocity', size_cases_with_errors([case])[1][0])
+
+    def test_overflow_is_error_of_case(self):
+        cases = generate_cases(10)
+        clean = size_cases(cases)
+        cases[1]['vessel_diameter'] = '1e200'
+        cases[2]['vessel_diameter'] = '1e-300'
+        cases[3].update(vapor_density='1e-300', inlet_dn='4', inlet_sch='std')
+        results, errors = size_cases_with_errors(cases)
+        for result in ('cross_area', 'bottom_volume', 'total_weight', 'vessel_volume'):
+            self.assertEqual(describe_error(errors[1][result]), (('out_of_range',), ()), result)
+        self.assertEqual(describe_error(errors[2]['total_weight']), (('not_positive',), ('cross_area',)))
+        self.assertEqual(describe_error(errors[3]['inlet_momentum']), (('out_of_range',), ()))
+        # Generated cases are 2-phase, their liquid 2 outlet is not applicable:
+        checked = [field for field in RESULT_FIELDS if not field.endswith('_id') and not field.startswith('liquid2')]
+        for result, case_errors in zip(results, errors):
+            self.assertEqual([field in case_errors for field in checked], [result[field] is None for field in checked])
+        for index in (0, 4, 5, 6, 7, 8, 9):
+            self.assertEqual(results[index], clean[index])
+
+class KCorrelationTestCase(unittest.TestCase):
+    def test_gpsa_pressure_correction(self):
+        case = dict(generate_cases(1)[0], demister=True, k_correlation='gpsa', pressure='0')
+        self.assertEqual(size_cases([case])[0]['k_value'], 0.107)
+        case['pressure'] = str(1150 / 14.2233)
+        self.assertEqual(size_cases([case])[0]['k_value'], round(0.75 * 0.35 * 0.3048, 3))
+
+    def test_selection_per_case(self):
+        cases = generate_cases(60)
+        names = ('standard', 'gpsa', 'york_mesh', 'york_vane', 'api_12j', 'unknown')
+        for index, case in enumerate(cases):
+            case['k_correlation'] = names[index % len(names)]
+        results, errors = size_cases_with_errors(cases)
+        comparison = compare_k_correlations(cases, names[:-1])
+        for index, (case, result) in enumerate(zip(cases, results)):
+            if case['k_correlation'] == 'unknown':
+                self.assertEqual(describe_error(errors[index]['k_value']), (('unknown_choice',), ('k_correlation',)))
+            else:
+                self.assertEqual(result['k_value'], comparison[case['k_correlation']]['k_value'][index])
+        # York limits are for demisters only:
+        self.assertTrue(all((k is None) == (case['demister'] is False)
+                            for k, case in zip(comparison['york_mesh']['k_value'], cases)))
+        self.assertEqual(comparison['standard']['k_value'],
+                         [result['k_value'] for result in size_cases(generate_cases(60))])
+
+
+class ThreadTestCase(unittest.TestCase):
+    def test_pool_and_concurrent_callers(self):
+        cases = generate_cases(2000)
+        cases[5]['liquid1_density'] = 'abc'
+        expected = size_cases_with_errors(cases)
+        self.assertEqual(size_cases_in_threads(cases, workers=4), expected)
+        requests = [cases[start:start + 100] for start in range(0, len(cases), 100)]
+        with ThreadPoolExecutor(8) as pool:
+            self.assertEqual(size_cases_in_threads(cases, pool), expected)
+            answers = list(pool.map(size_cases, requests * 3))
+        self.assertEqual([row for answer in answers[:len(requests)] for row in answer], expected[0])
+        self.assertEqual(answers[:len(requests)] * 3, answers)
+
+
+class StageTestCase(unittest.TestCase):
+    def test_stage_reads_only_its_inputs(self):
+        cases = generate_cases(300)
+        names = ('standard', 'gpsa', 'york_mesh', 'api_12j')
+        for index, case in enumerate(cases):
+            case['k_correlation'] = names[index % len(names)]
+        columns, results = to_columns(cases), {}
+        for stage in STAGES:
+            fields, upstream = STAGE_INPUTS[stage]
+            part = run_stage(stage, {field: columns[field] for field in fields},
+                             {field: results[field] for field in upstream})
+            self.assertEqual(part, run_stage(stage, columns, results))
+            results.update(part)
+        self.assertEqual(set(results), set(RESULT_FIELDS))
+
+
+if __name__ == '__main__':
+    unittest.main()
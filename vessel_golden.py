@@ -0,0 +1,176 @@
+"""Golden corpus of generated vessel cases with results of scalar chain (size_vertical_separator).
+Any other engine (batch, cached, parallel) is checked against it with per-field tolerances,
+and for every diverging case the first diverging function of the chain is reported.
+
+Usage:
+    python vessel_golden.py build                      rebuilds corpus from current scalar chain
+    python vessel_golden.py check vessel_engine:size_cases
+"""
+
+import csv
+import gzip
+import importlib
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from vessel_calc import CASE_FIELDS, RESULT_CHAIN, RESULT_FIELDS, ND_VOC, METAL_STRESS
+from vessel_calc import size_vertical_separator
+from vessel_engine import parse_case
+
+GOLDEN_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden_corpus.csv.gz')
+CORPUS_SIZE = 20000
+CORPUS_SEED = 20221002
+# Results are compared as numbers with this absolute tolerance, if field is not in tolerances given to check:
+DEFAULT_TOLERANCE = 1e-9
+FUNCTION_OF_FIELD = dict(RESULT_CHAIN)
+
+
+def reference_engine(cases):
+    """Scalar chain, which produces expected values of corpus"""
+    return [size_vertical_separator(case) for case in cases]
+
+
+def generate_cases(count, seed=CORPUS_SEED):
+    """Generates cases of 2-phase vertical vessels within ranges met in practice.
+    Process data is rounded to not more than 3 digits, as fetch button does."""
+    rnd = random.Random(seed)
+    dn_list = list(ND_VOC)
+    cases = []
+    for i in range(count):
+        demister = rnd.random() < 0.5
+        vapor_density = rnd.uniform(0.5, 80)
+        case = {'temperature': round(rnd.uniform(20, 250), 1), 'pressure': round(rnd.uniform(1, 60), 2),
+                'vapor_mass_flow': round(rnd.uniform(100, 200000)), 'vapor_density': round(vapor_density, 3),
+                'vapor_viscosity': round(rnd.uniform(0.008, 0.03), 3), 'vapor_mw': round(rnd.uniform(2, 100), 2),
+                'liquid1_mass_flow': round(rnd.uniform(100, 300000)),
+                'liquid1_density': round(rnd.uniform(500, 1100), 2),
+                'liquid1_viscosity': round(rnd.uniform(0.1, 5), 3), 'liquid2_mass_flow': 0, 'liquid2_density': 0,
+                'liquid2_viscosity': 0, 'surface_tension': round(rnd.uniform(5, 70), 2)}
+        case = {field: str(value) for field, value in case.items()}
+        case.update({'carry_over': str(round(rnd.uniform(0.01, 0.5), 3)), 'demister': demister,
+                     'k_value_rewrite': str(round(rnd.uniform(0.05, 0.12), 3)) if rnd.random() < 0.1 else '',
+                     'vl_safety_factor': str(round(rnd.uniform(0.7, 1), 2)),
+                     'vessel_diameter': str(round(rnd.uniform(0.3, 5), 2)),
+                     'head_and_bottom': rnd.choice('ES'), 'vessel_orientation': 'V', 'vessel_phase': 2,
+                     'vessel_application': 2 if demister else rnd.choice((1, 2)),
+                     't1': str(rnd.randint(1, 10)), 't2': str(rnd.randint(1, 10)), 't3': str(rnd.randint(1, 10))})
+        for field in ('bottom_to_lsal', 'lsal_to_lal_height', 'lal_to_lah_height', 'lah_to_lsah_height',
+                      'lsah_to_inlet', 'inlet_to_demister', 'demister_to_tangent', 'tan_to_tan'):
+            case[field + '_rewrite'] = str(round(rnd.uniform(0.3, 3), 2)) if rnd.random() < 0.1 else ''
+        # Liquid 2 outlet is left empty, as there is no liquid 2 in 2-phase vessel:
+        for name in ('inlet', 'vapor_outlet', 'liquid1_outlet'):
+            dn = rnd.choice(dn_list)
+            schedules = list(ND_VOC[dn]) + ['']
+            case[name + '_dn'], case[name + '_sch'] = dn, rnd.choice(schedules)
+        case.update({'liquid2_outlet_dn': '', 'liquid2_outlet_sch': '',
+                     'design_pressure': str(round(rnd.uniform(2, 50), 1)),
+                     'design_temperature': str(rnd.randint(-28, 565)),
+                     'corrosion_allowance': str(rnd.choice((0, 1, 1.5, 3, 4.5, 6))),
+                     'joint_efficiency': str(rnd.choice((0.7, 0.85, 1))),
+                     'material': rnd.choice(list(METAL_STRESS))})
+        cases.append(case)
+    return cases
+
+
+def build_corpus(path=GOLDEN_CORPUS, count=CORPUS_SIZE, seed=CORPUS_SEED):
+    """Writes generated cases and expected results as they are displayed in GUI"""
+    cases = generate_cases(count, seed)
+    with gzip.open(path, 'wt', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(CASE_FIELDS + tuple('expected.' + field for field in RESULT_FIELDS))
+        for case, expected in zip(cases, reference_engine(cases)):
+            writer.writerow([case.get(field, '') for field in CASE_FIELDS] +
+                            [str(expected[field]) for field in RESULT_FIELDS])
+
+
+def load_corpus(path=GOLDEN_CORPUS):
+    """Returns list of cases and list of expected results (as strings)"""
+    cases, expected = [], []
+    with gzip.open(path, 'rt', newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        # Corpus may be written before new case fields were added, they are taken as empty:
+        split = min(index for index, field in enumerate(header) if field.startswith('expected.'))
+        result_fields = [field[len('expected.'):] for field in header[split:]]
+        for row in reader:
+            cases.append(parse_case(dict(zip(header[:split], row[:split]))))
+            expected.append(dict(zip(result_fields, row[split:])))
+    return cases, expected
+
+
+def first_divergence(expected, actual, tolerances):
+    """Returns first field in order of chain, where actual result differs from expected, or None"""
+    for field in RESULT_FIELDS:
+        shown = str(actual.get(field))
+        if shown == expected[field]:
+            continue
+        try:
+            if abs(float(shown) - float(expected[field])) <= tolerances.get(field, DEFAULT_TOLERANCE):
+                continue
+        except ValueError:
+            pass
+        return field
+    return None
+
+
+def check_chunk(engine, start, cases, expected, tolerances):
+    """Runs engine on part of corpus, returns list of (case index, field, expected, actual)"""
+    failures = []
+    for i, (want, got) in enumerate(zip(expected, engine(cases))):
+        field = first_divergence(want, got, tolerances)
+        if field is not None:
+            failures.append((start + i, field, want[field], str(got.get(field))))
+    return failures
+
+
+def check_engine(engine, path=GOLDEN_CORPUS, tolerances=None, workers=None, chunk_size=2500):
+    """Checks engine (function which takes list of cases and returns list of result dictionaries)
+    against golden corpus in worker processes. Engine shall be importable module level function.
+    Returns report dictionary with failed cases and first diverging field and function of each."""
+    tolerances = tolerances or {}
+    cases, expected = load_corpus(path)
+    starts = range(0, len(cases), chunk_size)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(check_chunk, engine, start, cases[start:start + chunk_size],
+                               expected[start:start + chunk_size], tolerances) for start in starts]
+        failures = [failure for future in futures for failure in future.result()]
+    by_function = {}
+    for index, field, want, got in failures:
+        by_function[FUNCTION_OF_FIELD[field]] = by_function.get(FUNCTION_OF_FIELD[field], 0) + 1
+    report = {'cases': len(cases), 'failed': len(failures), 'by_function': by_function,
+              'failures': [{'case': index, 'field': field, 'function': FUNCTION_OF_FIELD[field],
+                            'expected': want, 'actual': got} for index, field, want, got in failures]}
+    report['first'] = report['failures'][0] if failures else None
+    return report
+
+
+def format_report(report):
+    """Makes short text of report for console"""
+    lines = ['%d cases checked, %d diverged' % (report['cases'], report['failed'])]
+    if report['first']:
+        first = report['first']
+        lines.append('First divergence: case %d, %s (%s): expected %s, got %s' %
+                     (first['case'], first['field'], first['function'], first['expected'], first['actual']))
+        for function, count in sorted(report['by_function'].items(), key=lambda item: -item[1]):
+            lines.append('  %s: %d cases' % (function, count))
+    return '\n'.join(lines)
+
+
+def import_engine(name):
+    """Imports engine given as 'module:function'"""
+    module, function = name.split(':')
+    return getattr(importlib.import_module(module), function)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['build']:
+        build_corpus()
+        print('Corpus written to', GOLDEN_CORPUS)
+    elif sys.argv[1:2] == ['check']:
+        engine_report = check_engine(import_engine(sys.argv[2] if len(sys.argv) > 2 else 'vessel_engine:size_cases'))
+        print(format_report(engine_report))
+        sys.exit(1 if engine_report['failed'] else 0)
+    else:
+        print(__doc__)
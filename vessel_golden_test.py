@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+from vessel_engine import size_cases
+from vessel_golden import build_corpus, check_engine, load_corpus, reference_engine
+
+
+def shifted_engine(cases):
+    """Engine with error in cross area to check that runner finds it"""
+    results = size_cases(cases)
+    for result in results:
+        result['cross_area'] = result['cross_area'] + 0.001
+    return results
+
+
+class GoldenTestCase(unittest.TestCase):
+    def test_engine_reproduces_golden_corpus(self):
+        report = check_engine(size_cases)
+        self.assertEqual(report['cases'], 20000)
+        self.assertEqual(report['failed'], 0, report['first'])
+
+    def test_first_diverging_function_is_reported(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'corpus.csv.gz')
+            build_corpus(path, count=300)
+            report = check_engine(shifted_engine, path=path, workers=2, chunk_size=100)
+        self.assertEqual(report['failed'], 300)
+        self.assertEqual(report['first']['field'], 'cross_area')
+        self.assertEqual(report['first']['function'], 'calculate_cross_area')
+
+    def test_tolerance_per_field(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'corpus.csv.gz')
+            build_corpus(path, count=100)
+            cases, expected = load_corpus(path)
+            self.assertEqual([str(value) for value in reference_engine(cases)[0].values()],
+                             list(expected[0].values()))
+            report = check_engine(shifted_engine, path=path, tolerances={'cross_area': 0.0011}, workers=1)
+        self.assertEqual(report['failed'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
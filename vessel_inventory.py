@@ -0,0 +1,214 @@
+"""Index of existing vessels for re-rating: which spare drum can take new duty.
+Vessel of inventory has tag, internal diameter, tangent to tangent height, head type, demister,
+material and design pressure and temperature (INVENTORY_FIELDS). Vessels are grouped by head and
+demister, vessels of group are sorted by diameter and split to GRID_CELLS cells of equal size,
+vessels of cell are sorted by tangent to tangent height.
+
+For new case minimal diameter is found first, smaller vessels are skipped by bisection of sorted
+diameters. Required tangent to tangent height is found once for the largest diameter of every cell
+by one call of velocity and zone stages of vessel_engine. Within cell the height can not fall below
+it by more than HEIGHT_SLOPE per metre of diameter (see lower_height), so vessels of cell, which
+are lower, are skipped by bisection. Cells are taken in order of the largest margin they can give,
+their vessels from the highest one, and design pressure, temperature and material are checked
+before anything is sized. Only vessels left are sized exactly, and search stops when no cell can
+give better margin than the vessels found. Zone heights, tangent to tangent height and wall
+thickness of vessels found are the ones of the chain.
+
+Usage:
+    python vessel_inventory.py inventory.csv case.json
+"""
+
+import argparse
+import csv
+import heapq
+import json
+from array import array
+from bisect import bisect_left
+
+from vessel_calc import METAL_STRESS, calc_allowable_stress
+from vessel_engine import parse_case, size_cases, to_columns, to_float, velocity_stage, zone_stage
+
+INVENTORY_FIELDS = ('tag', 'vessel_diameter', 'tan_to_tan', 'head_and_bottom', 'demister', 'material',
+                    'design_pressure', 'design_temperature')
+# Vessels of every head and demister are split by diameter to this amount of cells:
+GRID_CELLS = 16
+# Required tangent to tangent height is sum of parts, which do not grow with diameter (bottom and
+# liquid zones), and parts, which grow not faster than 0.3 + 0.75 + 0.15 + 0.02 m per metre of
+# diameter (inlet nozzle space, inlet to demister, demister to tangent, 2 % of diameter of first zone):
+HEIGHT_SLOPE = 1.25
+# Parts are rounded to mm, and demister to tangent jumps up by not more than 0.15 of diameter, where
+# demister becomes smaller than 3/4 of vessel diameter:
+HEIGHT_ROUNDING = 0.01
+DEMISTER_STEP = 0.15
+# Vessels, which can give the largest margin, are sized by batches of this size:
+SIZE_BATCH = 16
+
+
+def relative_spare(value, required):
+    """Spare of value over required value as share of required one"""
+    return (value - required) / required if required > 0 else float('inf')
+
+
+def required_sizes(case, vessels):
+    """Minimal diameters, demister diameters and tangent to tangent heights of case in vessels given
+    as (diameter, head, demister), only velocity and zone stages of engine are calculated"""
+    columns = to_columns([dict(case, vessel_diameter=str(diameter), head_and_bottom=head, demister=demister)
+                          for diameter, head, demister in vessels])
+    velocity = velocity_stage(columns)
+    return (velocity['min_diameter'][0], velocity['demister_diameter'][0],
+            zone_stage(columns, velocity)['tan_to_tan'][0])
+
+
+def lower_height(height, diameter, low, step):
+    """Lower limit of required tangent to tangent height of vessels of diameter from low to given
+    one, height is required height of given diameter. step is True, if demister to tangent may jump
+    between low and given diameter."""
+    if height is None:
+        return float('-inf')
+    return height - HEIGHT_SLOPE * (diameter - low) - HEIGHT_ROUNDING - (DEMISTER_STEP * diameter if step else 0)
+
+
+class VesselIndex:
+    """Existing vessels given as dictionaries with INVENTORY_FIELDS keys"""
+
+    def __init__(self, vessels):
+        self.tags = [vessel['tag'] for vessel in vessels]
+        self.materials = [vessel['material'] for vessel in vessels]
+        self.diameter = array('d', [float(vessel['vessel_diameter']) for vessel in vessels])
+        self.tan_to_tan = array('d', [float(vessel['tan_to_tan']) for vessel in vessels])
+        self.design_pressure = array('d', [float(vessel['design_pressure']) for vessel in vessels])
+        self.design_temperature = array('d', [float(vessel['design_temperature']) for vessel in vessels])
+        rows = {}
+        for row, vessel in enumerate(vessels):
+            demister = parse_case({'demister': vessel['demister']})['demister']
+            rows.setdefault((vessel['head_and_bottom'], demister), []).append(row)
+        # Group: (head, demister) -> (sorted largest diameters of cells, cells). Cell is (its
+        # smallest diameter, sorted heights, rows in the same order):
+        self.groups = {}
+        for key, group_rows in rows.items():
+            group_rows.sort(key=lambda row: self.diameter[row])
+            size = -(-len(group_rows) // GRID_CELLS)
+            parts = [group_rows[start:start + size] for start in range(0, len(group_rows), size)]
+            cells = []
+            for part in parts:
+                cell_rows = sorted(part, key=lambda row: self.tan_to_tan[row])
+                cells.append((self.diameter[part[0]], array('d', [self.tan_to_tan[row] for row in cell_rows]),
+                              array('l', cell_rows)))
+            self.groups[key] = (array('d', [self.diameter[part[-1]] for part in parts]), cells)
+
+    def __len__(self):
+        return len(self.tags)
+
+    def query(self, case, limit=None):
+        """Feasible vessels for case ranked by margin, the largest first. Margin is the smaller of
+        relative spare of diameter and of tangent to tangent height. Every vessel is dictionary with
+        tag, its size and required size of duty in it. Case without minimal diameter or with design
+        pressure or temperature, which is missing or not a number, has no feasible vessels, vessel
+        of material without allowable stress at design temperature is not feasible."""
+        pressure, temperature = to_float(case.get('design_pressure')), to_float(case.get('design_temperature'))
+        if pressure is None or temperature is None:
+            return []
+        case = dict(case, tan_to_tan_rewrite='')
+        sizes = required_sizes(case, [(1.0, 'E', False), (1.0, 'E', True)])
+        min_diameters = dict(zip((False, True), sizes[0]))
+        # Demister to tangent jumps up, where demister becomes smaller than 3/4 of vessel diameter:
+        step_diameter = None if sizes[1][1] is None else sizes[1][1] / 0.75
+        # Cells, which may have vessels of minimal diameter, with required height at their largest diameter:
+        cells = []
+        for (head, demister), (diameters, group_cells) in self.groups.items():
+            if min_diameters.get(demister) is not None:
+                first = bisect_left(diameters, min_diameters[demister])
+                cells.extend((diameters[i], head, demister, group_cells[i]) for i in range(first, len(diameters)))
+        heights = required_sizes(case, [cell[:3] for cell in cells])[2]
+        # Best first search of cells and of vessels, which are not sized yet, by the largest margin
+        # they can give. Cell is (largest diameter, head, demister, required height there, whether
+        # demister to tangent may jump within it, cell of group), vessel is (row, head, demister):
+        queue = []
+        for number, ((diameter, head, demister, cell), height) in enumerate(zip(cells, heights)):
+            low = max(cell[0], min_diameters[demister])
+            step = demister and (step_diameter is None or low <= step_diameter < diameter)
+            lowest = lower_height(height, diameter, low, step)
+            bound = min(relative_spare(diameter, min_diameters[demister]), relative_spare(cell[1][-1], lowest))
+            queue.append((-bound, number, (diameter, head, demister, height, step, cell)))
+        heapq.heapify(queue)
+        number = len(queue)
+        # Materials, which have allowable stress at design temperature:
+        fits = {}
+        best, found = [], 0
+        while queue:
+            # Margin, which vessel shall exceed to be kept, when limit is reached:
+            threshold = best[0][0] if limit is not None and len(best) >= limit else float('-inf')
+            if -queue[0][0] < threshold:
+                break
+            bound, order, item = heapq.heappop(queue)
+            if len(item) == 6:
+                diameter, head, demister, height, step, (low, cell_heights, rows) = item
+                min_diameter = min_diameters[demister]
+                lowest = lower_height(height, diameter, max(low, min_diameter), step)
+                for i in range(len(rows) - 1, bisect_left(cell_heights, lowest) - 1, -1):
+                    row = rows[i]
+                    if (self.diameter[row] < min_diameter or self.design_pressure[row] < pressure
+                            or self.design_temperature[row] < temperature):
+                        continue
+                    material = self.materials[row]
+                    if material not in fits:
+                        fits[material] = calc_allowable_stress(case['design_temperature'], METAL_STRESS,
+                                                               material) is not None
+                    if not fits[material]:
+                        continue
+                    vessel_lowest = lower_height(height, diameter, self.diameter[row], step)
+                    if self.tan_to_tan[row] < vessel_lowest:
+                        continue
+                    vessel_bound = min(relative_spare(self.diameter[row], min_diameter),
+                                       relative_spare(self.tan_to_tan[row], vessel_lowest))
+                    if vessel_bound >= threshold:
+                        heapq.heappush(queue, (-vessel_bound, number, (row, head, demister)))
+                        number += 1
+                continue
+            # Vessels, which can give the largest margin, are sized together:
+            batch = [item]
+            while queue and len(batch) < SIZE_BATCH and len(queue[0][2]) == 3 and -queue[0][0] >= threshold:
+                batch.append(heapq.heappop(queue)[2])
+            required = required_sizes(case, [(self.diameter[row], head, demister) for row, head, demister in batch])
+            for (row, head, demister), height in zip(batch, required[2]):
+                if height is None or self.tan_to_tan[row] < height:
+                    continue
+                margin = round(min(relative_spare(self.diameter[row], min_diameters[demister]),
+                                   relative_spare(self.tan_to_tan[row], height)), 4)
+                entry = (margin, -found, row, head, demister)
+                found += 1
+                if limit is None or len(best) < limit:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+        best.sort(reverse=True)
+        results = size_cases([dict(case, vessel_diameter=str(self.diameter[row]), head_and_bottom=head,
+                                   demister=demister, material=self.materials[row])
+                              for margin, order, row, head, demister in best])
+        return [{'tag': self.tags[row], 'vessel_diameter': self.diameter[row], 'tan_to_tan': self.tan_to_tan[row],
+                 'head_and_bottom': head, 'demister': demister, 'material': self.materials[row],
+                 'min_diameter': result['min_diameter'], 'required_tan_to_tan': result['tan_to_tan'],
+                 'shell_thickness': result['shell_thickness'], 'head_thickness': result['head_thickness'],
+                 'margin': margin} for (margin, order, row, head, demister), result in zip(best, results)]
+
+
+def read_inventory(path):
+    """Vessels of CSV file with INVENTORY_FIELDS header"""
+    with open(path, newline='', encoding='utf-8') as file:
+        return list(csv.DictReader(file))
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Spare vessels which can take new duty')
+    arguments.add_argument('inventory', help='CSV file of existing vessels')
+    arguments.add_argument('case', help='JSON file of new case with CASE_FIELDS keys')
+    arguments.add_argument('--limit', type=int, default=20)
+    options = arguments.parse_args()
+    with open(options.case, encoding='utf-8') as file:
+        case = parse_case(json.load(file))
+    for vessel in VesselIndex(read_inventory(options.inventory)).query(case, options.limit):
+        print(json.dumps(vessel))
+
+
+if __name__ == '__main__':
+    main()
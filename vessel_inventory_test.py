@@ -0,0 +1,71 @@
+import random
+import time
+import unittest
+from vessel_engine import size_cases
+from vessel_golden import generate_cases
+from vessel_inventory import VesselIndex
+
+
+def make_inventory(count, seed=7, continuous=False):
+    rnd = random.Random(seed)
+    return [{'tag': 'V-%05d' % i, 'vessel_diameter': str(round(rnd.uniform(0.6, 5), 4) if continuous else
+                                                          rnd.choice(range(6, 50)) / 10),
+             'tan_to_tan': str(round(rnd.uniform(2, 20), 2)), 'head_and_bottom': rnd.choice('ES'),
+             'demister': rnd.choice(('True', 'False')), 'material': rnd.choice(('CS', 'SS316')),
+             'design_pressure': str(rnd.choice((10, 20, 40, 60, 100))),
+             'design_temperature': str(rnd.choice((100, 200, 300)))} for i in range(count)]
+
+
+def full_scan(case, vessels):
+    """Tags of feasible vessels, every vessel is sized"""
+    sized = size_cases([dict(case, vessel_diameter=vessel['vessel_diameter'], head_and_bottom=vessel['head_and_bottom'],
+                             demister=vessel['demister'] == 'True', material=vessel['material'], tan_to_tan_rewrite='')
+                        for vessel in vessels])
+    return {vessel['tag'] for vessel, result in zip(vessels, sized)
+            if result['tan_to_tan'] is not None and result['min_diameter'] is not None
+            and result['shell_thickness'] is not None
+            and float(vessel['vessel_diameter']) >= result['min_diameter']
+            and float(vessel['tan_to_tan']) >= result['tan_to_tan']
+            and float(vessel['design_pressure']) >= float(case['design_pressure'])
+            and float(vessel['design_temperature']) >= float(case['design_temperature'])}
+
+
+class InventoryTestCase(unittest.TestCase):
+    def test_query_matches_full_scan(self):
+        vessels = make_inventory(2000)
+        index = VesselIndex(vessels)
+        for case in generate_cases(3):
+            found = index.query(case)
+            self.assertEqual(found, sorted(found, key=lambda vessel: -vessel['margin']))
+            self.assertEqual({vessel['tag'] for vessel in found}, full_scan(case, vessels))
+
+    def test_continuous_diameters(self):
+        vessels = make_inventory(1500, seed=11, continuous=True)
+        index = VesselIndex(vessels)
+        for case in generate_cases(8, seed=5):
+            found = index.query(case)
+            self.assertEqual({vessel['tag'] for vessel in found}, full_scan(case, vessels))
+            self.assertEqual([vessel['margin'] for vessel in index.query(case, limit=10)],
+                             [vessel['margin'] for vessel in found[:10]])
+
+    def test_case_without_design_conditions(self):
+        index = VesselIndex(make_inventory(200))
+        case = dict(generate_cases(1)[0], design_temperature='50')
+        self.assertTrue(index.query(dict(case, design_pressure='1')))
+        del case['design_pressure']
+        self.assertEqual(index.query(case), [])
+        self.assertEqual(index.query(dict(case, design_pressure='1', design_temperature='')), [])
+
+    def test_large_inventory(self):
+        index = VesselIndex(make_inventory(30000, continuous=True))
+        cases = generate_cases(20, seed=3)
+        start = time.perf_counter()
+        found = [index.query(case, limit=10) for case in cases]
+        # Milliseconds per query, not a sizing of every diameter of inventory:
+        self.assertLess((time.perf_counter() - start) / len(cases), 0.02)
+        self.assertTrue(all(len(vessels) <= 10 for vessels in found))
+        self.assertTrue(any(found))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Load generator for vessel_service.py: several keep-alive connections send cases as fast as
+service answers, client side p50/p99 latency and throughput are printed together with /stats
+of service.
+
+Usage:
+    python vessel_service.py &
+    python vessel_loadgen.py --connections 32 --requests 200 --path /size
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from vessel_golden import generate_cases
+from vessel_service import percentile
+
+
+async def request(reader, writer, method, path, payload=None):
+    """Sends one request on open connection and returns status and decoded JSON answer"""
+    body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+    writer.write(('%s %s HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n'
+                  % (method, path, len(body))).encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, value = line.decode('latin-1').split(':', 1)
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(host, port, path, cases, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for case in cases:
+            start = time.monotonic()
+            status, answer = await request(reader, writer, 'POST', path, case)
+            if status != 200:
+                raise RuntimeError('Service answered %d: %s' % (status, answer))
+            latencies.append(time.monotonic() - start)
+    finally:
+        writer.close()
+
+
+async def run_load(host='127.0.0.1', port=8765, connections=32, requests=100, path='/size'):
+    """Runs load and returns dictionary with client side latency and throughput and service stats"""
+    cases = generate_cases(connections * requests, seed=1)
+    latencies = []
+    start = time.monotonic()
+    await asyncio.gather(*[client(host, port, path, cases[i::connections], latencies)
+                           for i in range(connections)])
+    elapsed = time.monotonic() - start
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        status, service_stats = await request(reader, writer, 'GET', '/stats')
+    finally:
+        writer.close()
+    return {'requests': len(latencies), 'seconds': round(elapsed, 3),
+            'requests_per_s': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3), 'service': service_stats}
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Benchmark of local sizing service')
+    arguments.add_argument('--host', default='127.0.0.1')
+    arguments.add_argument('--port', type=int, default=8765)
+    arguments.add_argument('--connections', type=int, default=32)
+    arguments.add_argument('--requests', type=int, default=100, help='requests per connection')
+    arguments.add_argument('--path', default='/size', choices=('/size', '/nozzles', '/weight'))
+    options = arguments.parse_args()
+    report = asyncio.run(run_load(options.host, options.port, options.connections, options.requests, options.path))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
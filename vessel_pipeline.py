@@ -0,0 +1,277 @@
+"""Pipelined project job: Data workbooks are read, vessels are sized and one Spec workbook is filled
+for every vessel at the same time. Reader threads read process data of N3:N15 of Data file (as fetch
+button does), sizer thread sends cases by small batches to process pool, writer threads fill F2:F19
+of copy of Spec template (as OUTPUT button does) and save it. Stages are connected by bounded queues,
+so fast reader waits for sizer and writers instead of keeping all workbooks in memory. Error of job or
+of sized batch is reported in failed jobs; if sizer or all writers stop, stages before them do not
+wait on full queue, and their jobs are reported failed too.
+
+Report gives throughput and busy time of every stage and depth of queues: full 'cases' queue means
+sizing is the slowest stage, empty queues and busy writers mean writing is.
+
+Usage:
+    python vessel_pipeline.py data_directory spec_directory --base vessel.json --workers 4
+"""
+
+import argparse
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import openpyxl
+
+from vessel_calc import fill_spec_sheet
+from vessel_engine import parse_case, size_cases
+from vessel_watch import read_data_column
+
+SPEC_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Spec.xlsx')
+QUEUE_SIZE = 16
+SIZE_BATCH = 32
+# Seconds between checks, whether consumer of full queue is still running:
+PUT_TIMEOUT = 0.1
+
+
+class StageMetrics:
+    """Items and busy seconds of stage, which may run in many threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items = 0
+        self.busy = 0.0
+        self.first = self.last = None
+
+    def record(self, items, started, busy):
+        with self.lock:
+            self.items += items
+            self.busy += busy
+            self.first = started if self.first is None else min(self.first, started)
+            self.last = time.perf_counter()
+
+    def report(self, threads):
+        wall = self.last - self.first if self.items else 0
+        return {'items': self.items, 'busy_s': round(self.busy, 3),
+                'items_per_s': round(self.items / wall, 1) if wall else None,
+                'utilization': round(self.busy / wall / threads, 3) if wall else None}
+
+
+class MeteredQueue(queue.Queue):
+    """Bounded queue, which counts depth after every put and puts which found queue full"""
+
+    def __init__(self, maxsize):
+        super().__init__(maxsize)
+        self.puts = self.depth_total = self.max_depth = self.full = 0
+
+    def put(self, item, block=True, timeout=None):
+        full = self.full_now()
+        super().put(item, block, timeout)
+        with self.mutex:
+            self.puts += 1
+            self.full += full
+            self.depth_total += self._qsize()
+            self.max_depth = max(self.max_depth, self._qsize())
+
+    def full_now(self):
+        with self.mutex:
+            return 0 < self.maxsize <= self._qsize()
+
+    def report(self):
+        return {'size': self.maxsize, 'max_depth': self.max_depth, 'full_puts': self.full,
+                'mean_depth': round(self.depth_total / self.puts, 2) if self.puts else 0}
+
+
+def put_while(items, item, stopped):
+    """Puts item to bounded queue, False if consumer of queue stopped before there was room"""
+    while True:
+        try:
+            items.put(item, timeout=PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            if stopped.is_set():
+                return False
+
+
+def size_timed(cases):
+    """Results of cases and seconds of sizing them in worker process"""
+    start = time.perf_counter()
+    results = size_cases(cases)
+    return results, time.perf_counter() - start
+
+
+def spec_values(case, result):
+    """Arguments of fill_spec_sheet in the same order as OUTPUT button gives them"""
+    tan_to_tan = case.get('tan_to_tan_rewrite') or result['tan_to_tan']
+    try:
+        insulation = int(case.get('insulation_type', 0))
+    except (TypeError, ValueError):
+        insulation = None
+    return (case['liquid1_mass_flow'], case['liquid1_density'], case['vapor_mass_flow'], case['vapor_mw'],
+            case['vapor_density'], case['temperature'], case['pressure'], case.get('design_temperature', ''),
+            case.get('design_pressure', ''), case['vessel_diameter'], tan_to_tan, case.get('corrosion_allowance', ''),
+            insulation, case.get('material', ''), case.get('demister', False))
+
+
+def run_pipeline(jobs, base_case=None, template=SPEC_TEMPLATE, readers=2, writers=2, executor=None, workers=None,
+                 queue_size=QUEUE_SIZE, batch=SIZE_BATCH):
+    """Runs jobs, every job is dictionary with 'data' (Data workbook) and 'spec' (Spec workbook to
+    write) paths and optional 'case' with inputs of this vessel over base case. Returns report with
+    written, failed jobs and metrics of stages and queues."""
+    jobs_queue = queue.Queue()
+    for job in jobs:
+        jobs_queue.put(job)
+    cases, results = MeteredQueue(queue_size), MeteredQueue(queue_size)
+    metrics = {stage: StageMetrics() for stage in ('read', 'size', 'write')}
+    failed, written, lock = [], [], threading.Lock()
+    sizer_stopped, writers_stopped = threading.Event(), threading.Event()
+    running_writers = [writers]
+
+    def fail(job, error):
+        with lock:
+            failed.append({'data': job['data'], 'spec': job['spec'], 'error': '%s: %s' % (type(error).__name__, error)})
+
+    def read():
+        while True:
+            try:
+                job = jobs_queue.get_nowait()
+            except queue.Empty:
+                return
+            if sizer_stopped.is_set():
+                fail(job, RuntimeError('sizing stopped'))
+                continue
+            start = time.perf_counter()
+            try:
+                case = dict(base_case or {})
+                case.update(job.get('case', {}))
+                case.update(read_data_column(job['data']))
+                case = parse_case(case)
+            except Exception as error:
+                fail(job, error)
+                continue
+            metrics['read'].record(1, start, time.perf_counter() - start)
+            if not put_while(cases, (job, case), sizer_stopped):
+                fail(job, RuntimeError('sizing stopped'))
+
+    def size(pool):
+        pending, finished = [], False
+        try:
+            while not finished:
+                # While batches are sized, new cases are awaited shortly to pass sized ones to writers:
+                try:
+                    chunk = [cases.get(timeout=0.01 if pending else None)]
+                except queue.Empty:
+                    chunk = []
+                while chunk and len(chunk) < batch:
+                    try:
+                        chunk.append(cases.get_nowait())
+                    except queue.Empty:
+                        break
+                if chunk and chunk[-1] is None:
+                    chunk.pop()
+                    finished = True
+                if chunk:
+                    try:
+                        pending.append((chunk, time.perf_counter(),
+                                        pool.submit(size_timed, [case for job, case in chunk])))
+                    except Exception as error:
+                        for job, case in chunk:
+                            fail(job, error)
+                # Not more than two batches for every worker are sized at once:
+                while pending and (finished or len(pending) > 2 * (workers or os.cpu_count() or 1)
+                                   or pending[0][2].done()):
+                    chunk, start, future = pending.pop(0)
+                    try:
+                        sized, seconds = future.result()
+                    except Exception as error:
+                        for job, case in chunk:
+                            fail(job, error)
+                        continue
+                    metrics['size'].record(len(chunk), start, seconds)
+                    for (job, case), result in zip(chunk, sized):
+                        if not put_while(results, (job, case, result), writers_stopped):
+                            fail(job, RuntimeError('writing stopped'))
+        finally:
+            sizer_stopped.set()
+            for chunk, start, future in pending:
+                future.cancel()
+                for job, case in chunk:
+                    fail(job, RuntimeError('sizing stopped'))
+            for _ in range(writers):
+                put_while(results, None, writers_stopped)
+
+    def write():
+        try:
+            while True:
+                item = results.get()
+                if item is None:
+                    return
+                job, case, result = item
+                start = time.perf_counter()
+                try:
+                    wb = openpyxl.load_workbook(job.get('template', template))
+                    fill_spec_sheet(wb.active, *spec_values(case, result))
+                    wb.save(job['spec'])
+                except Exception as error:
+                    fail(job, error)
+                    continue
+                metrics['write'].record(1, start, time.perf_counter() - start)
+                with lock:
+                    written.append(job['spec'])
+        finally:
+            with lock:
+                running_writers[0] -= 1
+                if not running_writers[0]:
+                    writers_stopped.set()
+
+    start = time.perf_counter()
+    own_pool = executor is None
+    pool = ProcessPoolExecutor(workers) if own_pool else executor
+    try:
+        reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+        writer_threads = [threading.Thread(target=write) for _ in range(writers)]
+        sizer = threading.Thread(target=size, args=(pool,))
+        for thread in reader_threads + writer_threads + [sizer]:
+            thread.start()
+        for thread in reader_threads:
+            thread.join()
+        put_while(cases, None, sizer_stopped)
+        for thread in [sizer] + writer_threads:
+            thread.join()
+    finally:
+        if own_pool:
+            pool.shutdown()
+    elapsed = time.perf_counter() - start
+    return {'jobs': len(jobs), 'written': len(written), 'failed': failed, 'seconds': round(elapsed, 3),
+            'vessels_per_s': round(len(written) / elapsed, 1) if elapsed else None,
+            'stages': {'read': metrics['read'].report(readers), 'size': metrics['size'].report(workers or 1),
+                       'write': metrics['write'].report(writers)},
+            'queues': {'cases': cases.report(), 'results': results.report()}}
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Reads Data workbooks, sizes vessels and fills Spec workbooks')
+    arguments.add_argument('data', help='directory with Data workbooks, one vessel in each')
+    arguments.add_argument('output', help='directory for filled Spec workbooks')
+    arguments.add_argument('--base', help='JSON file with base case, which fills inputs missing in Data file')
+    arguments.add_argument('--template', default=SPEC_TEMPLATE)
+    arguments.add_argument('--readers', type=int, default=2)
+    arguments.add_argument('--writers', type=int, default=2)
+    arguments.add_argument('--workers', type=int, default=os.cpu_count())
+    options = arguments.parse_args()
+    base_case = None
+    if options.base:
+        with open(options.base, encoding='utf-8') as file:
+            base_case = json.load(file)
+    os.makedirs(options.output, exist_ok=True)
+    jobs = [{'data': path, 'spec': os.path.join(options.output, os.path.splitext(os.path.basename(path))[0] +
+                                                 '_spec.xlsx')}
+            for path in sorted(glob.glob(os.path.join(options.data, '*.xlsx')))]
+    report = run_pipeline(jobs, base_case, options.template, options.readers, options.writers,
+                          workers=options.workers)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import openpyxl
+from vessel_engine import parse_case, size_cases
+from vessel_golden import generate_cases
+from vessel_pipeline import run_pipeline
+from vessel_watch import read_data_column
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class PipelineTestCase(unittest.TestCase):
+    def test_specs_of_data_files(self):
+        base_case = dict(generate_cases(1)[0], insulation_type=1)
+        with tempfile.TemporaryDirectory() as directory:
+            jobs = []
+            for i in range(6):
+                data = os.path.join(directory, 'data%d.xlsx' % i)
+                shutil.copy(os.path.join(HERE, 'Data.xlsx'), data)
+                wb = openpyxl.load_workbook(data)
+                wb.active['N5'] = 10000 * (i + 1)
+                wb.save(data)
+                jobs.append({'data': data, 'spec': os.path.join(directory, 'spec%d.xlsx' % i),
+                             'case': {'vessel_diameter': str(1 + i / 10)}})
+            jobs.append({'data': os.path.join(directory, 'missing.xlsx'), 'spec': os.path.join(directory, 'x.xlsx')})
+            report = run_pipeline(jobs, base_case, workers=2, queue_size=2, batch=2)
+            self.assertEqual(report['written'], 6)
+            self.assertEqual([job['data'] for job in report['failed']], [jobs[-1]['data']])
+            self.assertEqual(report['stages']['size']['items'], 6)
+            self.assertLessEqual(report['queues']['cases']['max_depth'], 2)
+            for job in jobs[:-1]:
+                case = parse_case(dict(base_case, **job['case'], **read_data_column(job['data'])))
+                result = size_cases([case])[0]
+                sheet = openpyxl.load_workbook(job['spec']).active
+                self.assertEqual(sheet['F4'].value, case['vapor_mass_flow'])
+                self.assertEqual(sheet['F12'].value, float(case['vessel_diameter']) * 1000)
+                self.assertEqual(sheet['F13'].value, float(result['tan_to_tan']) * 1000)
+                self.assertEqual((sheet['F17'].value, sheet['F18'].value), ('PP', case['material']))
+                self.assertEqual(sheet['A7'].value, 'Operating temperature')
+
+    def test_stopped_stages_do_not_hang(self):
+        base_case = generate_cases(1)[0]
+        with tempfile.TemporaryDirectory() as directory:
+            jobs = [{'data': os.path.join(HERE, 'Data.xlsx'), 'spec': os.path.join(directory, 'spec%d.xlsx' % i)}
+                    for i in range(8)]
+            pool = ThreadPoolExecutor(1)
+            pool.shutdown()
+            report = run_pipeline(jobs, base_case, executor=pool, queue_size=1, batch=1)
+            self.assertEqual((report['written'], len(report['failed'])), (0, 8))
+            template = os.path.join(directory, 'Spec.xls')
+            with open(template, 'w') as file:
+                file.write('not a workbook')
+            report = run_pipeline(jobs, base_case, template, workers=1, queue_size=1, batch=1)
+            self.assertEqual((report['written'], len(report['failed'])), (0, 8))
+            self.assertIn('InvalidFileException', report['failed'][0]['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Project file: inputs of all vessels of GUI session, so work is restored without fetching Data
+file and typing entries again. File is JSON with names of fields written once and values of every
+vessel as list in the same order:
+
+    {"format": "vessel_sizing project", "version": 1, "fields": [...],
+     "vessels": [{"name": "Vessel 1", "values": [...]}, ...]}
+
+Fields are CASE_FIELDS and GUI_FIELDS of vessel_calc, values are the ones of GUI entries and
+variables (text, int of radio buttons, bool of demister). File of other version or with unknown
+fields is not loaded."""
+
+import json
+
+from vessel_calc import CASE_FIELDS, GUI_FIELDS
+
+PROJECT_FORMAT = 'vessel_sizing project'
+PROJECT_VERSION = 1
+PROJECT_FIELDS = CASE_FIELDS + GUI_FIELDS
+
+
+def dump_project(vessels):
+    """Project of vessels given as (name, values) pairs, values are dictionaries of PROJECT_FIELDS.
+    Fields, which none of vessels has, are not written."""
+    fields = [field for field in PROJECT_FIELDS if any(field in values for name, values in vessels)]
+    return {'format': PROJECT_FORMAT, 'version': PROJECT_VERSION, 'fields': fields,
+            'vessels': [{'name': name, 'values': [values.get(field, '') for field in fields]}
+                        for name, values in vessels]}
+
+
+def parse_project(project):
+    """Checks project against its version and returns list of (name, values) pairs"""
+    if not isinstance(project, dict) or project.get('format') != PROJECT_FORMAT:
+        raise ValueError('Not a vessel sizing project')
+    if project.get('version') != PROJECT_VERSION:
+        raise ValueError('Project version %r is not supported, expected %d' % (project.get('version'),
+                                                                                PROJECT_VERSION))
+    fields = project.get('fields')
+    if not isinstance(fields, list) or not isinstance(project.get('vessels'), list):
+        raise ValueError('Project has no fields or vessels')
+    unknown = [field for field in fields if field not in PROJECT_FIELDS]
+    if unknown:
+        raise ValueError('Unknown fields of project: ' + ', '.join(map(str, unknown)))
+    vessels = []
+    for number, vessel in enumerate(project['vessels'], 1):
+        values = vessel.get('values') if isinstance(vessel, dict) else None
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError('Vessel %d has %s values for %d fields' % (
+                number, len(values) if isinstance(values, list) else 'no', len(fields)))
+        if not all(isinstance(value, (str, int, bool)) for value in values):
+            raise ValueError('Vessel %d has values which are not text or numbers' % number)
+        vessels.append((str(vessel.get('name', 'Vessel %d' % number)), dict(zip(fields, values))))
+    return vessels
+
+
+def save_project(path, vessels):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(dump_project(vessels), file, ensure_ascii=False, separators=(',', ':'))
+
+
+def load_project(path):
+    """Vessels of project file as (name, values) pairs, ValueError for wrong or other version of file"""
+    with open(path, encoding='utf-8') as file:
+        try:
+            project = json.load(file)
+        except json.JSONDecodeError as error:
+            raise ValueError('Project file is damaged: ' + str(error))
+    return parse_project(project)
@@ -0,0 +1,33 @@
+import os
+import tempfile
+import time
+import unittest
+from vessel_golden import generate_cases
+from vessel_project import save_project, load_project, dump_project, parse_project
+
+
+class ProjectTestCase(unittest.TestCase):
+    def test_round_trip(self):
+        vessels = [('V-%d' % i, dict(case, project='Plant', vessel_id='V-%d' % i, insulation_type=1))
+                   for i, case in enumerate(generate_cases(500))]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'study.vsproj')
+            save_project(path, vessels)
+            start = time.perf_counter()
+            loaded = load_project(path)
+            self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(loaded, vessels)
+
+    def test_validation(self):
+        project = dump_project([('V-1', generate_cases(1)[0])])
+        with self.assertRaises(ValueError):
+            parse_project(dict(project, version=2))
+        with self.assertRaises(ValueError):
+            parse_project(dict(project, fields=project['fields'][:-1] + ['unknown']))
+        with self.assertRaises(ValueError):
+            parse_project(dict(project, vessels=[{'name': 'V-1', 'values': project['vessels'][0]['values'][1:]}]))
+        self.assertEqual(parse_project(project)[0][0], 'V-1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Process data as functions of temperature and pressure, read from Data workbook.
+Every filled case column of Data file (D:N, rows 3-15, the same rows as fetch_button_action reads
+from N column) is one point: temperature, pressure and process data at them. Distinct temperatures
+and pressures of points shall form regular grid, for example 3 temperatures x 4 pressures in
+12 columns of the sheet. Between grid points values are found by bilinear interpolation, query
+points out of grid are limited by its edges.
+
+Grids are kept in GRID_CACHE by file name and modification time, so sweeps do not read Excel again."""
+
+import os
+from array import array
+from bisect import bisect_right
+
+import openpyxl
+
+from vessel_calc import DATA_FIELDS
+from vessel_records import format_number
+
+# Process data which depend on temperature and pressure, all rows of Data file below them:
+PROPERTY_FIELDS = DATA_FIELDS[2:]
+# Case1..Case10 and Rated columns (D:N) and first row of process data:
+FIRST_COLUMN, LAST_COLUMN, FIRST_ROW = 4, 14, 3
+GRID_CACHE = {}
+
+
+def read_points(path):
+    """Filled case columns of Data file as dictionaries with DATA_FIELDS keys"""
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = list(wb.active.iter_rows(min_row=FIRST_ROW, max_row=FIRST_ROW + len(DATA_FIELDS) - 1,
+                                        min_col=FIRST_COLUMN, max_col=LAST_COLUMN, values_only=True))
+    finally:
+        wb.close()
+    return [dict(zip(DATA_FIELDS, column)) for column in zip(*rows)
+            if all(isinstance(value, (int, float)) for value in column)]
+
+
+def cell(axis, x):
+    """Lower and upper grid index around x and weight of upper one"""
+    if x <= axis[0]:
+        return 0, 0, 0.0
+    if x >= axis[-1]:
+        return len(axis) - 1, len(axis) - 1, 0.0
+    upper = bisect_right(axis, x)
+    return upper - 1, upper, (x - axis[upper - 1]) / (axis[upper] - axis[upper - 1])
+
+
+class PropertyGrid:
+    """Regular grid of process data over temperatures (°C) and pressures (kg/cm^2). Every field is
+    kept in one array, row by row of temperatures."""
+
+    def __init__(self, points):
+        if not points:
+            raise ValueError('No filled case columns for property grid')
+        self.temperatures = array('d', sorted({float(point['temperature']) for point in points}))
+        self.pressures = array('d', sorted({float(point['pressure']) for point in points}))
+        by_condition = {(float(point['temperature']), float(point['pressure'])): point for point in points}
+        missing = [(t, p) for t in self.temperatures for p in self.pressures if (t, p) not in by_condition]
+        if missing:
+            raise ValueError('Cases do not form regular grid of temperature and pressure, missing: ' +
+                             ', '.join('%g °C %g kg/cm2' % condition for condition in missing))
+        self.values = {field: array('d', [float(by_condition[(t, p)][field])
+                                          for t in self.temperatures for p in self.pressures])
+                       for field in PROPERTY_FIELDS}
+
+    def lookup(self, temperatures, pressures, fields=PROPERTY_FIELDS):
+        """Values of fields at query points given as lists of temperatures and pressures.
+        Returns dictionary of lists. Grid cell and weights of every point are found once for all fields."""
+        width = len(self.pressures)
+        corners = []
+        for t, p in zip(temperatures, pressures):
+            t_lower, t_upper, t_weight = cell(self.temperatures, t)
+            p_lower, p_upper, p_weight = cell(self.pressures, p)
+            corners.append((t_lower * width + p_lower, t_lower * width + p_upper, t_upper * width + p_lower,
+                            t_upper * width + p_upper, (1 - t_weight) * (1 - p_weight), (1 - t_weight) * p_weight,
+                            t_weight * (1 - p_weight), t_weight * p_weight))
+        results = {}
+        for field in fields:
+            v = self.values[field]
+            results[field] = [v[a] * wa + v[b] * wb + v[c] * wc + v[d] * wd
+                              for a, b, c, d, wa, wb, wc, wd in corners]
+        return results
+
+
+def read_property_grid(path):
+    """Property grid of Data file, Excel is read again only when file is changed"""
+    path = os.path.abspath(path)
+    key = (path, os.path.getmtime(path))
+    if key not in GRID_CACHE:
+        for old_key in [old_key for old_key in GRID_CACHE if old_key[0] == path]:
+            del GRID_CACHE[old_key]
+        GRID_CACHE[key] = PropertyGrid(read_points(path))
+    return GRID_CACHE[key]
+
+
+def sweep_cases(base_case, grid, temperatures, pressures):
+    """Cases of base case at every pair of temperature and pressure with process data of grid,
+    rounded as fetch_button_action puts them into data input boxes. Whole numbers are written
+    without decimals, so zero liquid 2 density is '0' as chain expects."""
+    values = grid.lookup(temperatures, pressures)
+    cases = []
+    for i, (t, p) in enumerate(zip(temperatures, pressures)):
+        case = dict(base_case, temperature=format_number(round(float(t), 3)),
+                    pressure=format_number(round(float(p), 3)))
+        for field in PROPERTY_FIELDS:
+            case[field] = format_number(round(values[field][i], 3))
+        cases.append(case)
+    return cases
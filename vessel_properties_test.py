@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+import openpyxl
+from vessel_calc import DATA_FIELDS
+from vessel_engine import size_cases
+from vessel_golden import generate_cases
+from vessel_properties import PropertyGrid, read_property_grid, sweep_cases, GRID_CACHE
+
+
+def point(t, p):
+    """Process data with density and viscosity linear in temperature and pressure"""
+    values = dict.fromkeys(DATA_FIELDS, 1.0)
+    values.update(temperature=t, pressure=p, vapor_density=2 + 0.1 * p - 0.01 * t,
+                  liquid1_density=800 - 0.5 * t, vapor_viscosity=0.01 + 0.0001 * t, liquid2_density=0)
+    return values
+
+
+def write_data_file(path, points):
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    for column, values in enumerate(points, start=4):
+        for row, field in enumerate(DATA_FIELDS, start=3):
+            sheet.cell(row=row, column=column, value=values[field])
+    wb.save(path)
+
+
+class PropertyGridTestCase(unittest.TestCase):
+    def test_bilinear_lookup(self):
+        grid = PropertyGrid([point(t, p) for t in (20, 60, 100) for p in (5, 10)])
+        values = grid.lookup([20, 40, 80, 200], [5, 7.5, 10, 0])
+        self.assertAlmostEqual(values['vapor_density'][0], point(20, 5)['vapor_density'])
+        self.assertAlmostEqual(values['vapor_density'][1], point(40, 7.5)['vapor_density'])
+        self.assertAlmostEqual(values['liquid1_density'][2], point(80, 10)['liquid1_density'])
+        # Out of grid values are limited by its edges:
+        self.assertAlmostEqual(values['vapor_density'][3], point(100, 5)['vapor_density'])
+
+    def test_irregular_grid(self):
+        with self.assertRaises(ValueError):
+            PropertyGrid([point(20, 5), point(20, 10), point(60, 5)])
+
+    def test_data_file(self):
+        # Data file of repository has Rated column only, it is grid of one point:
+        grid = read_property_grid('Data.xlsx')
+        self.assertEqual(len(grid.temperatures) * len(grid.pressures), 1)
+        self.assertAlmostEqual(grid.lookup([0], [0])['liquid1_density'][0], 691.28560451121)
+
+    def test_cached_sweep(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'Data.xlsx')
+            write_data_file(path, [point(t, p) for t in (20, 100) for p in (5, 10)])
+            grid = read_property_grid(path)
+            self.assertIs(read_property_grid(path), grid)
+            base = generate_cases(1)[0]
+            cases = sweep_cases(base, grid, [20, 50, 100], [5, 8, 10])
+            self.assertEqual(cases[1]['liquid1_density'], '775')
+            results = size_cases(cases)
+            self.assertEqual(len(results), 3)
+            self.assertIsNotNone(results[2]['k_value'])
+            self.assertIsNotNone(results[2]['inlet_momentum'])
+        GRID_CACHE.clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
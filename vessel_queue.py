@@ -0,0 +1,291 @@
+"""Resumable queue of long sizing studies in one SQLite file, without any broker.
+Cases are added by chunks, every chunk is one row with its cases as JSON. Worker processes claim
+chunks one by one in write transaction, size them with vessel_engine and save results of chunk in
+one transaction too, so study which was interrupted keeps every finished chunk and continues from
+the first unfinished one. Chunk claimed by worker which died is claimed again after LEASE seconds
+(or at once by 'release'). Workers may be started any time, also while others are running. Chunk whose
+sizing raises is saved as 'failed' with text of error, so it neither stops the worker nor is claimed again.
+
+Usage:
+    python vessel_queue.py add study.db cases.ndjson --base vessel.json
+    python vessel_queue.py work study.db --workers 4
+    python vessel_queue.py progress study.db
+    python vessel_queue.py release study.db          after crash of all workers
+    python vessel_queue.py summary study.db          distributions of finished results
+    python vessel_queue.py export study.db results.ndjson
+    python vessel_queue.py export study.db results.xlsx
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import sys
+import time
+from multiprocessing import Process
+
+from vessel_calc import RESULT_FIELDS
+from vessel_engine import size_chunk
+from vessel_stream import LineParser
+from vessel_summary import ResultSummary
+from vessel_xlsx import export_xlsx
+
+CHUNK_SIZE = 256
+# Seconds after which claimed chunk, which is not finished, is given to other worker:
+LEASE = 600
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    first_case INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    cases TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    claimed REAL,
+    finished REAL,
+    results TEXT
+);
+CREATE INDEX IF NOT EXISTS chunks_state ON chunks (state, id);
+"""
+
+
+def connect(path):
+    """Connection in autocommit mode, transactions are begun explicitly. WAL journal lets readers
+    (progress) work while workers write."""
+    connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def add_cases(path, cases, chunk_size=CHUNK_SIZE):
+    """Adds cases to study by chunks, returns amount of chunks added"""
+    connection = connect(path)
+    try:
+        connection.execute('BEGIN IMMEDIATE')
+        first = connection.execute('SELECT COALESCE(MAX(first_case + count), 0) FROM chunks').fetchone()[0]
+        chunks = [cases[start:start + chunk_size] for start in range(0, len(cases), chunk_size)]
+        connection.executemany('INSERT INTO chunks (first_case, count, cases) VALUES (?, ?, ?)',
+                               [(first + i * chunk_size, len(chunk), json.dumps(chunk))
+                                for i, chunk in enumerate(chunks)])
+        connection.execute('COMMIT')
+    finally:
+        connection.close()
+    return len(chunks)
+
+
+def claim_chunk(connection, worker, lease=LEASE):
+    """Takes first pending chunk, or chunk whose lease expired, for worker. Returns id and cases or None."""
+    now = time.time()
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        row = connection.execute("SELECT id, cases FROM chunks WHERE state = 'pending' OR "
+                                 "(state = 'claimed' AND claimed < ?) ORDER BY id LIMIT 1", (now - lease,)).fetchone()
+        if row is not None:
+            connection.execute("UPDATE chunks SET state = 'claimed', worker = ?, claimed = ? WHERE id = ?",
+                               (worker, now, row[0]))
+        connection.execute('COMMIT')
+    except BaseException:
+        connection.execute('ROLLBACK')
+        raise
+    return None if row is None else (row[0], json.loads(row[1]))
+
+
+def finish_chunk(connection, chunk_id, worker, results, errors):
+    """Saves results of chunk, if chunk is still claimed by this worker. Returns True if saved."""
+    cursor = connection.execute("UPDATE chunks SET state = 'done', finished = ?, results = ? "
+                                "WHERE id = ? AND state = 'claimed' AND worker = ?",
+                                (time.time(), json.dumps({'results': results, 'errors': errors}), chunk_id, worker))
+    return cursor.rowcount == 1
+
+
+def fail_chunk(connection, chunk_id, worker, error):
+    """Saves text of error of chunk, if chunk is still claimed by this worker. Returns True if saved."""
+    cursor = connection.execute("UPDATE chunks SET state = 'failed', finished = ?, results = ? "
+                                "WHERE id = ? AND state = 'claimed' AND worker = ?",
+                                (time.time(), json.dumps({'error': '%s: %s' % (type(error).__name__, error)}),
+                                 chunk_id, worker))
+    return cursor.rowcount == 1
+
+
+def run_worker(path, worker=None, lease=LEASE, limit=None):
+    """Sizes chunks of study until none is left (or limit of chunks), returns amount of sized chunks.
+    Failed chunks are counted in limit too, but not in amount returned."""
+    worker = worker or '%s:%d' % (socket.gethostname(), os.getpid())
+    connection = connect(path)
+    done = taken = 0
+    try:
+        while limit is None or taken < limit:
+            claimed = claim_chunk(connection, worker, lease)
+            if claimed is None:
+                break
+            chunk_id, cases = claimed
+            taken += 1
+            try:
+                results, errors = size_chunk(cases)
+            except Exception as error:
+                fail_chunk(connection, chunk_id, worker, error)
+                continue
+            if finish_chunk(connection, chunk_id, worker, results, errors):
+                done += 1
+    finally:
+        connection.close()
+    return done
+
+
+def release_claims(path):
+    """Gives all claimed chunks back to queue, for restart after all workers died"""
+    connection = connect(path)
+    try:
+        return connection.execute("UPDATE chunks SET state = 'pending', worker = NULL, claimed = NULL "
+                                  "WHERE state = 'claimed'").rowcount
+    finally:
+        connection.close()
+
+
+def progress(path, window=60):
+    """Amount of cases by state, rate of chunks finished in last window seconds (cases/s) and
+    estimated seconds to end"""
+    connection = connect(path)
+    try:
+        states = dict(connection.execute('SELECT state, SUM(count) FROM chunks GROUP BY state').fetchall())
+        now = time.time()
+        recent, started, finished = connection.execute(
+            "SELECT COALESCE(SUM(count), 0), MIN(claimed), MAX(finished) FROM chunks WHERE state = 'done' "
+            "AND finished > ?", (now - window,)).fetchone()
+        workers = connection.execute("SELECT COUNT(DISTINCT worker) FROM chunks WHERE state = 'claimed' "
+                                     "AND claimed > ?", (now - LEASE,)).fetchone()[0]
+    finally:
+        connection.close()
+    total = sum(states.values())
+    done = states.get('done', 0)
+    failed = states.get('failed', 0)
+    # Rate of chunks finished within window, from the first claim to the last finish of them:
+    rate = recent / (finished - started) if recent and finished > started else 0.0
+    return {'cases': total, 'done': done, 'failed': failed, 'claimed': states.get('claimed', 0),
+            'pending': states.get('pending', 0), 'percent': round(100 * (done + failed) / total, 1) if total else 100.0,
+            'cases_per_s': round(rate, 1), 'active_workers': workers,
+            'eta_s': round((total - done - failed) / rate) if rate else None}
+
+
+def finished_chunks(connection):
+    """Number of first case and results of every finished chunk in order of cases, one chunk in memory"""
+    for first, results in connection.execute("SELECT first_case, results FROM chunks WHERE state = 'done' "
+                                             "ORDER BY id"):
+        yield first, json.loads(results)
+
+
+def failed_chunks(path):
+    """Number of first case, amount of cases and text of error of every failed chunk in order of cases"""
+    connection = connect(path)
+    try:
+        return [(first, count, json.loads(results)['error']) for first, count, results in connection.execute(
+            "SELECT first_case, count, results FROM chunks WHERE state = 'failed' ORDER BY id")]
+    finally:
+        connection.close()
+
+
+def study_records(path, summary=None):
+    """Record of every finished case in order of cases: its number, results and errors.
+    Results are added to summary (ResultSummary) too, if it is given."""
+    connection = connect(path)
+    try:
+        for first, chunk in finished_chunks(connection):
+            for i, (result, errors) in enumerate(zip(chunk['results'], chunk['errors'])):
+                record = {'case': first + i}
+                record.update(result)
+                if errors:
+                    record['errors'] = errors
+                if summary is not None:
+                    summary.add(result, first + i)
+                yield record
+    finally:
+        connection.close()
+
+
+def export_results(path, output_file, summary=None):
+    """Writes NDJSON line of every finished case, returns amount of cases"""
+    count = 0
+    for record in study_records(path, summary):
+        output_file.write(json.dumps(record) + '\n')
+        count += 1
+    return count
+
+
+def summarize_study(path):
+    """Summary of results of finished chunks"""
+    connection = connect(path)
+    summary = ResultSummary()
+    try:
+        for first, chunk in finished_chunks(connection):
+            summary.add_results(chunk['results'], range(first, first + len(chunk['results'])))
+    finally:
+        connection.close()
+    return summary
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Resumable sizing study in SQLite file')
+    commands = arguments.add_subparsers(dest='command', required=True)
+    add = commands.add_parser('add', help='add cases of NDJSON or CSV file')
+    add.add_argument('study')
+    add.add_argument('cases')
+    add.add_argument('--base', help='JSON file with base case, which fills fields missing in lines')
+    add.add_argument('--chunk', type=int, default=CHUNK_SIZE)
+    work = commands.add_parser('work', help='size cases in worker processes')
+    work.add_argument('study')
+    work.add_argument('--workers', type=int, default=os.cpu_count())
+    work.add_argument('--lease', type=float, default=LEASE)
+    for name in ('progress', 'release', 'summary'):
+        commands.add_parser(name).add_argument('study')
+    export = commands.add_parser('export', help='write NDJSON (or .xlsx) results in order of cases')
+    export.add_argument('study')
+    export.add_argument('output')
+    options = arguments.parse_args()
+    if options.command == 'add':
+        base_case = None
+        if options.base:
+            with open(options.base, encoding='utf-8') as file:
+                base_case = json.load(file)
+        parser, cases = LineParser(base_case), []
+        with open(options.cases, encoding='utf-8') as file:
+            for number, line in enumerate(file, 1):
+                try:
+                    case = parser.parse(line)
+                except ValueError as error:
+                    sys.exit('Line %d: %s' % (number, error))
+                if case is not None:
+                    cases.append(case)
+        print('%d chunks added' % add_cases(options.study, cases, options.chunk))
+    elif options.command == 'work':
+        workers = [Process(target=run_worker, args=(options.study, None, options.lease))
+                   for _ in range(options.workers)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        print(json.dumps(progress(options.study)))
+    elif options.command == 'progress':
+        print(json.dumps(progress(options.study), indent=2))
+    elif options.command == 'release':
+        print('%d chunks released' % release_claims(options.study))
+    elif options.command == 'summary':
+        print(json.dumps(summarize_study(options.study).report(), indent=2))
+    else:
+        if options.output.lower().endswith('.xlsx'):
+            columns = ('case',) + RESULT_FIELDS + ('errors',)
+            count = export_xlsx(options.output, study_records(options.study), columns)
+        else:
+            with open(options.output, 'w', encoding='utf-8') as file:
+                count = export_results(options.study, file)
+        failed = failed_chunks(options.study)
+        print('%d cases exported, %d cases of %d chunks failed' % (count, sum(chunk[1] for chunk in failed),
+                                                                   len(failed)))
+        for first, amount, error in failed:
+            print('Cases %d-%d: %s' % (first, first + amount - 1, error))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from multiprocessing import Process
+from vessel_engine import size_cases_with_errors
+from vessel_golden import generate_cases
+from vessel_queue import add_cases, claim_chunk, connect, export_results, progress, release_claims, run_worker
+from vessel_queue import failed_chunks, summarize_study
+
+
+class QueueTestCase(unittest.TestCase):
+    def test_interrupted_study_resumes(self):
+        cases = generate_cases(1000)
+        cases[10]['liquid1_density'] = 'abc'
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'study.db')
+            self.assertEqual(add_cases(path, cases[:600], chunk_size=100), 6)
+            self.assertEqual(add_cases(path, cases[600:], chunk_size=100), 4)
+            # First run stops after 3 chunks, one more chunk is claimed by worker which dies:
+            self.assertEqual(run_worker(path, 'first', limit=3), 3)
+            connection = connect(path)
+            self.assertEqual(claim_chunk(connection, 'dead')[0], 4)
+            connection.close()
+            self.assertEqual(progress(path)['done'], 300)
+            self.assertEqual(release_claims(path), 1)
+            # Two workers finish the study at once:
+            workers = [Process(target=run_worker, args=(path, 'worker%d' % i)) for i in range(2)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            report = progress(path)
+            self.assertEqual((report['done'], report['pending'], report['claimed']), (1000, 0, 0))
+            output = io.StringIO()
+            self.assertEqual(export_results(path, output), 1000)
+            summary = summarize_study(path)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        results, errors = size_cases_with_errors(cases)
+        self.assertEqual([record.pop('case') for record in records], list(range(1000)))
+        self.assertEqual([record.pop('errors', {}) for record in records], errors)
+        self.assertEqual(records, results)
+        self.assertEqual(summary.fields['total_weight'].count, sum(r['total_weight'] is not None for r in results))
+        weights = [result['total_weight'] or 0 for result in results]
+        self.assertEqual(summary.fields['total_weight'].high_id, weights.index(max(weights)))
+
+    def test_poison_chunk_fails(self):
+        cases = generate_cases(300)
+        cases[150] = None
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'study.db')
+            add_cases(path, cases, chunk_size=100)
+            # Worker goes on after the poison chunk and it is not claimed again:
+            self.assertEqual(run_worker(path, 'first'), 2)
+            self.assertEqual(run_worker(path, 'second'), 0)
+            report = progress(path)
+            self.assertEqual((report['done'], report['failed'], report['pending'], report['claimed'],
+                              report['percent']), (200, 100, 0, 0, 100.0))
+            [(first, count, error)] = failed_chunks(path)
+            output = io.StringIO()
+            self.assertEqual(export_results(path, output), 200)
+        self.assertEqual((first, count), (100, 100))
+        self.assertIn('AttributeError', error)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([record['case'] for record in records], list(range(100)) + list(range(200, 300)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,236 @@
+"""Compact records of cases and results.
+GUI and size_vertical_separator keep values as dictionaries of strings, which takes several kB
+per case. For single case __slots__ records are used (ProcessData, MechanicalInputs, SizingResult),
+which convert cheaply to and from GUI entries and variables. For big studies struct of arrays
+tables (CaseTable, ResultTable) are used: every numeric field is one array('d') with 8 bytes per
+case, every text field is array of 2-byte codes and rewrite fields, which are seldom filled, keep
+only filled values, so per case memory is ~10 times lower."""
+
+from array import array
+from bisect import bisect_left
+import math
+
+from vessel_calc import DATA_FIELDS, CASE_FIELDS, RESULT_FIELDS, NOZZLE_NAMES
+from vessel_engine import CASE_DEFAULTS
+
+
+def format_number(value):
+    """Converts float back to text as it looks in GUI entry: 2.0 -> '2', 0.5 -> '0.5'"""
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def to_number(value):
+    """Converts text or number to float, empty or wrong text gives NaN"""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return math.nan
+
+
+class ProcessData:
+    """13 process values of Data tab, in order of Data file rows"""
+    __slots__ = DATA_FIELDS
+
+    def __init__(self, *values):
+        for field, value in zip(DATA_FIELDS, values):
+            setattr(self, field, to_number(value))
+
+    @classmethod
+    def from_entries(cls, data_input_boxes):
+        """Reads data input boxes of GUI"""
+        return cls(*[data_input_boxes[i].get() for i in range(len(DATA_FIELDS))])
+
+    def to_entries(self, data_input_boxes):
+        """Fills data input boxes of GUI the same way as fetch button does"""
+        for i, field in enumerate(DATA_FIELDS):
+            data_input_boxes[i].delete(first=0, last=None)
+            value = getattr(self, field)
+            data_input_boxes[i].insert(0, '' if math.isnan(value) else format_number(round(value, 3)))
+
+    @classmethod
+    def from_case(cls, case):
+        return cls(*[case.get(field, '') for field in DATA_FIELDS])
+
+    def to_case(self):
+        return {field: '' if math.isnan(getattr(self, field)) else format_number(getattr(self, field))
+                for field in DATA_FIELDS}
+
+
+class MechanicalInputs:
+    """Inputs of wall thickness and weight estimation"""
+    __slots__ = ('design_pressure', 'design_temperature', 'corrosion_allowance', 'joint_efficiency', 'material')
+
+    def __init__(self, design_pressure, design_temperature, corrosion_allowance, joint_efficiency, material):
+        self.design_pressure = to_number(design_pressure)
+        self.design_temperature = to_number(design_temperature)
+        self.corrosion_allowance = to_number(corrosion_allowance)
+        self.joint_efficiency = to_number(joint_efficiency)
+        self.material = material
+
+    @classmethod
+    def from_entries(cls, mech_entries, material_var):
+        """Reads 4 mechanical entries of calculation tab (in GUI order) and material choice"""
+        return cls(mech_entries[0].get(), mech_entries[1].get(), mech_entries[2].get(), mech_entries[3].get(),
+                   material_var.get())
+
+    def to_entries(self, mech_entries, material_var):
+        for i, field in enumerate(self.__slots__[:4]):
+            mech_entries[i].delete(0, 'end')
+            value = getattr(self, field)
+            mech_entries[i].insert(0, '' if math.isnan(value) else format_number(value))
+        material_var.set(self.material)
+
+    @classmethod
+    def from_case(cls, case):
+        return cls(*[case.get(field, '') for field in cls.__slots__])
+
+    def to_case(self):
+        case = {field: '' if math.isnan(getattr(self, field)) else format_number(getattr(self, field))
+                for field in self.__slots__[:4]}
+        case['material'] = self.material
+        return case
+
+
+class SizingResult:
+    """All results of sizing chain, numbers are floats, missing results are None"""
+    __slots__ = RESULT_FIELDS
+
+    def __init__(self, results):
+        for field in RESULT_FIELDS:
+            setattr(self, field, results.get(field))
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in RESULT_FIELDS}
+
+    def to_vars(self, result_vars, vessel_diameter='', tan_to_tan=''):
+        """Fills 6 variables of result tab: diameter, T-T height, L/D, separation, volume and weight.
+        Diameter and T-T height are inputs of case, so they are given separately."""
+        for var, value in zip(result_vars, (vessel_diameter, tan_to_tan, self.l_d_ratio, self.separation,
+                                            self.vessel_volume, self.total_weight)):
+            var.set(str(value))
+
+
+# Kinds of fields in tables, fields not listed here are floats:
+CASE_KINDS = dict({'demister': 'bool', 'vessel_phase': 'int', 'vessel_application': 'int',
+                   'head_and_bottom': 'text', 'vessel_orientation': 'text', 'material': 'text',
+                   'k_correlation': 'text'},
+                  **{name + suffix: 'text' for name in NOZZLE_NAMES for suffix in ('_dn', '_sch')},
+                  **{field: 'sparse' for field in CASE_FIELDS if field.endswith('_rewrite')})
+RESULT_KINDS = dict({'material_density': 'text', 'separation': 'text'},
+                    **{name + '_id': 'text' for name in NOZZLE_NAMES})
+
+
+class ColumnTable:
+    """Struct of arrays: one typed array per field. Text fields keep codes of distinct values,
+    sparse fields keep filled values only with array of their row numbers. Missing numbers are kept as NaN and
+    returned as missing value of table. Field missing in record takes its value of defaults. Integer,
+    which is empty, not a number or out of range of its column, is kept as -1 and returned as
+    missing value."""
+
+    def __init__(self, fields, kinds, missing, defaults=None):
+        self.fields = tuple(fields)
+        self.kinds = {field: kinds.get(field, 'float') for field in self.fields}
+        self.missing = missing
+        self.defaults = defaults or {}
+        self.count = 0
+        self.columns = {}
+        self.values = {}
+        self.codes = {}
+        for field, kind in self.kinds.items():
+            if kind == 'text':
+                self.columns[field] = array('H')
+                self.values[field], self.codes[field] = [], {}
+            elif kind == 'sparse':
+                self.columns[field] = (array('l'), array('d'))
+            else:
+                self.columns[field] = array({'float': 'd', 'int': 'b', 'bool': 'b'}[kind])
+
+    def __len__(self):
+        return self.count
+
+    def append(self, record):
+        for field, kind in self.kinds.items():
+            value = record[field] if field in record else self.defaults.get(field, self.missing)
+            if kind == 'float':
+                self.columns[field].append(to_number(value))
+            elif kind == 'text':
+                codes = self.codes[field]
+                if value not in codes:
+                    codes[value] = len(self.values[field])
+                    self.values[field].append(value)
+                self.columns[field].append(codes[value])
+            elif kind == 'sparse':
+                value = to_number(value)
+                if not math.isnan(value):
+                    self.columns[field][0].append(self.count)
+                    self.columns[field][1].append(value)
+            elif kind == 'bool':
+                self.columns[field].append(1 if value is True else 0)
+            else:
+                try:
+                    self.columns[field].append(int(value))
+                except (ValueError, TypeError, OverflowError):
+                    self.columns[field].append(-1)
+        self.count += 1
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def get(self, field, index):
+        kind = self.kinds[field]
+        if kind == 'sparse':
+            rows, values = self.columns[field]
+            position = bisect_left(rows, index)
+            if position == len(rows) or rows[position] != index:
+                return self.missing
+            return self.format(values[position])
+        value = self.columns[field][index]
+        if kind == 'text':
+            return self.values[field][value]
+        if kind == 'bool':
+            return value == 1
+        if kind == 'float':
+            return self.missing if math.isnan(value) else self.format(value)
+        return self.missing if value == -1 else value
+
+    def format(self, value):
+        return value
+
+    def row(self, index):
+        return {field: self.get(field, index) for field in self.fields}
+
+    def __iter__(self):
+        return (self.row(index) for index in range(len(self)))
+
+    def column(self, field):
+        """Returns column as list of values in the same form as row gives"""
+        return [self.get(field, index) for index in range(len(self))]
+
+    def nbytes(self):
+        """Memory taken by arrays of table (lists of distinct text values are not counted)"""
+        arrays = [column for field, column in self.columns.items() if self.kinds[field] != 'sparse']
+        arrays.extend(part for field, column in self.columns.items() if self.kinds[field] == 'sparse'
+                      for part in column)
+        return sum(column.itemsize * len(column) for column in arrays)
+
+
+class CaseTable(ColumnTable):
+    """Table of cases, rows are returned as case dictionaries with text values as GUI has"""
+
+    def __init__(self, cases=()):
+        ColumnTable.__init__(self, CASE_FIELDS, CASE_KINDS, '', CASE_DEFAULTS)
+        self.extend(cases)
+
+    def format(self, value):
+        return format_number(value)
+
+
+class ResultTable(ColumnTable):
+    """Table of sizing results, rows are returned as result dictionaries with float values"""
+
+    def __init__(self, results=()):
+        ColumnTable.__init__(self, RESULT_FIELDS, RESULT_KINDS, None)
+        self.extend(results)
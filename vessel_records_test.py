@@ -0,0 +1,100 @@
+import json
+import tracemalloc
+import unittest
+from vessel_engine import size_cases
+from vessel_golden import generate_cases
+from vessel_records import CaseTable, ResultTable, ProcessData, MechanicalInputs, SizingResult
+
+
+class FakeEntry:
+    """Entry with the same get/delete/insert as tkinter Entry"""
+
+    def __init__(self, text=''):
+        self.text = text
+
+    def get(self):
+        return self.text
+
+    def delete(self, first=0, last=None):
+        self.text = ''
+
+    def insert(self, index, text):
+        self.text = text
+
+    def set(self, text):
+        self.text = text
+
+
+def traced_size(build):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        return tracemalloc.get_traced_memory()[0] - before, kept
+    finally:
+        tracemalloc.stop()
+
+
+class RecordsTestCase(unittest.TestCase):
+    def test_case_table_round_trip(self):
+        cases = generate_cases(300)
+        table = CaseTable(cases)
+        self.assertEqual(len(table), 300)
+        self.assertEqual(size_cases(list(table)), size_cases(cases))
+
+    def test_missing_integers(self):
+        cases = generate_cases(3)
+        del cases[0]['vessel_phase']
+        cases[1]['vessel_application'] = ''
+        cases[2]['vessel_phase'] = 'x'
+        table = CaseTable(cases)
+        self.assertEqual([row['vessel_phase'] for row in table], [2, 2, ''])
+        self.assertEqual(table.get('vessel_application', 1), '')
+        self.assertEqual(size_cases(list(table)), size_cases(cases))
+
+    def test_missing_text_fields_and_large_integers(self):
+        cases = generate_cases(4)
+        del cases[0]['vessel_orientation']
+        del cases[1]['head_and_bottom']
+        cases[2]['vessel_phase'] = '300'
+        cases[3]['vessel_application'] = 1000
+        table = CaseTable(cases)
+        self.assertEqual((table.get('vessel_orientation', 0), table.get('head_and_bottom', 1)), ('V', 'None'))
+        self.assertEqual((table.get('vessel_phase', 2), table.get('vessel_application', 3)), ('', ''))
+        self.assertEqual(size_cases(list(table)), size_cases(cases))
+
+    def test_result_table_round_trip(self):
+        results = size_cases(generate_cases(50))
+        table = ResultTable(results)
+        self.assertEqual(table.row(7)['total_weight'], results[7]['total_weight'])
+        self.assertEqual(table.column('separation'), [result['separation'] for result in results])
+
+    def test_memory_is_ten_times_lower(self):
+        cases = generate_cases(5000)
+        case_text = json.dumps(cases)
+        result_text = json.dumps([{field: str(value) for field, value in result.items()}
+                                  for result in size_cases(cases)])
+        dict_size, copy = traced_size(lambda: json.loads(case_text))
+        table_size, table = traced_size(lambda: CaseTable(copy))
+        self.assertGreater(dict_size / table_size, 10)
+        dict_size, copy = traced_size(lambda: json.loads(result_text))
+        table_size, table = traced_size(lambda: ResultTable(copy))
+        self.assertGreater(dict_size / table_size, 10)
+
+    def test_gui_conversion(self):
+        case = generate_cases(1)[0]
+        boxes = {i: FakeEntry() for i in range(13)}
+        ProcessData.from_case(case).to_entries(boxes)
+        self.assertEqual(ProcessData.from_entries(boxes).to_case(), ProcessData.from_case(case).to_case())
+        mech_entries, material = {i: FakeEntry() for i in range(4)}, FakeEntry()
+        MechanicalInputs.from_case(case).to_entries(mech_entries, material)
+        self.assertEqual(MechanicalInputs.from_entries(mech_entries, material).to_case()['material'],
+                         case['material'])
+        result_vars = [FakeEntry() for i in range(6)]
+        result = size_cases([case])[0]
+        SizingResult(result).to_vars(result_vars, case['vessel_diameter'])
+        self.assertEqual(result_vars[5].get(), str(result['total_weight']))
+
+
+if __name__ == '__main__':
+    unittest.main()
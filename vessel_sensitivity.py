@@ -0,0 +1,187 @@
+"""Sensitivities of minimal diameter, tangent to tangent height and total weight to inputs of case,
+found by forward mode automatic differentiation in one pass of sizing chain.
+
+Every input of SENSITIVITY_FIELDS (or other numeric CASE_FIELDS given) is Dual number: value with
+gradient over all chosen inputs. Chain from k_value_calculation to calc_total_weight is calculated
+with the same formulas and choices (demister, head, application, rewrites) as size_vertical_separator,
+so every result carries its derivatives. Rounding of calc functions is left out, it is step function
+with zero derivative, so values differ from the chain within its rounding. Rewritten values and
+table values (allowable stress, material density) are constants."""
+
+from vessel_calc import METAL_STRESS, METAL_DENSITY, calc_allowable_stress
+
+# Inputs which drive size and weight of vessel:
+SENSITIVITY_FIELDS = ('vapor_mass_flow', 'vapor_density', 'liquid1_mass_flow', 'liquid1_density', 'surface_tension',
+                      'carry_over', 'vl_safety_factor', 't1', 't2', 't3', 'vessel_diameter', 'design_pressure',
+                      'corrosion_allowance', 'joint_efficiency')
+SENSITIVITY_RESULTS = ('min_diameter', 'tan_to_tan', 'total_weight')
+
+
+class Dual:
+    """Number with gradient: tuple of its partial derivatives by chosen inputs. Arithmetic with
+    plain numbers treats them as constants, powers are taken with constant exponent only."""
+    __slots__ = ('value', 'gradient')
+
+    def __init__(self, value, gradient):
+        self.value = value
+        self.gradient = gradient
+
+    @classmethod
+    def variable(cls, value, index, count):
+        return cls(value, tuple(1.0 if i == index else 0.0 for i in range(count)))
+
+    def __add__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.value + other.value, tuple(a + b for a, b in zip(self.gradient, other.gradient)))
+        return Dual(self.value + other, self.gradient)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return Dual(-self.value, tuple(-a for a in self.gradient))
+
+    def __sub__(self, other):
+        return self + -other
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __mul__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.value * other.value, tuple(a * other.value + b * self.value
+                                                        for a, b in zip(self.gradient, other.gradient)))
+        return Dual(self.value * other, tuple(a * other for a in self.gradient))
+
+    __rmul__ = __mul__
+
+    def reciprocal(self):
+        value = 1 / self.value
+        return Dual(value, tuple(-a * value * value for a in self.gradient))
+
+    def __truediv__(self, other):
+        if isinstance(other, Dual):
+            return self * other.reciprocal()
+        return self * (1 / other)
+
+    def __rtruediv__(self, other):
+        return self.reciprocal() * other
+
+    def __pow__(self, exponent):
+        if self.value <= 0 and exponent != int(exponent):
+            # Scalar chain gets complex number or division by zero here:
+            raise ValueError('Root of not positive number')
+        derivative = exponent * self.value ** (exponent - 1)
+        return Dual(self.value ** exponent, tuple(a * derivative for a in self.gradient))
+
+    def __lt__(self, other):
+        return self.value < value_of(other)
+
+    def __gt__(self, other):
+        return self.value > value_of(other)
+
+
+def value_of(number):
+    return number.value if isinstance(number, Dual) else number
+
+
+def gradient_of(number, count):
+    return number.gradient if isinstance(number, Dual) else (0.0,) * count
+
+
+def chain(case, fields):
+    """Minimal diameter, tangent to tangent height and total weight of case as Dual numbers"""
+    get = case.get
+    count = len(fields)
+    inputs = {field: Dual.variable(float(get(field, '')), index, count) for index, field in enumerate(fields)}
+
+    def number(field):
+        return inputs[field] if field in inputs else float(get(field, ''))
+
+    def rewrite(field, calculated):
+        value = get(field, '')
+        return calculated if value == '' else float(value)
+
+    demister, head = get('demister', False), get('head_and_bottom', 'None')
+    orientation, application = get('vessel_orientation', 'V'), get('vessel_application', 2)
+    if orientation != 'V' or application not in (1, 2) or demister not in (True, False):
+        raise ValueError('Only vertical vessel with known application and demister option')
+    liquid_density, vapor_density = number('liquid1_density'), number('vapor_density')
+    diameter = number('vessel_diameter')
+    # Velocity calculation:
+    if demister:
+        k_value = max(0.08, 0.15 * (liquid_density / vapor_density - 1) ** -0.2)
+    else:
+        k_value = 3.145 * number('carry_over') ** (1 / 3) * (number('surface_tension') / 1000 /
+                                                             (liquid_density - vapor_density)) ** 0.25
+    allowable_velocity = rewrite('k_value_rewrite', k_value) * (liquid_density / vapor_density - 1) ** 0.5 * \
+        number('vl_safety_factor')
+    gas_rate = number('vapor_mass_flow') / vapor_density / 3600
+    min_diameter = (4 * gas_rate / allowable_velocity / 3.1415) ** 0.5
+    cross_area = 3.1415 / 4 * diameter ** 2
+    # Liquid zones:
+    bottom_to_lsal = rewrite('bottom_to_lsal_rewrite', 0.5 if head == 'E' else -0.25 * diameter)
+    heights = []
+    for zone, residence_time in (('lsal_to_lal', 't1'), ('lal_to_lah', 't2'), ('lah_to_lsah', 't3')):
+        height = number('liquid1_mass_flow') / liquid_density * number(residence_time) / 60 / cross_area
+        if head == 'S' and get('vessel_phase', 2) == 2 and zone == 'lsal_to_lal':
+            height = height + 0.02 * diameter
+        heights.append(rewrite(zone + '_height_rewrite', height))
+    # Vapor zone and demister:
+    head_height = diameter / 4 if head == 'E' else diameter / 2
+    if application == 1:
+        inlet_to_demister = bottom_to_lsal
+    elif demister:
+        inlet_to_demister = max(0.6, 0.6 * diameter)
+    else:
+        inlet_to_demister = max(1, diameter, 0.6 + head_height) - head_height
+    if demister:
+        demister_diameter = (4 * (gas_rate / allowable_velocity) / 3.1415) ** 0.5
+        demister_to_tangent = 0.15
+        if diameter * 0.75 > demister_diameter:
+            demister_to_tangent = max(0.4 * diameter - head_height, 0.15)
+    else:
+        demister_to_tangent = 0
+    tan_to_tan = bottom_to_lsal + sum(heights) + rewrite('lsah_to_inlet_rewrite', max(0.3 * diameter, 0.3)) + \
+        rewrite('inlet_to_demister_rewrite', inlet_to_demister) + (0.15 if demister else 0) + \
+        rewrite('demister_to_tangent_rewrite', demister_to_tangent)
+    # Wall thickness and weight, stress and density of tables are constants:
+    head_factors = {'E': (2, 0.2, 1.09), 'S': (4, 0.4, 1.571)}
+    stress = calc_allowable_stress(str(get('design_temperature', '')), METAL_STRESS, get('material', ''))
+    density = float(METAL_DENSITY[get('material', '')])
+    pressure, joint_efficiency = number('design_pressure'), number('joint_efficiency')
+    design_stress = stress * 1000 / 14.2233
+    shell_thickness = max(pressure * diameter / (2 * design_stress * joint_efficiency - 1.2 * pressure) * 1000 +
+                          number('corrosion_allowance'), 10)
+    head_thickness = max(pressure * diameter / (head_factors[head][0] * design_stress * joint_efficiency -
+                                                head_factors[head][1] * pressure) * 1000 +
+                         number('corrosion_allowance'), 10)
+    shell_area = 3.1415 * (diameter + shell_thickness / 2000) * rewrite('tan_to_tan_rewrite', tan_to_tan)
+    head_area = head_factors[head][2] * (diameter + shell_thickness / 2000) ** 2
+    total_weight = shell_thickness / 1000 * shell_area * density + 2 * (head_thickness / 1000 * head_area * density)
+    return {'min_diameter': min_diameter, 'tan_to_tan': tan_to_tan, 'total_weight': total_weight}
+
+
+def size_with_sensitivities(cases, fields=SENSITIVITY_FIELDS):
+    """Values of SENSITIVITY_RESULTS and their derivatives by fields for every case, one pass each.
+    Returns list of {'values': {result: value}, 'sensitivity': {result: {field: derivative}}},
+    None for case with wrong or missing input."""
+    answers = []
+    for case in cases:
+        try:
+            results = chain(case, fields)
+        except (ValueError, TypeError, ZeroDivisionError, KeyError):
+            answers.append(None)
+            continue
+        answers.append({'values': {result: value_of(results[result]) for result in SENSITIVITY_RESULTS},
+                        'sensitivity': {result: dict(zip(fields, gradient_of(results[result], len(fields))))
+                                        for result in SENSITIVITY_RESULTS}})
+    return answers
+
+
+def elasticities(case, answer, result='total_weight'):
+    """Relative sensitivity of result to every input: % change of result per 1 % change of input,
+    sorted from the strongest driver"""
+    value = answer['values'][result]
+    scaled = {field: derivative * float(case[field]) / value if value else 0.0
+              for field, derivative in answer['sensitivity'][result].items()}
+    return sorted(scaled.items(), key=lambda item: -abs(item[1]))
@@ -0,0 +1,44 @@
+import unittest
+from vessel_calc import size_vertical_separator
+from vessel_golden import generate_cases
+from vessel_sensitivity import size_with_sensitivities, chain, elasticities, SENSITIVITY_FIELDS
+
+
+class SensitivityTestCase(unittest.TestCase):
+    def test_values_follow_chain(self):
+        cases = generate_cases(300)
+        for case, answer in zip(cases, size_with_sensitivities(cases)):
+            results = size_vertical_separator(case)
+            # Chain rounds every step (allowable gas velocity to 0.01 m/s, cross area to 0.001 m^2),
+            # values of differentiation are not rounded:
+            self.assertAlmostEqual(answer['values']['min_diameter'], results['min_diameter'],
+                                   delta=0.01 + 0.05 * results['min_diameter'])
+            self.assertAlmostEqual(answer['values']['tan_to_tan'], results['tan_to_tan'],
+                                   delta=0.02 + 0.01 * results['tan_to_tan'])
+            self.assertAlmostEqual(answer['values']['total_weight'], results['total_weight'],
+                                   delta=0.01 * results['total_weight'])
+
+    def test_derivatives_match_finite_differences(self):
+        cases = generate_cases(30)
+        for case, answer in zip(cases, size_with_sensitivities(cases)):
+            for field in SENSITIVITY_FIELDS:
+                x = float(case[field])
+                h = 1e-6 * max(abs(x), 1e-3)
+                upper = chain(dict(case, **{field: str(x + h)}), ())
+                lower = chain(dict(case, **{field: str(x - h)}), ())
+                for result, derivative in answer['sensitivity'].items():
+                    self.assertAlmostEqual((upper[result] - lower[result]) / (2 * h), derivative[field],
+                                           delta=1e-3 * max(1.0, abs(derivative[field])), msg=(field, result))
+
+    def test_wrong_case_and_drivers(self):
+        cases = generate_cases(2)
+        cases[1]['vapor_density'] = str(float(cases[1]['liquid1_density']) + 1)
+        answers = size_with_sensitivities(cases)
+        self.assertIsNone(answers[1])
+        drivers = elasticities(cases[0], answers[0])
+        self.assertEqual(len(drivers), len(SENSITIVITY_FIELDS))
+        self.assertEqual(drivers[0][0], 'vessel_diameter')
+
+
+if __name__ == '__main__':
+    unittest.main()
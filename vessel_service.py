@@ -0,0 +1,209 @@
+"""Local HTTP/JSON sizing service for other tools (plant layout, cost estimation).
+
+Endpoints (body is one case dictionary with CASE_FIELDS keys or list of them):
+    POST /size      all results of sizing chain
+    POST /nozzles   internal diameter, velocity and momentum of nozzles
+    POST /weight    stresses, wall thickness, areas and weights
+    GET  /stats     p50/p99 latency, throughput and batch sizes
+
+Requests which come within few milliseconds are collected by MicroBatcher and sized by one call
+of vessel_engine.size_cases. Only standard library is used.
+
+Usage:
+    python vessel_service.py --port 8765
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+
+from vessel_calc import NOZZLE_NAMES, RESULT_FIELDS
+from vessel_engine import parse_case, size_cases
+
+NOZZLE_FIELDS = tuple(name + suffix for name in NOZZLE_NAMES for suffix in ('_id', '_velocity', '_momentum'))
+WEIGHT_FIELDS = ('allowable_stress', 'design_stress', 'material_density', 'shell_thickness', 'head_thickness',
+                 'shell_area', 'head_area', 'shell_weight', 'head_weight', 'total_weight')
+ENDPOINTS = {'/size': RESULT_FIELDS, '/nozzles': NOZZLE_FIELDS, '/weight': WEIGHT_FIELDS}
+BATCH_WINDOW = 0.002
+MAX_BATCH = 512
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+def percentile(values, share):
+    """Percentile of list by nearest rank, None for empty list"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+class ServiceStats:
+    """Latency of last requests, throughput and batch sizes"""
+
+    def __init__(self, keep=10000):
+        self.started = time.monotonic()
+        self.latencies = deque(maxlen=keep)
+        self.requests = 0
+        self.cases = 0
+        self.batches = 0
+
+    def record_request(self, latency):
+        self.requests += 1
+        self.latencies.append(latency)
+
+    def record_batch(self, size):
+        self.batches += 1
+        self.cases += size
+
+    def snapshot(self):
+        elapsed = time.monotonic() - self.started
+        latencies = list(self.latencies)
+        p50, p99 = percentile(latencies, 0.5), percentile(latencies, 0.99)
+        return {'requests': self.requests, 'cases': self.cases, 'batches': self.batches,
+                'mean_batch': round(self.cases / self.batches, 2) if self.batches else None,
+                'p50_ms': None if p50 is None else round(p50 * 1000, 3),
+                'p99_ms': None if p99 is None else round(p99 * 1000, 3),
+                'requests_per_s': round(self.requests / elapsed, 1) if elapsed else None,
+                'cases_per_s': round(self.cases / elapsed, 1) if elapsed else None}
+
+
+class MicroBatcher:
+    """Collects cases of concurrent requests during window (s) and sizes them by one engine call"""
+
+    def __init__(self, engine=size_cases, window=BATCH_WINDOW, max_batch=MAX_BATCH, stats=None):
+        self.engine = engine
+        self.window = window
+        self.max_batch = max_batch
+        self.stats = stats
+        self.pending = []
+        self.pending_cases = 0
+        self.timer = None
+
+    async def submit(self, cases):
+        """Returns results of given cases when their batch is sized"""
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((cases, future))
+        self.pending_cases += len(cases)
+        if self.pending_cases >= self.max_batch:
+            self.flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+        return await future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending, self.pending_cases = self.pending, [], 0
+        if batch:
+            asyncio.ensure_future(self.run(batch))
+
+    async def run(self, batch):
+        cases = [case for request_cases, future in batch for case in request_cases]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(None, self.engine, cases)
+        except Exception as error:
+            for request_cases, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        if self.stats is not None:
+            self.stats.record_batch(len(cases))
+        start = 0
+        for request_cases, future in batch:
+            # Future of request, whose client went away, is cancelled already:
+            if not future.done():
+                future.set_result(results[start:start + len(request_cases)])
+            start += len(request_cases)
+
+
+class SizingService:
+    """HTTP/1.1 server with keep-alive connections"""
+
+    def __init__(self, window=BATCH_WINDOW, max_batch=MAX_BATCH, engine=size_cases):
+        self.stats = ServiceStats()
+        self.batcher = MicroBatcher(engine, window, max_batch, self.stats)
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=8765):
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, value = line.decode('latin-1').split(':', 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                status, answer = await self.answer(method, path, body)
+                payload = json.dumps(answer).encode('utf-8')
+                writer.write(('HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n'
+                              % (status, REASONS[status], len(payload))).encode('latin-1') + payload)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def answer(self, method, path, body):
+        """Returns status and JSON answer of one request"""
+        if path == '/stats':
+            return 200, self.stats.snapshot()
+        if path not in ENDPOINTS:
+            return 404, {'error': 'Unknown path ' + path}
+        if method != 'POST':
+            return 405, {'error': 'Use POST'}
+        start = time.monotonic()
+        try:
+            data = json.loads(body.decode('utf-8'))
+        except ValueError as error:
+            return 400, {'error': 'Bad JSON: %s' % error}
+        records = data if isinstance(data, list) else [data]
+        if not all(isinstance(record, dict) for record in records):
+            return 400, {'error': 'Case shall be JSON object'}
+        try:
+            results = await self.batcher.submit([parse_case(record) for record in records])
+        except Exception as error:
+            return 500, {'error': 'Sizing failed: %s: %s' % (type(error).__name__, error)}
+        fields = ENDPOINTS[path]
+        answer = [{field: result[field] for field in fields} for result in results]
+        self.stats.record_request(time.monotonic() - start)
+        return 200, answer if isinstance(data, list) else answer[0]
+
+
+async def serve(host, port, window, max_batch):
+    service = SizingService(window, max_batch)
+    port = await service.start(host, port)
+    print('Sizing service on http://%s:%d' % (host, port))
+    async with service.server:
+        await service.server.serve_forever()
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Local JSON sizing service')
+    arguments.add_argument('--host', default='127.0.0.1')
+    arguments.add_argument('--port', type=int, default=8765)
+    arguments.add_argument('--window', type=float, default=BATCH_WINDOW, help='batching window, s')
+    arguments.add_argument('--max-batch', type=int, default=MAX_BATCH, help='cases in one engine call')
+    options = arguments.parse_args()
+    try:
+        asyncio.run(serve(options.host, options.port, options.window, options.max_batch))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import asyncio
+import unittest
+from vessel_engine import size_cases
+from vessel_golden import generate_cases
+from vessel_loadgen import request, run_load
+from vessel_service import SizingService, MicroBatcher
+
+
+async def with_service(test, window=0.005, engine=size_cases):
+    service = SizingService(window=window, engine=engine)
+    port = await service.start(port=0)
+    try:
+        return await test(port), service.stats.snapshot()
+    finally:
+        service.server.close()
+        await service.server.wait_closed()
+
+
+class ServiceTestCase(unittest.TestCase):
+    def test_concurrent_requests_are_batched(self):
+        cases = generate_cases(40)
+
+        async def send(port, case, path):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            try:
+                return await request(reader, writer, 'POST', path, case)
+            finally:
+                writer.close()
+
+        async def test(port):
+            return await asyncio.gather(*[send(port, case, '/weight') for case in cases])
+
+        answers, stats = asyncio.run(with_service(test))
+        expected = size_cases(cases)
+        self.assertEqual([status for status, answer in answers], [200] * 40)
+        self.assertEqual([answer['total_weight'] for status, answer in answers],
+                         [result['total_weight'] for result in expected])
+        self.assertLess(stats['batches'], 40)
+
+    def test_errors(self):
+        async def test(port):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            try:
+                return [await request(reader, writer, 'POST', '/unknown', {}),
+                        await request(reader, writer, 'POST', '/size', [1, 2]),
+                        await request(reader, writer, 'GET', '/size')]
+            finally:
+                writer.close()
+
+        answers, stats = asyncio.run(with_service(test))
+        self.assertEqual([status for status, answer in answers], [404, 400, 405])
+
+    def test_engine_failure(self):
+        def engine(cases):
+            if any(case.get('vessel_diameter') == 'fail' for case in cases):
+                raise ZeroDivisionError('division by zero')
+            return size_cases(cases)
+
+        async def test(port):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            try:
+                return [await request(reader, writer, 'POST', '/size', {'vessel_diameter': 'fail'}),
+                        await request(reader, writer, 'POST', '/weight', generate_cases(1)[0])]
+            finally:
+                writer.close()
+
+        answers, stats = asyncio.run(with_service(test, engine=engine))
+        self.assertEqual([status for status, answer in answers], [500, 200])
+        self.assertIn('ZeroDivisionError', answers[0][1]['error'])
+
+    def test_client_gone_before_batch_is_sized(self):
+        async def test():
+            batcher = MicroBatcher(window=0.01)
+            cases = generate_cases(2)
+            gone = asyncio.ensure_future(batcher.submit(cases[:1]))
+            waiting = asyncio.ensure_future(batcher.submit(cases[1:]))
+            await asyncio.sleep(0)
+            gone.cancel()
+            return await waiting
+
+        self.assertEqual(asyncio.run(test()), size_cases(generate_cases(2)[1:]))
+
+    def test_load_generator(self):
+        report, stats = asyncio.run(with_service(lambda port: run_load(port=port, connections=8, requests=10,
+                                                                       path='/nozzles')))
+        self.assertEqual(report['requests'], 80)
+        self.assertEqual(report['service']['requests'], 80)
+        self.assertIsNotNone(report['service']['p99_ms'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import base64
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from vessel_calc import ND_VOC
+from vessel_engine import size_cases_with_errors
+from vessel_golden import generate_cases
+from vessel_stages import DIGEST_SIZE, save_stage, size_library, stage_path
+
+
+class StageCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = self.directory.name
+        self.cases = generate_cases(400)
+        self.cases[5]['liquid1_density'] = 'abc'
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def check(self, cases, sized):
+        results, errors, report = size_library(cases, self.cache)
+        self.assertEqual((results, errors), size_cases_with_errors(cases))
+        self.assertEqual({stage: value['sized'] for stage, value in report.items()}, sized)
+
+    def test_only_changed_stages_are_sized(self):
+        self.check(self.cases, {'velocity': 400, 'zones': 400, 'nozzles': 400, 'mechanical': 400})
+        self.check(self.cases, {'velocity': 0, 'zones': 0, 'nozzles': 0, 'mechanical': 0})
+        for case in self.cases[::4]:
+            case['design_pressure'] = str(float(case['design_pressure']) + 1)
+        self.cases[1]['material'] = 'SS316'
+        self.check(self.cases, {'velocity': 0, 'zones': 0, 'nozzles': 0, 'mechanical': 101})
+        changed = self.cases[::10]
+        for case in changed:
+            case['vapor_mass_flow'] = str(float(case['vapor_mass_flow']) * 2)
+        # Cross area is not changed, demister diameter is changed in cases with demister only:
+        with_demister = sum(case['demister'] is True for case in changed)
+        results, errors, report = size_library(self.cases, self.cache)
+        self.assertEqual((results, errors), size_cases_with_errors(self.cases))
+        self.assertEqual((report['velocity']['sized'], report['nozzles']['sized'], report['zones']['sized']),
+                         (40, 40, with_demister))
+        self.assertLessEqual(report['mechanical']['sized'], 40)
+        self.cases[7]['t1'] = '20'
+        self.check(self.cases, {'velocity': 0, 'zones': 1, 'nozzles': 0, 'mechanical': 1})
+
+    def test_only_changed_stages_are_written(self):
+        self.check(self.cases, {'velocity': 400, 'zones': 400, 'nozzles': 400, 'mechanical': 400})
+        with open(stage_path(self.cache, 'mechanical'), encoding='utf-8') as file:
+            data = json.load(file)
+        # Cache keeps digests of inputs of cases, not their columns:
+        self.assertEqual(data['inputs'][-4:], ['min_diameter', 'min_diameter codes', 'tan_to_tan', 'tan_to_tan codes'])
+        self.assertEqual(len(base64.b64decode(data['row_digests'])), 400 * DIGEST_SIZE)
+        self.cases[3]['corrosion_allowance'] = '6'
+        with mock.patch('vessel_stages.save_stage', wraps=save_stage) as save:
+            self.check(self.cases, {'velocity': 0, 'zones': 0, 'nozzles': 0, 'mechanical': 1})
+            self.check(self.cases, {'velocity': 0, 'zones': 0, 'nozzles': 0, 'mechanical': 0})
+        self.assertEqual([call.args[1] for call in save.call_args_list], ['mechanical'])
+
+    def test_library_grows_and_shrinks(self):
+        self.check(self.cases[:300], {'velocity': 300, 'zones': 300, 'nozzles': 300, 'mechanical': 300})
+        self.check(self.cases, {'velocity': 100, 'zones': 100, 'nozzles': 100, 'mechanical': 100})
+        self.check(self.cases[:200], {'velocity': 0, 'zones': 0, 'nozzles': 0, 'mechanical': 0})
+        self.check(self.cases[:200], {'velocity': 0, 'zones': 0, 'nozzles': 0, 'mechanical': 0})
+
+    def test_cache_of_other_version(self):
+        self.check(self.cases, {'velocity': 400, 'zones': 400, 'nozzles': 400, 'mechanical': 400})
+        path = stage_path(self.cache, 'nozzles')
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+        data['version'] = 0
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+        with open(stage_path(self.cache, 'zones'), 'w', encoding='utf-8') as file:
+            file.write('{"format": ')
+        self.check(self.cases, {'velocity': 0, 'zones': 400, 'nozzles': 400, 'mechanical': 0})
+        self.assertFalse(any(name.endswith('.tmp') for name in os.listdir(self.cache)))
+
+    def test_changed_table_files(self):
+        self.check(self.cases, {'velocity': 400, 'zones': 400, 'nozzles': 400, 'mechanical': 400})
+        path = os.path.join(self.cache, 'company_pipes.csv')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('vessel_sizing table,1,pipes\ndn,schedule,inner_diameter_m\n42,std,1.05\n')
+        ND_VOC.index = None
+        try:
+            with mock.patch.object(ND_VOC, 'extensions', [path]):
+                self.check(self.cases, {'velocity': 0, 'zones': 0, 'nozzles': 400, 'mechanical': 0})
+                self.check(self.cases, {'velocity': 0, 'zones': 0, 'nozzles': 0, 'mechanical': 0})
+                # Next run reads changed file:
+                os.utime(path, ns=(0, 0))
+                ND_VOC.index = None
+                self.check(self.cases, {'velocity': 0, 'zones': 0, 'nozzles': 400, 'mechanical': 0})
+        finally:
+            ND_VOC.index = None
+
+
+if __name__ == '__main__':
+    unittest.main()
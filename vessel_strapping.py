@@ -0,0 +1,164 @@
+"""Level-volume strapping tables of vertical vessels with exact volume of partly filled heads.
+Elliptical head ('E') is 2:1 semi-ellipsoidal with depth D/4, spherical head ('S') is hemispherical
+with depth D/2. Filled part of both heads is spheroidal cap: V = pi*R^2*(h^2/a - h^3/(3*a^2)),
+where a is head depth and h is level in the head.
+
+Level is measured from the lowest point of bottom head, heights of sizing chain are measured from
+bottom tangent line, so they are shifted by head depth. Volume at level and level at volume are
+found in table by bisection with linear interpolation, in O(log n) for each query."""
+
+from array import array
+from bisect import bisect_right
+import math
+
+# Default amount of table points, half of them is in shell, so 3 m shell gets 3 mm step:
+TABLE_POINTS = 2000
+ALARMS = ('LSAL', 'LAL', 'LAH', 'LSAH')
+
+
+def head_depth(vessel_diameter, head_and_bottom):
+    """Depth of head, same as head height used in calc_height_from_inlet_nozzle_for_vertical_vessel"""
+    return vessel_diameter / 4 if head_and_bottom == 'E' else vessel_diameter / 2
+
+
+def partial_head_volume(level, vessel_diameter, depth):
+    """Volume of bottom head filled up to level (0 <= level <= depth)"""
+    level = min(max(level, 0), depth)
+    return math.pi * vessel_diameter ** 2 / 4 * (level ** 2 / depth - level ** 3 / (3 * depth ** 2))
+
+
+def level_volume(level, vessel_diameter, tan_to_tan, head_and_bottom):
+    """Exact liquid volume of vertical vessel at level measured from the bottom of bottom head"""
+    depth = head_depth(vessel_diameter, head_and_bottom)
+    area = math.pi * vessel_diameter ** 2 / 4
+    full_head = partial_head_volume(depth, vessel_diameter, depth)
+    if level <= depth:
+        return partial_head_volume(level, vessel_diameter, depth)
+    if level <= depth + tan_to_tan:
+        return full_head + area * (level - depth)
+    top = 2 * depth + tan_to_tan
+    return 2 * full_head + area * tan_to_tan - partial_head_volume(top - level, vessel_diameter, depth)
+
+
+def exact_bottom_volume(head_and_bottom, vessel_diameter, bottom_to_lsal):
+    """Exact version of calc_bottom_volume_for_vertical_sep: volume below LSAL of vertical vessel"""
+    depth = head_depth(vessel_diameter, head_and_bottom)
+    return level_volume(depth + bottom_to_lsal, vessel_diameter, max(bottom_to_lsal, 0), head_and_bottom)
+
+
+class StrappingTable:
+    """Level to volume table of one vessel. Levels are in m from the lowest point of bottom head,
+    volumes in m^3. Table points are denser in heads, where volume is not linear."""
+
+    def __init__(self, vessel_diameter, tan_to_tan, head_and_bottom, points=TABLE_POINTS):
+        self.vessel_diameter = float(vessel_diameter)
+        if not self.vessel_diameter > 0:
+            raise ValueError('Vessel diameter shall be positive, got %r' % vessel_diameter)
+        self.tan_to_tan = float(tan_to_tan)
+        self.head_and_bottom = head_and_bottom
+        self.depth = head_depth(self.vessel_diameter, head_and_bottom)
+        self.height = 2 * self.depth + self.tan_to_tan
+        # A quarter of points is given to every head, a half to shell:
+        head_points, shell_points = max(points // 4, 1), max(points - 2 * (points // 4), 1)
+        bottom = [self.depth * (1 - math.cos(math.pi / 2 * i / head_points)) for i in range(head_points)]
+        shell = [self.depth + self.tan_to_tan * i / shell_points for i in range(shell_points + 1)] \
+            if self.tan_to_tan > 0 else [self.depth]
+        levels = bottom + shell + [self.height - level for level in reversed(bottom)]
+        self.levels = array('d', levels)
+        self.volumes = array('d', [level_volume(level, self.vessel_diameter, self.tan_to_tan, head_and_bottom)
+                                   for level in levels])
+
+    @property
+    def total_volume(self):
+        return self.volumes[-1]
+
+    def volume_at(self, levels):
+        """Volumes at list of levels, levels out of vessel are limited by bottom and top"""
+        return [interpolate(self.levels, self.volumes, level) for level in levels]
+
+    def level_at(self, volumes):
+        """Levels at list of volumes, volumes out of vessel are limited by 0 and total volume"""
+        return [interpolate(self.volumes, self.levels, volume) for volume in volumes]
+
+    def rows(self, step=0.01):
+        """Calibration rows (level, volume) with given level step in m, for DCS or strapping chart"""
+        count = int(self.height / step)
+        levels = [i * step for i in range(count + 1)]
+        if levels[-1] < self.height:
+            levels.append(self.height)
+        return list(zip(levels, self.volume_at(levels)))
+
+
+def interpolate(xs, ys, x):
+    """Linear interpolation in table with increasing xs, found by bisection"""
+    if x <= xs[0]:
+        return ys[0]
+    if x >= xs[-1]:
+        return ys[-1]
+    i = bisect_right(xs, x)
+    x0, x1 = xs[i - 1], xs[i]
+    return ys[i - 1] + (ys[i] - ys[i - 1]) * (x - x0) / (x1 - x0)
+
+
+def number_or_none(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def diameter_or_none(case):
+    """Diameter of case, None if it is missing, not a number or not positive"""
+    diameter = number_or_none(case.get('vessel_diameter'))
+    return diameter if diameter is not None and diameter > 0 else None
+
+
+def alarm_levels(case, results):
+    """Levels of LSAL, LAL, LAH and LSAH from the lowest point of vessel, using rewritten heights
+    of case if they are given, as sizing chain does. None if diameter of case is not positive
+    number or one of heights is not a number (failed value of engine is None)."""
+    heights = [diameter_or_none(case)]
+    for field in ('bottom_to_lsal', 'lsal_to_lal_height', 'lal_to_lah_height', 'lah_to_lsah_height'):
+        value = case.get(field + '_rewrite', '')
+        heights.append(number_or_none(results[field] if value == '' else value))
+    if None in heights:
+        return None
+    diameter, bottom_to_lsal, lsal_to_lal, lal_to_lah, lah_to_lsah = heights
+    depth = head_depth(diameter, case['head_and_bottom'])
+    lsal = depth + bottom_to_lsal
+    lal = lsal + lsal_to_lal
+    lah = lal + lal_to_lah
+    lsah = lah + lah_to_lsah
+    return dict(zip(ALARMS, (lsal, lal, lah, lsah)))
+
+
+def strapping_tables(cases, results, points=TABLE_POINTS):
+    """Tables for many vessels, case and results are the ones of vessel_engine.size_cases.
+    Tangent to tangent rewrite is used if it is given. Vessel, which diameter is not positive number
+    or tangent to tangent height is not a number, gets None."""
+    tables = []
+    for case, result in zip(cases, results):
+        tan_to_tan = case.get('tan_to_tan_rewrite', '')
+        if tan_to_tan == '':
+            tan_to_tan = result['tan_to_tan']
+        if diameter_or_none(case) is None or number_or_none(tan_to_tan) is None:
+            tables.append(None)
+        else:
+            tables.append(StrappingTable(case['vessel_diameter'], tan_to_tan, case['head_and_bottom'], points))
+    return tables
+
+
+def alarm_settings(cases, results, points=TABLE_POINTS):
+    """Alarm levels of many vessels with volume below every alarm and level in % of vessel height:
+    list of {alarm: (level m, volume m^3, level %)}, None for vessel without levels or table"""
+    settings = []
+    for case, result, table in zip(cases, results, strapping_tables(cases, results, points)):
+        levels = alarm_levels(case, result)
+        if levels is None or table is None:
+            settings.append(None)
+            continue
+        volumes = table.volume_at([levels[alarm] for alarm in ALARMS])
+        settings.append({alarm: (round(levels[alarm], 3), round(volume, 3),
+                                 round(100 * levels[alarm] / table.height, 1))
+                         for alarm, volume in zip(ALARMS, volumes)})
+    return settings
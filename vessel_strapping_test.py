@@ -0,0 +1,61 @@
+import math
+import unittest
+from vessel_calc import calc_bottom_volume_for_vertical_sep, calc_vessel_volume
+from vessel_engine import size_cases
+from vessel_golden import generate_cases
+from vessel_strapping import StrappingTable, exact_bottom_volume, level_volume, alarm_settings, alarm_levels, ALARMS
+
+
+class StrappingTestCase(unittest.TestCase):
+    def test_exact_bottom_volume(self):
+        # Elliptical bottom with LSAL above tangent is the same as in approximation:
+        self.assertAlmostEqual(exact_bottom_volume('E', 1.575, 0.5),
+                               calc_bottom_volume_for_vertical_sep('E', 1.575, 0.5, 'V'), 2)
+        # LSAL of spherical bottom is D/4 below tangent, that is spherical cap of R/2 height:
+        self.assertAlmostEqual(exact_bottom_volume('S', 1.575, -0.25 * 1.575), 5 * math.pi * 1.575 ** 3 / 192, 9)
+
+    def test_total_volume(self):
+        for head in 'ES':
+            table = StrappingTable(2.4, 6.1, head)
+            self.assertAlmostEqual(table.total_volume, calc_vessel_volume(6.1, 2.4, head), 1)
+
+    def test_volume_and_level_lookup(self):
+        table = StrappingTable(1.8, 4.2, 'S')
+        levels = [i * table.height / 997 for i in range(998)]
+        volumes = table.volume_at(levels)
+        for level, volume in zip(levels, volumes):
+            self.assertAlmostEqual(volume, level_volume(level, 1.8, 4.2, 'S'), 4)
+        for level, back in zip(levels, table.level_at(volumes)):
+            self.assertAlmostEqual(level, back, 9)
+
+    def test_alarm_settings(self):
+        cases = generate_cases(20)
+        settings = alarm_settings(cases, size_cases(cases), points=400)
+        for setting in settings:
+            levels = [setting[alarm][0] for alarm in ALARMS]
+            volumes = [setting[alarm][1] for alarm in ALARMS]
+            self.assertEqual(levels, sorted(levels))
+            self.assertEqual(volumes, sorted(volumes))
+
+    def test_failed_heights(self):
+        cases = generate_cases(3)
+        cases[0]['t2'] = ''
+        cases[1]['vessel_diameter'] = 'abc'
+        cases[2]['lal_to_lah_height_rewrite'] = '0.5'
+        results = size_cases(cases)
+        settings = alarm_settings(cases, results, points=400)
+        self.assertEqual(settings[:2], [None, None])
+        levels = alarm_levels(cases[2], results[2])
+        self.assertAlmostEqual(levels['LAH'] - levels['LAL'], 0.5)
+        for diameter in ('', '0', '-1'):
+            case = dict(cases[2], vessel_diameter=diameter)
+            self.assertIsNone(alarm_levels(case, results[2]))
+            self.assertEqual(alarm_settings([case], results[2:], points=400), [None])
+        self.assertIsNone(alarm_levels({key: value for key, value in cases[2].items() if key != 'vessel_diameter'},
+                                       results[2]))
+        with self.assertRaises(ValueError):
+            StrappingTable(0, 4, 'E')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+"""Streaming mode: cases are read line by line from stdin, sized by small chunks with
+vessel_engine and results are written to stdout as NDJSON lines as soon as chunk is ready.
+
+Input is either NDJSON (one case dictionary per line) or CSV. CSV header shall use CASE_FIELDS
+names, CSV without header shall have 13 process values in order of Data file rows (N3:N15).
+Fields which are not given in line are taken from base case (JSON file with CASE_FIELDS keys),
+so process simulator can send only process data. Field 'id' is copied to result line.
+
+Reader thread puts lines into bounded queue, so when sizing or writing to stdout is slow, reading
+stops as well, and memory does not depend on length of stream.
+
+Usage:
+    simulator | python vessel_stream.py --base vessel.json > results.ndjson
+    simulator | python vessel_stream.py --base vessel.json --summary summary.json > results.ndjson
+"""
+
+import argparse
+import csv
+import json
+import queue
+import sys
+import threading
+import time
+
+from vessel_calc import CASE_FIELDS, DATA_FIELDS
+from vessel_engine import parse_case, size_cases
+from vessel_summary import ResultSummary
+
+CHUNK_SIZE = 64
+# After first line of chunk, engine waits not more than this time (s) for other lines:
+MAX_WAIT = 0.005
+
+
+def read_lines(input_file, lines, stop):
+    """Reader thread, puts lines into bounded queue and None at the end of stream, or exception
+    which stopped reading (decoding or IO error), so consumer raises it"""
+    end = None
+    try:
+        for line in input_file:
+            if stop.is_set():
+                break
+            lines.put(line)
+    except Exception as error:
+        end = error
+    finally:
+        lines.put(end)
+
+
+def next_chunk(lines, chunk_size, max_wait):
+    """Takes up to chunk_size lines, waits for first line as long as needed and for others
+    not longer than max_wait. Returns list of lines and flag of stream end, or exception of reader
+    thread instead of flag."""
+    first = lines.get()
+    if first is None:
+        return [], True
+    if isinstance(first, Exception):
+        return [], first
+    chunk = [first]
+    deadline = time.monotonic() + max_wait
+    while len(chunk) < chunk_size:
+        timeout = deadline - time.monotonic()
+        try:
+            line = lines.get(timeout=timeout) if timeout > 0 else lines.get_nowait()
+        except queue.Empty:
+            break
+        if line is None:
+            return chunk, True
+        if isinstance(line, Exception):
+            return chunk, line
+        chunk.append(line)
+    return chunk, False
+
+
+class LineParser:
+    """Converts text lines to cases. Format is detected by first not empty line."""
+
+    def __init__(self, base_case=None):
+        self.base_case = dict(base_case or {})
+        self.header = None
+        self.format = None
+
+    def parse(self, line):
+        """Returns case dictionary, None for header or empty line, raises ValueError for bad line"""
+        line = line.strip()
+        if not line:
+            return None
+        if self.format is None:
+            self.format = 'json' if line.startswith('{') else 'csv'
+            if self.format == 'csv':
+                first = next(csv.reader([line]))
+                try:
+                    float(first[0])
+                    self.header = list(DATA_FIELDS)
+                except ValueError:
+                    self.header = [name.strip() for name in first]
+                    unknown = set(self.header) - set(CASE_FIELDS) - {'id'}
+                    if unknown:
+                        raise ValueError('Unknown fields in header: ' + ', '.join(sorted(unknown)))
+                    return None
+        if self.format == 'json':
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError('Line is not JSON object')
+        else:
+            values = next(csv.reader([line]))
+            if len(values) != len(self.header):
+                raise ValueError('Expected %d values, got %d' % (len(self.header), len(values)))
+            record = dict(zip(self.header, values))
+        case = dict(self.base_case)
+        case.update(record)
+        return parse_case(case)
+
+
+def write_chunk(output_file, numbers, cases, errors, summary=None):
+    """Sizes parsed cases of chunk and writes result or error line for every input line.
+    Results are added to summary (ResultSummary) with case id or line number."""
+    results = iter(size_cases([case for case in cases if case is not None]))
+    for number, case, error in zip(numbers, cases, errors):
+        if error is not None:
+            record = {'line': number, 'error': error}
+        elif case is None:
+            continue
+        else:
+            record = {'line': number}
+            if 'id' in case:
+                record['id'] = case['id']
+            record.update(next(results))
+            if summary is not None:
+                summary.add(record, record.get('id', number))
+        output_file.write(json.dumps(record) + '\n')
+    output_file.flush()
+
+
+def stream_cases(input_file, output_file, base_case=None, chunk_size=CHUNK_SIZE, max_wait=MAX_WAIT, summary=None):
+    """Sizes stream of cases and returns amount of read lines"""
+    lines = queue.Queue(maxsize=4 * chunk_size)
+    stop = threading.Event()
+    reader = threading.Thread(target=read_lines, args=(input_file, lines, stop), daemon=True)
+    reader.start()
+    parser = LineParser(base_case)
+    count, finished = 0, False
+    try:
+        while not finished:
+            chunk, finished = next_chunk(lines, chunk_size, max_wait)
+            numbers, cases, errors = [], [], []
+            for line in chunk:
+                count += 1
+                numbers.append(count)
+                try:
+                    cases.append(parser.parse(line))
+                    errors.append(None)
+                except ValueError as error:
+                    cases.append(None)
+                    errors.append(str(error))
+            write_chunk(output_file, numbers, cases, errors, summary)
+            # Lines read before error are written, then error of reading is raised:
+            if isinstance(finished, Exception):
+                raise finished
+    finally:
+        stop.set()
+    return count
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Sizes cases from stdin and writes NDJSON results to stdout')
+    arguments.add_argument('--base', help='JSON file with base case, which fills fields missing in lines')
+    arguments.add_argument('--chunk', type=int, default=CHUNK_SIZE, help='maximal cases in one engine call')
+    arguments.add_argument('--wait', type=float, default=MAX_WAIT, help='maximal wait for chunk to fill, s')
+    arguments.add_argument('--summary', help='JSON file for summary of results, written at the end of stream')
+    options = arguments.parse_args()
+    base_case = None
+    if options.base:
+        with open(options.base, encoding='utf-8') as file:
+            base_case = json.load(file)
+    summary = ResultSummary() if options.summary else None
+    stream_cases(sys.stdin, sys.stdout, base_case, options.chunk, options.wait, summary)
+    if summary is not None:
+        with open(options.summary, 'w', encoding='utf-8') as file:
+            json.dump(summary.report(), file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
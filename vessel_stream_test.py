@@ -0,0 +1,51 @@
+import io
+import json
+import unittest
+from vessel_calc import DATA_FIELDS
+from vessel_engine import size_cases
+from vessel_golden import generate_cases
+from vessel_stream import stream_cases
+
+
+class StreamTestCase(unittest.TestCase):
+    def test_ndjson_stream(self):
+        cases = generate_cases(150)
+        text = ''.join(json.dumps(dict(case, id='case%d' % i)) + '\n' for i, case in enumerate(cases))
+        output = io.StringIO()
+        count = stream_cases(io.StringIO(text), output, chunk_size=16)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(count, 150)
+        self.assertEqual([line['id'] for line in lines], ['case%d' % i for i in range(150)])
+        self.assertEqual(lines[42]['total_weight'], size_cases(cases[42:43])[0]['total_weight'])
+
+    def test_csv_data_rows_with_base_case(self):
+        base, other = generate_cases(2)
+        row = ','.join(str(other[field]) for field in DATA_FIELDS)
+        output = io.StringIO()
+        stream_cases(io.StringIO(row + '\nnot,a,number\n'), output, base_case=base)
+        result, error = [json.loads(line) for line in output.getvalue().splitlines()]
+        expected = size_cases([dict(base, **{field: other[field] for field in DATA_FIELDS})])[0]
+        self.assertEqual(result['min_diameter'], expected['min_diameter'])
+        self.assertEqual(error['line'], 2)
+        self.assertIn('error', error)
+
+    def test_csv_with_header(self):
+        case = generate_cases(1)[0]
+        fields = sorted(case)
+        text = ','.join(fields) + '\n' + ','.join(str(case[field]) for field in fields) + '\n'
+        output = io.StringIO()
+        stream_cases(io.StringIO(text), output)
+        self.assertEqual(json.loads(output.getvalue())['tan_to_tan'], size_cases([case])[0]['tan_to_tan'])
+
+    def test_reading_error(self):
+        cases = generate_cases(100)
+        data = ''.join(json.dumps(case) + '\n' for case in cases).encode('utf-8') + b'\xff\n'
+        output = io.StringIO()
+        with self.assertRaises(UnicodeDecodeError):
+            stream_cases(io.TextIOWrapper(io.BytesIO(data), encoding='utf-8'), output)
+        # Lines decoded before error are sized:
+        self.assertGreater(len(output.getvalue().splitlines()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+"""Summary of sizing results in one pass: count, mean, standard deviation, min and max with their
+case ids, quantiles and histogram of minimal diameter, tan-tan height, L/D and total weight, and
+pass rate of separation check (get_separation_quality). Results are not kept, memory depends only
+on spread of values: every value is counted in logarithmic bucket, values of bucket differ not more
+than ACCURACY share, so quantiles have the same relative error. Summaries of worker processes (or
+of chunks) are merged by adding their counts, merged summary is the same as of all results at once.
+
+    summary = ResultSummary()
+    summary.add_results(size_cases(cases), ids)
+    summary.merge(summary_of_other_worker)
+    print(json.dumps(summary.report(), indent=2))
+"""
+
+import math
+
+SUMMARY_FIELDS = ('min_diameter', 'tan_to_tan', 'l_d_ratio', 'total_weight')
+QUANTILES = (0.01, 0.1, 0.5, 0.9, 0.99)
+HISTOGRAM_BINS = 10
+ACCURACY = 0.01
+GAMMA = (1 + ACCURACY) / (1 - ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+
+
+class FieldSummary:
+    """Streaming summary of one result field"""
+
+    def __init__(self):
+        self.count = 0
+        self.missing = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.low = self.high = self.low_id = self.high_id = None
+        # Count of values by bucket index, values not above zero are counted apart:
+        self.buckets = {}
+        self.non_positive = 0
+
+    def add(self, value, case_id=None):
+        if value is None:
+            self.missing += 1
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.low is None or value < self.low:
+            self.low, self.low_id = value, case_id
+        if self.high is None or value > self.high:
+            self.high, self.high_id = value, case_id
+        if value > 0:
+            i = math.ceil(math.log(value) / LOG_GAMMA)
+            self.buckets[i] = self.buckets.get(i, 0) + 1
+        else:
+            self.non_positive += 1
+
+    def merge(self, other):
+        """Adds other summary to this one"""
+        if other.count:
+            count = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / count
+            self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+            self.count = count
+            if self.low is None or other.low < self.low:
+                self.low, self.low_id = other.low, other.low_id
+            if self.high is None or other.high > self.high:
+                self.high, self.high_id = other.high, other.high_id
+            for i, n in other.buckets.items():
+                self.buckets[i] = self.buckets.get(i, 0) + n
+            self.non_positive += other.non_positive
+        self.missing += other.missing
+
+    def values(self):
+        """Value of every bucket (lowest value for values not above zero) and its count, ascending"""
+        if self.non_positive:
+            yield self.low, self.non_positive
+        for i in sorted(self.buckets):
+            yield min(max(2 * GAMMA ** i / (GAMMA + 1), self.low), self.high), self.buckets[i]
+
+    def quantiles(self, shares=QUANTILES):
+        """Values of given shares by nearest rank, within ACCURACY of exact ones"""
+        ranks = sorted((min(self.count - 1, int(share * self.count)), share) for share in shares)
+        found, seen, values = {}, 0, self.values()
+        value, n = None, 0
+        for rank, share in ranks:
+            while seen + n <= rank:
+                seen += n
+                value, n = next(values)
+            found[share] = value
+        return [found[share] for share in shares]
+
+    def histogram(self, bins=HISTOGRAM_BINS):
+        """Counts of equal bins between min and max"""
+        counts = [0] * bins
+        width = (self.high - self.low) / bins
+        for value, n in self.values():
+            counts[min(bins - 1, int((value - self.low) / width)) if width else 0] += n
+        return counts
+
+    def report(self, bins=HISTOGRAM_BINS):
+        if not self.count:
+            return {'count': 0, 'missing': self.missing}
+        return {'count': self.count, 'missing': self.missing, 'mean': round(self.mean, 4),
+                'std': round((self.m2 / self.count) ** 0.5, 4),
+                'min': {'value': self.low, 'id': self.low_id}, 'max': {'value': self.high, 'id': self.high_id},
+                'quantiles': {'p%g' % (share * 100): round(value, 4)
+                              for share, value in zip(QUANTILES, self.quantiles())},
+                'histogram': {'from': self.low, 'to': self.high, 'counts': self.histogram(bins)}}
+
+
+class ResultSummary:
+    """Summaries of SUMMARY_FIELDS and counts of separation check results"""
+
+    def __init__(self, fields=SUMMARY_FIELDS):
+        self.fields = {field: FieldSummary() for field in fields}
+        self.separation = {'OK': 0, 'Not OK': 0, None: 0}
+
+    def add(self, result, case_id=None):
+        for field, summary in self.fields.items():
+            summary.add(result.get(field), case_id)
+        separation = result.get('separation')
+        self.separation[separation if separation in self.separation else None] += 1
+
+    def add_results(self, results, ids=None):
+        """Adds results, ids of cases are their numbers if not given"""
+        for case_id, result in zip(range(len(results)) if ids is None else ids, results):
+            self.add(result, case_id)
+
+    def merge(self, other):
+        for field, summary in self.fields.items():
+            summary.merge(other.fields[field])
+        for key, count in other.separation.items():
+            self.separation[key] += count
+        return self
+
+    def report(self, bins=HISTOGRAM_BINS):
+        checked = self.separation['OK'] + self.separation['Not OK']
+        report = {field: summary.report(bins) for field, summary in self.fields.items()}
+        report['separation'] = {'ok': self.separation['OK'], 'not_ok': self.separation['Not OK'],
+                                'unknown': self.separation[None],
+                                'pass_rate': round(self.separation['OK'] / checked, 4) if checked else None}
+        return report
@@ -0,0 +1,60 @@
+import statistics
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from vessel_engine import size_cases
+from vessel_golden import generate_cases
+from vessel_summary import ResultSummary, SUMMARY_FIELDS, QUANTILES, ACCURACY
+
+
+def summarize_chunk(start, count):
+    summary = ResultSummary()
+    summary.add_results(size_cases(generate_cases(start + count)[start:]), range(start, start + count))
+    return summary
+
+
+class SummaryTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.results = size_cases(generate_cases(4000))
+
+    def test_report_of_results(self):
+        summary = ResultSummary()
+        summary.add_results(self.results)
+        report = summary.report()
+        for field in SUMMARY_FIELDS:
+            values = [result[field] for result in self.results if result[field] is not None]
+            self.assertEqual(report[field]['count'], len(values))
+            self.assertEqual(report[field]['missing'], len(self.results) - len(values))
+            self.assertAlmostEqual(report[field]['mean'], statistics.fmean(values), 3)
+            self.assertAlmostEqual(report[field]['std'], statistics.pstdev(values), 3)
+            self.assertEqual(report[field]['min']['value'], min(values))
+            self.assertEqual(self.results[report[field]['max']['id']][field], max(values))
+            ordered = sorted(values)
+            for share in QUANTILES:
+                exact = ordered[min(len(values) - 1, int(share * len(values)))]
+                estimate = report[field]['quantiles']['p%g' % (share * 100)]
+                self.assertLessEqual(abs(estimate - exact), ACCURACY * exact + 1e-4)
+            self.assertEqual(sum(report[field]['histogram']['counts']), len(values))
+        separation = [result['separation'] for result in self.results]
+        self.assertEqual(report['separation']['pass_rate'],
+                         round(separation.count('OK') / (separation.count('OK') + separation.count('Not OK')), 4))
+
+    def test_merge_of_processes(self):
+        whole = ResultSummary()
+        whole.add_results(self.results)
+        with ProcessPoolExecutor(2) as executor:
+            parts = list(executor.map(summarize_chunk, range(0, 4000, 1000), [1000] * 4))
+        merged = ResultSummary()
+        for part in parts:
+            merged.merge(part)
+        for field in SUMMARY_FIELDS:
+            one, other = whole.fields[field], merged.fields[field]
+            self.assertEqual((one.count, one.low, one.low_id, one.high, one.high_id, one.buckets),
+                             (other.count, other.low, other.low_id, other.high, other.high_id, other.buckets))
+            self.assertAlmostEqual(one.mean / other.mean, 1)
+            self.assertAlmostEqual(one.m2 / other.m2, 1)
+        self.assertEqual(whole.separation, merged.separation)
+
+
+if __name__ == '__main__':
+    unittest.main()
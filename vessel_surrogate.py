@@ -0,0 +1,390 @@
+"""Surrogate of sizing chain for screening: minimal diameter and weight of drum in microseconds, for
+example inside flowsheet optimizer, which asks for them millions of times.
+
+Surrogate is built offline from exact chain (vessel_engine) for one base case, which keeps screening
+conventions: demister, head, residence times, material, design temperature, corrosion allowance.
+Drum is sized at its minimal diameter. Outputs are kept as logarithms at nodes of two regular grids
+over dimensionless inputs and are found by trilinear interpolation:
+    minimal diameter over gas rate (m^3/s), liquid to vapor density ratio and liquid density,
+    total weight over diameter, liquid height to diameter ratio (all residence times) and design
+    pressure to design stress ratio (p / (S*E)).
+Error bound of grid cell is 1.5 times the largest relative error of interpolation against exact
+chain at 8 points inside of the cell and of its neighbours. Points of weight cells are sized at
+random vapor flows and densities, so their errors take in whatever weight owes to vapor. Chain
+rounds gas rate, K value, allowable gas velocity and diameter, so exact minimal diameter jumps by up
+to 1 % at low density ratio; diameter bound adds the largest of these jumps near the point.
+Weight bound adds diameter bound multiplied by slope of weight along diameter (liquid height to
+diameter ratio moves with it). When point is out of grid or its bound is above tolerance, exact
+chain is used: estimate sizes such row alone, estimate_many sizes all of them in one batch.
+
+With default grid, SCREENING_CASE and tolerance of 5 % (benchmark of 20000 random inputs of golden
+corpus ranges) 64 % of rows are given from tables at about 130k rows/s, with largest error 1.8 % of
+diameter and 3.4 % of weight and no error above its bound. Counting fallbacks, estimate_many gives
+about 12.5k rows/s against 5.1k rows/s of exact chain in one batch, while estimate row by row gives
+only 3.8k rows/s, as exact chain sizes single row at about 1.5k rows/s. With tolerance of 2 % only
+9 % of rows are given from tables and estimate_many is about 7.5k rows/s.
+
+Usage:
+    python vessel_surrogate.py build surrogate.json.gz --base vessel.json
+    python vessel_surrogate.py benchmark surrogate.json.gz --cases 20000
+"""
+
+import argparse
+import gzip
+import json
+import math
+import random
+import time
+from array import array
+
+from vessel_engine import size_cases
+
+SURROGATE_FORMAT = 'vessel_sizing surrogate'
+SURROGATE_VERSION = 2
+# Relative error bound above which estimate is replaced by exact chain:
+TOLERANCE = 0.05
+# Grid axes as (first value, step, points). Diameter grid: log10 of gas rate in m^3/s, of density
+# ratio and of liquid density in kg/m^3. Weight grid: log10 of diameter in m, of liquid height to
+# diameter ratio and pressure to stress ratio.
+DIAMETER_AXES = ((-2.0, 0.25, 18), (0.45, 0.1, 32), (2.6, 0.13, 5))
+WEIGHT_AXES = ((-0.7, 0.05, 33), (-2.0, 0.25, 23), (0.0, 0.005, 25))
+# Points inside of cell where its error bound is found, as shares of step on every axis:
+BOUND_OFFSETS = (0.25, 0.75)
+# Factor of the largest error at these points, interpolation error is larger between them where chain
+# has kinks (minimal thickness, minimal heights) or rounds its steps:
+BOUND_MARGIN = 1.5
+# Rounding steps of minimal diameter chain: gas rate (m^3/s), K value and allowable gas velocity
+# (m/s) and minimal diameter (m):
+GAS_RATE_STEP, K_VALUE_STEP, VELOCITY_STEP, DIAMETER_STEP = 0.001, 0.001, 0.01, 0.001
+# Screening conventions of default base case, process inputs of every call are put over them:
+SCREENING_CASE = {'temperature': '50', 'pressure': '10', 'vapor_mass_flow': '10000', 'vapor_density': '10',
+                  'vapor_viscosity': '0.012', 'vapor_mw': '20', 'liquid1_mass_flow': '10000',
+                  'liquid1_density': '800', 'liquid1_viscosity': '0.5', 'liquid2_mass_flow': '0',
+                  'liquid2_density': '0', 'liquid2_viscosity': '0', 'surface_tension': '20', 'carry_over': '0.1',
+                  'demister': True, 'k_correlation': '', 'vl_safety_factor': '1', 'vessel_diameter': '1',
+                  'head_and_bottom': 'E', 'vessel_orientation': 'V', 'vessel_phase': 2, 'vessel_application': 2,
+                  't1': '5', 't2': '5', 't3': '5', 'design_pressure': '10', 'design_temperature': '100',
+                  'corrosion_allowance': '3', 'joint_efficiency': '0.85', 'material': 'CS'}
+# Ranges of benchmark inputs, the same as of golden corpus: kg/h, kg/m^3 and kg/cm^2
+BENCHMARK_RANGES = {'vapor_mass_flow': (100, 200000), 'vapor_density': (0.5, 80),
+                    'liquid_mass_flow': (100, 300000), 'liquid_density': (500, 1100), 'design_pressure': (2, 50)}
+
+
+class InterpolationTable:
+    """Values at nodes of regular 3-dimensional grid, one array in order of nodes (last axis changes
+    fastest), with error bound of every cell"""
+
+    def __init__(self, axes, values, bounds):
+        self.axes = tuple(tuple(axis) for axis in axes)
+        self.values = array('d', values)
+        self.bounds = array('d', bounds)
+        (self.low0, self.step0, self.points0), (self.low1, self.step1, self.points1), \
+            (self.low2, self.step2, self.points2) = self.axes
+        if len(self.values) != self.points0 * self.points1 * self.points2 or \
+                len(self.bounds) != (self.points0 - 1) * (self.points1 - 1) * (self.points2 - 1):
+            raise ValueError('Values or bounds do not match grid axes')
+
+    def lookup(self, x0, x1, x2):
+        """Interpolated value at point, error bound of its cell and derivatives of value by first and
+        second coordinates. None for point out of grid."""
+        u0, u1, u2 = (x0 - self.low0) / self.step0, (x1 - self.low1) / self.step1, (x2 - self.low2) / self.step2
+        n0, n1, n2 = self.points0, self.points1, self.points2
+        if not (0 <= u0 <= n0 - 1 and 0 <= u1 <= n1 - 1 and 0 <= u2 <= n2 - 1):
+            return None
+        i0, i1, i2 = min(int(u0), n0 - 2), min(int(u1), n1 - 2), min(int(u2), n2 - 2)
+        w0, w1, w2 = u0 - i0, u1 - i1, u2 - i2
+        v, index, s0 = self.values, (i0 * n1 + i1) * n2 + i2, n1 * n2
+        c00 = v[index] + (v[index + 1] - v[index]) * w2
+        c01 = v[index + n2] + (v[index + n2 + 1] - v[index + n2]) * w2
+        c10 = v[index + s0] + (v[index + s0 + 1] - v[index + s0]) * w2
+        c11 = v[index + s0 + n2] + (v[index + s0 + n2 + 1] - v[index + s0 + n2]) * w2
+        c0, c1 = c00 + (c01 - c00) * w1, c10 + (c11 - c10) * w1
+        slope1 = ((c01 - c00) * (1 - w0) + (c11 - c10) * w0) / self.step1
+        return c0 + (c1 - c0) * w0, self.bounds[(i0 * (n1 - 1) + i1) * (n2 - 1) + i2], (c1 - c0) / self.step0, slope1
+
+    def to_dict(self):
+        return {'axes': [list(axis) for axis in self.axes], 'values': [round(value, 7) for value in self.values],
+                'bounds': [round(bound + 5e-6, 5) for bound in self.bounds]}
+
+
+def grid_points(axes, offsets=None):
+    """Nodes of grid in order of table values, or points inside of every cell in order of cells when
+    offsets (shares of step on every axis) are given"""
+    coordinates = [[[low + step * i] for i in range(points)] if offsets is None else
+                   [[low + step * (i + offset) for offset in offsets] for i in range(points - 1)]
+                   for low, step, points in axes]
+    return [(x0, x1, x2) for a0 in coordinates[0] for a1 in coordinates[1] for a2 in coordinates[2]
+            for x0 in a0 for x1 in a1 for x2 in a2]
+
+
+def spread_bounds(bounds, shape):
+    """Largest bound of every cell and its neighbours on all axes (27 cells inside of grid). Chain
+    rounds its steps, so its error between samples is noise, which is seen better in more cells."""
+    bounds = list(bounds)
+    for axis, stride in enumerate((shape[1] * shape[2], shape[2], 1)):
+        spread = []
+        for index, bound in enumerate(bounds):
+            position = index // stride % shape[axis]
+            if position > 0:
+                bound = max(bound, bounds[index - stride])
+            if position < shape[axis] - 1:
+                bound = max(bound, bounds[index + stride])
+            spread.append(bound)
+        bounds = spread
+    return bounds
+
+
+def build_table(axes, exact):
+    """Table of exact function (list of points to list of log10 values, None where chain fails).
+    Error of interpolation is found at 8 points of every cell a quarter of step from its corners, the
+    largest one of cell and its neighbours is bound of cell. Cell with failed node or sample gets
+    infinite bound."""
+    shape = [points - 1 for low, step, points in axes]
+    nodes = [math.nan if value is None else value for value in exact(grid_points(axes))]
+    table = InterpolationTable(axes, nodes, [0.0] * (shape[0] * shape[1] * shape[2]))
+    samples = grid_points(axes, BOUND_OFFSETS)
+    per_cell = len(BOUND_OFFSETS) ** 3
+    errors = [0.0] * len(table.bounds)
+    for i, (point, value) in enumerate(zip(samples, exact(samples))):
+        estimate = table.lookup(*point)[0]
+        error = math.inf if value is None or math.isnan(estimate) else abs(10 ** (estimate - value) - 1)
+        errors[i // per_cell] = max(errors[i // per_cell], error)
+    table.bounds = array('d', spread_bounds([error * BOUND_MARGIN for error in errors], shape))
+    return table
+
+
+def screening_case(base_case, vapor_mass_flow, vapor_density, liquid_mass_flow, liquid_density, design_pressure,
+                   vessel_diameter=None):
+    case = dict(base_case, vapor_mass_flow=repr(vapor_mass_flow), vapor_density=repr(vapor_density),
+                liquid1_mass_flow=repr(liquid_mass_flow), liquid1_density=repr(liquid_density),
+                design_pressure=repr(design_pressure))
+    if vessel_diameter is not None:
+        case['vessel_diameter'] = repr(vessel_diameter)
+    return case
+
+
+def screen_exact(base_case, rows):
+    """Minimal diameter and total weight of drum sized at it by exact chain, for every row of
+    (vapor mass flow, vapor density, liquid mass flow, liquid density, design pressure). Values are
+    None where chain fails."""
+    cases = [screening_case(base_case, *row) for row in rows]
+    diameters = [result['min_diameter'] for result in size_cases(cases)]
+    for case, diameter in zip(cases, diameters):
+        case['vessel_diameter'] = repr(diameter) if diameter else ''
+    return [(diameter, result['total_weight'] if diameter else None)
+            for diameter, result in zip(diameters, size_cases(cases))]
+
+
+def rounding_error(gas_rate, density_ratio, safety_factor, diameter):
+    """Largest relative error of exact minimal diameter from rounding of its chain near estimated
+    diameter. Diameter goes as square root of gas rate over allowable velocity, so it takes half of
+    their relative errors; velocity takes error of K value too."""
+    velocity = 4 * gas_rate / 3.1415 / diameter ** 2
+    k_value = velocity / (density_ratio - 1) ** 0.5 / safety_factor
+    return (GAS_RATE_STEP / gas_rate + K_VALUE_STEP / k_value + VELOCITY_STEP / velocity) / 4 + \
+        DIAMETER_STEP / 2 / diameter
+
+
+def log10_or_none(value):
+    return math.log10(value) if value else None
+
+
+class Surrogate:
+    """Diameter and weight tables of one base case. estimate gives value of chain from tables, or
+    exact value when tables can not give it within tolerance."""
+
+    def __init__(self, base_case, diameter, weight, tolerance=TOLERANCE):
+        self.base_case = dict(base_case)
+        self.diameter, self.weight = diameter, weight
+        self.tolerance = tolerance
+        self.residence_time = sum(float(base_case[field]) for field in ('t1', 't2', 't3'))
+        self.design_stress = screening_stress(base_case)
+        self.safety_factor = float(base_case['vl_safety_factor'])
+
+    def table_estimate(self, vapor_mass_flow, vapor_density, liquid_mass_flow, liquid_density, design_pressure):
+        """Minimal diameter (m), total weight (kg) and their relative error bounds from tables, None
+        when point is out of grid or bound is above tolerance"""
+        try:
+            gas_rate, density_ratio = vapor_mass_flow / vapor_density / 3600, liquid_density / vapor_density
+            found = self.diameter.lookup(math.log10(gas_rate), math.log10(density_ratio), math.log10(liquid_density))
+        except (ValueError, ZeroDivisionError):
+            found = None
+        if found is not None:
+            diameter = 10 ** found[0]
+            diameter_bound = found[1] + rounding_error(gas_rate, density_ratio, self.safety_factor, diameter)
+            level = liquid_mass_flow / liquid_density * self.residence_time / 15 / (3.1415 * diameter ** 3)
+            weight = self.weight.lookup(found[0], math.log10(level), design_pressure / self.design_stress) \
+                if level > 0 and diameter_bound <= self.tolerance else None
+            if weight is not None:
+                # Error of diameter moves weight point along diameter axis and, as liquid height to
+                # diameter ratio goes as 1 / diameter^3, along height axis 3 times back:
+                weight_bound = weight[1] + abs(weight[2] - 3 * weight[3]) * diameter_bound
+                if weight_bound <= self.tolerance:
+                    return diameter, 10 ** weight[0], diameter_bound, weight_bound
+        return None
+
+    def estimate(self, vapor_mass_flow, vapor_density, liquid_mass_flow, liquid_density, design_pressure):
+        """Minimal diameter (m), total weight (kg) and their relative error bounds, which are 0 for
+        exact values. Flows are in kg/h, densities in kg/m^3, pressure in kg/cm^2."""
+        row = (vapor_mass_flow, vapor_density, liquid_mass_flow, liquid_density, design_pressure)
+        found = self.table_estimate(*row)
+        return found if found is not None else screen_exact(self.base_case, [row])[0] + (0.0, 0.0)
+
+    def estimate_many(self, rows):
+        """Estimates of many rows at once, rows out of tables are sized by exact chain in one batch"""
+        estimates = [self.table_estimate(*row) for row in rows]
+        missing = [i for i, found in enumerate(estimates) if found is None]
+        for i, exact in zip(missing, screen_exact(self.base_case, [rows[i] for i in missing])):
+            estimates[i] = exact + (0.0, 0.0)
+        return estimates
+
+    def coverage(self):
+        """Shares of cells of both tables with bound within tolerance"""
+        return {name: round(sum(bound <= self.tolerance for bound in table.bounds) / len(table.bounds), 4)
+                for name, table in (('diameter', self.diameter), ('weight', self.weight))}
+
+    def save(self, path):
+        with gzip.open(path, 'wt', encoding='utf-8') as file:
+            json.dump({'format': SURROGATE_FORMAT, 'version': SURROGATE_VERSION, 'base_case': self.base_case,
+                       'diameter': self.diameter.to_dict(), 'weight': self.weight.to_dict()}, file)
+
+
+def screening_stress(base_case):
+    """Design stress multiplied by joint efficiency of base case, kg/cm^2"""
+    result = size_cases([base_case])[0]
+    if result['design_stress'] is None:
+        raise ValueError('Base case has no design stress, check its material and design temperature')
+    return result['design_stress'] * float(base_case['joint_efficiency'])
+
+
+def build_surrogate(base_case=None, diameter_axes=DIAMETER_AXES, weight_axes=WEIGHT_AXES, tolerance=TOLERANCE):
+    """Surrogate of base case (SCREENING_CASE by default), built by exact chain at grid nodes and
+    at sample points of cells"""
+    base_case = dict(SCREENING_CASE if base_case is None else base_case)
+    residence_time = sum(float(base_case[field]) for field in ('t1', 't2', 't3'))
+    if residence_time <= 0:
+        raise ValueError('Residence times of base case shall be positive')
+    design_stress = screening_stress(base_case)
+    liquid_density = float(base_case['liquid1_density'])
+
+    def exact_diameter(points):
+        cases = [screening_case(base_case, 10 ** lq * 3600 * 10 ** (lrl - lr), 10 ** (lrl - lr),
+                                1000.0, 10 ** lrl, 10.0) for lq, lr, lrl in points]
+        return [log10_or_none(result['min_diameter']) for result in size_cases(cases)]
+
+    weight_case = dict(base_case)
+    # Demister of drum sized at its minimal diameter is as wide as vessel, so chain puts it 0.15 m
+    # below tangent line (calc_height_from_top_of_demister_to_tangent_of_vertical_vessel):
+    if weight_case.get('demister') is True and weight_case.get('demister_to_tangent_rewrite', '') == '':
+        weight_case['demister_to_tangent_rewrite'] = '0.15'
+
+    # Weight has no vapor axis, so every point is sized at random vapor flow and density of benchmark
+    # ranges and errors of cells take in whatever weight owes to vapor:
+    vapor = random.Random(1)
+
+    def exact_weight(points):
+        cases = []
+        for ld, ll, pr in points:
+            d = 10 ** ld
+            liquid_flow = 10 ** ll * d * 3.1415 * d ** 2 / 4 * 60 / residence_time * liquid_density
+            cases.append(screening_case(weight_case, vapor.uniform(*BENCHMARK_RANGES['vapor_mass_flow']),
+                                        vapor.uniform(*BENCHMARK_RANGES['vapor_density']), liquid_flow,
+                                        liquid_density, pr * design_stress, d))
+        return [log10_or_none(result['total_weight']) for result in size_cases(cases)]
+
+    return Surrogate(base_case, build_table(diameter_axes, exact_diameter), build_table(weight_axes, exact_weight),
+                     tolerance)
+
+
+def load_surrogate(path, tolerance=TOLERANCE):
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        data = json.load(file)
+    if data.get('format') != SURROGATE_FORMAT or data.get('version') != SURROGATE_VERSION:
+        raise ValueError('%s is not surrogate file of version %d' % (path, SURROGATE_VERSION))
+    tables = [InterpolationTable(data[name]['axes'], data[name]['values'], data[name]['bounds'])
+              for name in ('diameter', 'weight')]
+    return Surrogate(data['base_case'], *tables, tolerance=tolerance)
+
+
+def benchmark_rows(count, seed=1):
+    rnd = random.Random(seed)
+    return [tuple(rnd.uniform(*BENCHMARK_RANGES[name]) for name in BENCHMARK_RANGES) for _ in range(count)]
+
+
+def run_benchmark(surrogate, count=20000, single=500):
+    """Speed of exact chain (for all rows at once and for single rows), of surrogate with its
+    fallbacks (row by row and for all rows at once) and of tables alone on the same random rows. Share
+    of rows given from tables, their relative errors against exact chain and shares of errors above
+    their bounds and above tolerance."""
+    rows = benchmark_rows(count)
+    start = time.perf_counter()
+    exact = screen_exact(surrogate.base_case, rows)
+    exact_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for row in rows[:single]:
+        screen_exact(surrogate.base_case, [row])
+    single_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    estimates = [surrogate.estimate(*row) for row in rows]
+    surrogate_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    surrogate.estimate_many(rows)
+    batch_seconds = time.perf_counter() - start
+    errors, served, above_bound, above_tolerance = {'diameter': [], 'weight': []}, [], 0, 0
+    for row, (diameter, weight), estimate in zip(rows, exact, estimates):
+        if estimate[2:] == (0.0, 0.0) or not diameter or not weight:
+            continue
+        served.append(row)
+        for name, value, result, bound in (('diameter', diameter, estimate[0], estimate[2]),
+                                           ('weight', weight, estimate[1], estimate[3])):
+            error = abs(result / value - 1)
+            errors[name].append(error)
+            above_bound += error > bound
+            above_tolerance += error > surrogate.tolerance
+    start = time.perf_counter()
+    for row in served:
+        surrogate.estimate(*row)
+    table_seconds = time.perf_counter() - start
+    report = {'cases': count, 'tolerance': surrogate.tolerance, 'coverage': surrogate.coverage(),
+              'exact_batch_per_s': round(count / exact_seconds),
+              'exact_single_per_s': round(min(single, count) / single_seconds) if single_seconds else None,
+              'surrogate_per_s': round(count / surrogate_seconds),
+              'surrogate_batch_per_s': round(count / batch_seconds),
+              'table_per_s': round(len(served) / table_seconds) if served else None,
+              'table_share': round(len(served) / count, 4),
+              'above_bound_share': round(above_bound / max(2 * len(served), 1), 4),
+              'above_tolerance_share': round(above_tolerance / max(2 * len(served), 1), 4)}
+    for name, values in errors.items():
+        values.sort()
+        report[name + '_error'] = {'mean': round(sum(values) / len(values), 5),
+                                   'p99': round(values[int(0.99 * (len(values) - 1))], 5),
+                                   'max': round(values[-1], 5)} if values else None
+    return report
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Surrogate tables of diameter and weight for screening')
+    commands = arguments.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='build tables by exact chain and save them')
+    build.add_argument('surrogate')
+    build.add_argument('--base', help='JSON file with base case of screening conventions')
+    benchmark = commands.add_parser('benchmark', help='compare speed and accuracy with exact chain')
+    benchmark.add_argument('surrogate')
+    benchmark.add_argument('--cases', type=int, default=20000)
+    benchmark.add_argument('--tolerance', type=float, default=TOLERANCE)
+    options = arguments.parse_args()
+    if options.command == 'build':
+        base_case = None
+        if options.base:
+            with open(options.base, encoding='utf-8') as file:
+                base_case = json.load(file)
+        surrogate = build_surrogate(base_case)
+        surrogate.save(options.surrogate)
+        print(json.dumps(surrogate.coverage()))
+    else:
+        print(json.dumps(run_benchmark(load_surrogate(options.surrogate, options.tolerance), options.cases),
+                         indent=2))
+
+
+if __name__ == '__main__':
+    main()
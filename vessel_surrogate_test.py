@@ -0,0 +1,82 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from vessel_surrogate import InterpolationTable, build_surrogate, load_surrogate, screen_exact, benchmark_rows
+
+DIAMETER_AXES = ((-1.0, 0.5, 4), (1.0, 0.25, 7), (2.7, 0.2, 3))
+WEIGHT_AXES = ((-0.4, 0.1, 9), (-1.0, 0.5, 6), (0.0, 0.01, 6))
+
+
+class InterpolationTableTestCase(unittest.TestCase):
+    def test_linear_function_is_exact(self):
+        axes = ((0.0, 0.5, 3), (1.0, 1.0, 4), (-1.0, 0.25, 5))
+        values = [2 * x0 - x1 + 4 * x2 for x0 in (0.0, 0.5, 1.0) for x1 in (1.0, 2.0, 3.0, 4.0)
+                  for x2 in (-1.0, -0.75, -0.5, -0.25, 0.0)]
+        table = InterpolationTable(axes, values, [i / 100 for i in range(2 * 3 * 4)])
+        value, bound, slope0, slope1 = table.lookup(0.7, 2.2, -0.1)
+        self.assertAlmostEqual(value, 2 * 0.7 - 2.2 + 4 * -0.1)
+        self.assertAlmostEqual(slope0, 2)
+        self.assertAlmostEqual(slope1, -1)
+        self.assertEqual(bound, ((1 * 3 + 1) * 4 + 3) / 100)
+        self.assertAlmostEqual(table.lookup(1.0, 4.0, 0.0)[0], -2)
+        self.assertIsNone(table.lookup(1.01, 2, 0))
+        with self.assertRaises(ValueError):
+            InterpolationTable(axes, values[1:], table.bounds)
+
+
+class SurrogateTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.surrogate = build_surrogate(diameter_axes=DIAMETER_AXES, weight_axes=WEIGHT_AXES)
+        cls.rows = benchmark_rows(300, seed=2)
+
+    def test_estimates_within_tolerance(self):
+        exact = screen_exact(self.surrogate.base_case, self.rows)
+        served = 0
+        for row, (diameter, weight) in zip(self.rows, exact):
+            estimate = self.surrogate.estimate(*row)
+            if estimate[2:] == (0.0, 0.0):
+                self.assertEqual(estimate[:2], (diameter, weight))
+                continue
+            served += 1
+            self.assertLessEqual(max(estimate[2:]), self.surrogate.tolerance)
+            self.assertLessEqual(abs(estimate[0] / diameter - 1), estimate[2])
+            self.assertLessEqual(abs(estimate[1] / weight - 1), estimate[3])
+        self.assertGreater(served, 10)
+
+    def test_estimate_many(self):
+        estimates = self.surrogate.estimate_many(self.rows)
+        self.assertEqual(estimates, [self.surrogate.estimate(*row) for row in self.rows])
+        self.assertIn((0.0, 0.0), [estimate[2:] for estimate in estimates])
+
+    def test_fallback_to_exact_chain(self):
+        row = self.rows[0]
+        exact = screen_exact(self.surrogate.base_case, [row])[0]
+        self.assertEqual(self.surrogate.estimate(row[0], row[3] / 2, *row[2:]),
+                         screen_exact(self.surrogate.base_case, [(row[0], row[3] / 2) + row[2:]])[0] + (0.0, 0.0))
+        tolerance, self.surrogate.tolerance = self.surrogate.tolerance, 0
+        try:
+            self.assertEqual(self.surrogate.estimate(*row), exact + (0.0, 0.0))
+        finally:
+            self.surrogate.tolerance = tolerance
+        self.assertEqual(self.surrogate.estimate(0, 10, 1000, 800, 10)[2:], (0.0, 0.0))
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'surrogate.json.gz')
+            self.surrogate.save(path)
+            loaded = load_surrogate(path)
+            for row in self.rows[:50]:
+                estimate, other = self.surrogate.estimate(*row), loaded.estimate(*row)
+                for one, two in zip(estimate, other):
+                    self.assertAlmostEqual(one, two, delta=abs(one) * 1e-6 + 1e-5)
+            with gzip.open(path, 'wt', encoding='utf-8') as file:
+                json.dump({'format': 'vessel_sizing surrogate', 'version': 0}, file)
+            with self.assertRaises(ValueError):
+                load_surrogate(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,288 @@
+"""Materials and pipe tables kept in versioned CSV files and loaded on first use.
+First line of table file names format, version and kind of table, comment lines start with #,
+then header names columns, other columns are ignored:
+
+    vessel_sizing table,1,materials
+    material,density,temperature_f,stress_ksi
+    CS,7840,-20,17.1
+
+Files of tables directory are read in order of their names, then extension files listed in
+VESSEL_SIZING_TABLES environment variable (separated as PATH is) and files of add_extension. Row of
+later file replaces row with the same material and temperature (DN and schedule), so company grades
+and other pipe standards stay out of shipped files. Import of module does not read files, table is
+read when it is used first. Lookup is bisection of sorted names and of temperatures (schedules) of
+material (DN) in numeric arrays, so it does not slow down with thousands of entries. Tables are
+read-only for sizing, add_extension makes them read again on next use."""
+
+import csv
+from abc import abstractmethod
+import os
+import threading
+import weakref
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from types import MappingProxyType
+
+TABLE_FORMAT = 'vessel_sizing table'
+TABLE_VERSION = 1
+TABLES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tables')
+EXTENSIONS_VARIABLE = 'VESSEL_SIZING_TABLES'
+# Columns of kinds of tables, key columns first. Columns of names are text, other ones are numbers:
+TABLE_COLUMNS = MappingProxyType({'materials': ('material', 'temperature_f', 'stress_ksi', 'density'),
+                                  'pipes': ('dn', 'schedule', 'inner_diameter_m'),
+                                  'demisters': ('pad', 'kind', 'shape', 'width_m', 'length_m')})
+NAME_COLUMNS = ('material', 'dn', 'schedule', 'pad', 'kind', 'shape')
+
+added_extensions = []
+# Weak references to all tables, which add_extension resets:
+all_tables = []
+lock = threading.Lock()
+
+
+def number_text(value):
+    """Number as it is written in table: 20 for 20.0, 0.0409 for 0.0409"""
+    text = repr(value)
+    return text[:-2] if text.endswith('.0') else text
+
+
+def read_table(path, only=None):
+    """Kind of table file and its rows as tuples of TABLE_COLUMNS, ValueError for wrong file.
+    Rows of file of other kind than only are not read."""
+    with open(path, newline='', encoding='utf-8') as file:
+        lines = [(number, line) for number, line in enumerate(file, 1) if line.strip() and not line.startswith('#')]
+    first = next(csv.reader([lines[0][1]])) if lines else []
+    if first[:1] != [TABLE_FORMAT]:
+        raise ValueError('%s is not a vessel sizing table' % path)
+    try:
+        version, kind = int(first[1]), first[2]
+    except (IndexError, ValueError):
+        raise ValueError('%s has no version and kind of table' % path)
+    if version > TABLE_VERSION:
+        raise ValueError('%s has table version %d, expected %d or lower' % (path, version, TABLE_VERSION))
+    if kind not in TABLE_COLUMNS or len(lines) < 2:
+        raise ValueError('%s has unknown kind of table %r or no header' % (path, kind))
+    if only is not None and kind != only:
+        return kind, []
+    rows = csv.reader(line for number, line in lines[1:])
+    header = next(rows)
+    missing = [column for column in TABLE_COLUMNS[kind] if column not in header]
+    if missing:
+        raise ValueError('%s has no columns: %s' % (path, ', '.join(missing)))
+    indices = [header.index(column) for column in TABLE_COLUMNS[kind]]
+    table = []
+    for (number, line), row in zip(lines[2:], rows):
+        try:
+            table.append(tuple(row[i] if column in NAME_COLUMNS else float(row[i])
+                               for i, column in zip(indices, TABLE_COLUMNS[kind])))
+        except (IndexError, ValueError):
+            raise ValueError('%s, line %d: %s' % (path, number, line.strip()))
+    return kind, table
+
+
+def table_files(directory, extensions=None):
+    """Files of directory and extension files in order of reading"""
+    files = [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.endswith('.csv')]
+    if extensions is None:
+        extensions = [path for path in os.environ.get(EXTENSIONS_VARIABLE, '').split(os.pathsep) if path]
+        extensions += added_extensions
+    return files + list(extensions)
+
+
+def file_signatures(paths):
+    """[path, modification time (ns), size] of every file, time and size are None for missing file"""
+    signatures = []
+    for path in paths:
+        try:
+            status = os.stat(path)
+            signatures.append([path, status.st_mtime_ns, status.st_size])
+        except OSError:
+            signatures.append([path, None, None])
+    return signatures
+
+
+def add_extension(path):
+    """Adds extension file to all tables, they are read again on next use. ValueError for wrong file."""
+    read_table(path)
+    with lock:
+        added_extensions.append(path)
+        for reference in all_tables:
+            table = reference()
+            if table is not None:
+                table.index = None
+
+
+class LazyTable(Mapping):
+    """Table of one kind, which reads files on first use. Builds index of rows of all files."""
+    kind = None
+
+    def __init__(self, directory=TABLES_DIRECTORY, extensions=None):
+        self.directory = directory
+        self.extensions = extensions
+        self.index = None
+        self.signatures = None
+        all_tables.append(weakref.ref(self))
+
+    def loaded(self):
+        index = self.index
+        if index is None:
+            with lock:
+                if self.index is None:
+                    paths, rows = table_files(self.directory, self.extensions), []
+                    self.signatures = file_signatures(paths)
+                    for path in paths:
+                        rows += read_table(path, self.kind)[1]
+                    self.index = self.build(rows)
+                index = self.index
+        return index
+
+    def signature(self):
+        """File signatures of files, which loaded table was read from, so cached results of the
+        table can be checked against its files"""
+        self.loaded()
+        return self.signatures
+
+    @abstractmethod
+    def build(self, rows):
+        """Index of rows of all files, which lookups of table use"""
+
+
+def nested_index(groups):
+    """Sorted names of groups, start of every group in flat arrays, sorted keys and values of all
+    groups. Groups are dictionaries of dictionaries, latest row of same keys already replaced."""
+    names = tuple(sorted(groups))
+    starts, keys, values = array('l', [0]), [], array('d')
+    for name in names:
+        items = sorted(groups[name].items())
+        keys += [key for key, value in items]
+        values.extend(value for key, value in items)
+        starts.append(len(keys))
+    return names, starts, keys, values
+
+
+def stress_below(temperatures, stresses, temperature, start=0, end=None):
+    """Stress at the table temperature below given one (at the first one for lower temperatures),
+    None for temperature above table. Temperatures are sorted, start and end limit one material."""
+    end = len(temperatures) if end is None else end
+    if start == end or temperature > temperatures[end - 1]:
+        return None
+    return stresses[max(bisect_left(temperatures, temperature, start, end) - 1, start)]
+
+
+def find(names, name):
+    """Index of name in sorted names or -1"""
+    i = bisect_left(names, name)
+    return i if i < len(names) and names[i] == name else -1
+
+
+class MaterialTable(LazyTable):
+    """Allowable stress (1000 psi) vs temperature (F) of materials, mapping of material to its stresses
+    as texts. Densities (kg/m^3) of the same rows are given by densities mapping."""
+    kind = 'materials'
+
+    def __init__(self, directory=TABLES_DIRECTORY, extensions=None):
+        super().__init__(directory, extensions)
+        self.densities = DensityTable(self)
+
+    def build(self, rows):
+        stresses, densities = {}, {}
+        for material, temperature, stress, density in rows:
+            stresses.setdefault(material, {})[temperature] = stress
+            densities[material] = density
+        names, starts, temperatures, values = nested_index(stresses)
+        return (names, starts, array('d', temperatures), values, array('d', [densities[name] for name in names]),
+                tuple(stresses))
+
+    def __getitem__(self, material):
+        names, starts, temperatures, stresses, densities, order = self.loaded()
+        i = find(names, material)
+        if i < 0:
+            raise KeyError(material)
+        return MappingProxyType({number_text(temperatures[j]): number_text(stresses[j])
+                                 for j in range(starts[i], starts[i + 1])})
+
+    def __contains__(self, material):
+        return find(self.loaded()[0], material) >= 0
+
+    def __iter__(self):
+        return iter(self.loaded()[5])
+
+    def __len__(self):
+        return len(self.loaded()[5])
+
+    def stress(self, material, temperature):
+        """Stress of material by stress_below, None for unknown material"""
+        names, starts, temperatures, stresses = self.loaded()[:4]
+        i = find(names, material)
+        return stress_below(temperatures, stresses, temperature, starts[i], starts[i + 1]) if i >= 0 else None
+
+    def top_temperature(self, material, default=None):
+        """The highest temperature of material in table"""
+        names, starts, temperatures = self.loaded()[:3]
+        i = find(names, material)
+        return temperatures[starts[i + 1] - 1] if i >= 0 else default
+
+
+class DensityTable(Mapping):
+    """Mapping of material to its density as text, view of material table"""
+
+    def __init__(self, materials):
+        self.materials = materials
+
+    def __getitem__(self, material):
+        # One index for both, table may be read again by add_extension between two calls:
+        index = self.materials.loaded()
+        names, densities = index[0], index[4]
+        i = find(names, material)
+        if i < 0:
+            raise KeyError(material)
+        return number_text(densities[i])
+
+    def __iter__(self):
+        return iter(self.materials)
+
+    def __len__(self):
+        return len(self.materials)
+
+
+class PipeTable(LazyTable):
+    """Inner diameter of pipes (m) by nominal diameter and schedule, mapping of DN to its schedules
+    and inner diameters as texts. DN and schedules keep order of files."""
+    kind = 'pipes'
+
+    def build(self, rows):
+        pipes = {}
+        for dn, schedule, inner_diameter in rows:
+            pipes.setdefault(dn, {})[schedule] = inner_diameter
+        names, starts, schedules, values = nested_index(pipes)
+        return names, starts, tuple(schedules), values, tuple(pipes), tuple(tuple(pipes[name]) for name in names)
+
+    def inner_diameter(self, dn, schedule):
+        """Inner diameter as text, None for unknown DN or schedule"""
+        names, starts, schedules, values = self.loaded()[:4]
+        i = find(names, dn)
+        if i < 0:
+            return None
+        j = bisect_left(schedules, schedule, starts[i], starts[i + 1])
+        return number_text(values[j]) if j < starts[i + 1] and schedules[j] == schedule else None
+
+    def __getitem__(self, dn):
+        names, starts, schedules, values, order, schedule_orders = self.loaded()
+        i = find(names, dn)
+        if i < 0:
+            raise KeyError(dn)
+        diameters = dict(zip(schedules[starts[i]:starts[i + 1]], values[starts[i]:starts[i + 1]]))
+        return MappingProxyType({schedule: number_text(diameters[schedule]) for schedule in schedule_orders[i]})
+
+    def __contains__(self, dn):
+        return find(self.loaded()[0], dn) >= 0
+
+    def __iter__(self):
+        return iter(self.loaded()[4])
+
+    def __len__(self):
+        return len(self.loaded()[4])
+
+    def schedules(self):
+        """Schedules of all DN in order of first appearance"""
+        return list(dict.fromkeys(schedule for dn in self for schedule in self[dn]))
@@ -0,0 +1,102 @@
+import os
+import random
+import tempfile
+import time
+import unittest
+from unittest import mock
+from vessel_calc import ND_VOC, METAL_STRESS, METAL_DENSITY, calc_allowable_stress
+from vessel_tables import MaterialTable, PipeTable, read_table, EXTENSIONS_VARIABLE, TABLES_DIRECTORY
+
+
+def write_table(path, kind, header, rows, version=1):
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('vessel_sizing table,%d,%s\n%s\n' % (version, kind, header))
+        file.writelines(','.join(map(str, row)) + '\n' for row in rows)
+
+
+class TablesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_shipped_tables(self):
+        self.assertEqual(list(ND_VOC)[:4], ['1.5', '2', '3', '4'])
+        self.assertEqual(list(ND_VOC['8'])[:3], ['5S', '10S', '20'])
+        self.assertEqual(ND_VOC['1.5']['XXS'], '0.028')
+        self.assertEqual(ND_VOC.inner_diameter('42', 'XS'), '1.041')
+        self.assertIsNone(ND_VOC.inner_diameter('42', '160'))
+        self.assertEqual(len(METAL_STRESS), 9)
+        self.assertEqual(METAL_STRESS['CS']['-20'], '17.1')
+        self.assertEqual(METAL_DENSITY['SS321'], '9010')
+        # Stress of the table temperature below, first one for lower temperatures, none above table:
+        self.assertEqual(calc_allowable_stress('316', METAL_STRESS, 'CS'), 16.4)
+        self.assertEqual(calc_allowable_stress('-40', METAL_STRESS, 'CS'), 17.1)
+        self.assertIsNone(calc_allowable_stress('600', METAL_STRESS, 'CS'))
+        self.assertIsNone(calc_allowable_stress('100', METAL_STRESS, 'Ti'))
+
+    def test_extension_replaces_rows(self):
+        path = os.path.join(self.directory.name, 'company.csv')
+        write_table(path, 'materials', 'note,material,temperature_f,stress_ksi,density',
+                    [('grade', 'CS', 300, 16, 7840), ('new', 'A516-70', -20, 20, 7840),
+                     ('new', 'A516-70', 1000, 2.5, 7840), ('', 'A516-70', 650, 18.8, 7840)])
+        with mock.patch.dict(os.environ, {EXTENSIONS_VARIABLE: path}):
+            materials = MaterialTable()
+            self.assertEqual(list(materials)[-1], 'A516-70')
+        self.assertEqual(materials['CS']['300'], '16')
+        self.assertEqual(materials['CS']['400'], '17.1')
+        self.assertEqual(list(materials['A516-70']), ['-20', '650', '1000'])
+        self.assertEqual(materials.stress('A516-70', 700), 18.8)
+        self.assertEqual(materials.top_temperature('A516-70'), 1000)
+        self.assertEqual(materials.densities['A516-70'], '7840')
+        pipes = PipeTable(extensions=[self.write_pipes()])
+        self.assertEqual(pipes['DN50'], {'EN 2.9': '0.0545'})
+        self.assertEqual(pipes.inner_diameter('2', '40'), '0.0525')
+
+    def write_pipes(self):
+        path = os.path.join(self.directory.name, 'pipes.csv')
+        write_table(path, 'pipes', 'dn,schedule,inner_diameter_m', [('DN50', 'EN 2.9', 0.0545)])
+        return path
+
+    def test_wrong_files(self):
+        path = os.path.join(self.directory.name, 'new.csv')
+        write_table(path, 'pipes', 'dn,schedule,inner_diameter_m', [], version=2)
+        self.assertRaisesRegex(ValueError, 'version 2', read_table, path)
+        write_table(path, 'pipes', 'dn,inner_diameter_m', [])
+        self.assertRaisesRegex(ValueError, 'schedule', read_table, path)
+        write_table(path, 'pipes', 'dn,schedule,inner_diameter_m', [('2', '40', 'abc')])
+        self.assertRaisesRegex(ValueError, 'line 3', read_table, path)
+
+    def test_large_tables(self):
+        rnd = random.Random(1)
+        temperatures = list(range(-20, 1500, 50))
+        rows = [('M%04d' % i, t, round(rnd.uniform(1, 30), 1), 7800) for i in range(2000) for t in temperatures]
+        path = os.path.join(self.directory.name, 'materials.csv')
+        write_table(path, 'materials', 'material,temperature_f,stress_ksi,density', rows)
+        materials = MaterialTable(self.directory.name, extensions=[])
+        self.assertIsNone(materials.index)
+        start = time.perf_counter()
+        self.assertEqual(len(materials), 2000)
+        self.assertLess(time.perf_counter() - start, 2)
+        stresses = {(material, t): stress for material, t, stress, density in rows}
+        start = time.perf_counter()
+        for i in range(10000):
+            material, t = 'M%04d' % rnd.randrange(2000), rnd.choice(temperatures[1:])
+            self.assertEqual(materials.stress(material, t - 1), stresses[material, t - 50])
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(len(PipeTable(TABLES_DIRECTORY, extensions=[])), len(ND_VOC))
+
+    def test_density_of_one_index(self):
+        # Table read again between two calls of loaded, extension adds material before CS:
+        path = os.path.join(self.directory.name, 'company.csv')
+        write_table(path, 'materials', 'material,temperature_f,stress_ksi,density', [('A', 100, 20, 1000)])
+        indexes = [MaterialTable().loaded(), MaterialTable(extensions=[path]).loaded()]
+        materials = MaterialTable()
+        with mock.patch.object(materials, 'loaded', side_effect=indexes * 2):
+            self.assertEqual(materials.densities['CS'], '7840')
+            self.assertEqual(materials.densities['A'], '1000')
+
+
+if __name__ == '__main__':
+    unittest.main()
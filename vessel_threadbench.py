@@ -0,0 +1,69 @@
+"""Scaling benchmark of sizing engine in threads: the same cases are sized by size_cases_in_threads
+with 1, 2, 4, ... threads, and by many threads calling size_cases at once as web backend does.
+Throughput and speedup over one thread are printed as JSON together with the build of CPython:
+with GIL speedup stays near 1, on free-threaded build (python3.13t and later) it grows with threads
+up to number of cores.
+
+Usage:
+    python vessel_threadbench.py --cases 20000 --threads 1 2 4 8
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from vessel_engine import CHUNK_SIZE, size_cases, size_cases_in_threads
+from vessel_golden import generate_cases
+
+
+def gil_enabled():
+    """False on free-threaded CPython build running without GIL"""
+    check = getattr(sys, '_is_gil_enabled', None)
+    return True if check is None else check()
+
+
+def measure(function, repeats):
+    """The best of repeats, seconds"""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmark(cases, threads=(1, 2, 4, 8), repeats=3):
+    """Cases per second and speedup over one thread for every amount of threads. 'pool' sizes one
+    big list by chunks in pool, 'callers' are threads which size their own requests of one chunk
+    each at once."""
+    requests = [cases[start:start + CHUNK_SIZE] for start in range(0, len(cases), CHUNK_SIZE)]
+    report = {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+              'gil_enabled': gil_enabled(), 'cpus': os.cpu_count(), 'cases': len(cases), 'threads': {}}
+    base = {}
+    for count in threads:
+        with ThreadPoolExecutor(count) as pool:
+            seconds = {'pool': measure(lambda: size_cases_in_threads(cases, pool), repeats),
+                       'callers': measure(lambda: list(pool.map(size_cases, requests)), repeats)}
+        base = base or seconds
+        report['threads'][count] = {mode: {'cases_per_s': round(len(cases) / seconds[mode]),
+                                           'speedup': round(base[mode] / seconds[mode], 2)} for mode in seconds}
+    return report
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Scaling of sizing engine in threads')
+    arguments.add_argument('--cases', type=int, default=20000)
+    arguments.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    arguments.add_argument('--repeats', type=int, default=3)
+    options = arguments.parse_args()
+    report = run_benchmark(generate_cases(options.cases, seed=1), options.threads, options.repeats)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Liquid level transients of vertical separator for check of residence times.
+Residence times t1, t2 and t3 fix zone heights for steady flow. Here level is simulated in time
+for disturbances: inlet surge (liquid inflow multiplied by factor for some time) and failure of
+outlet valve (fails closed or fails open at some time). Outlet valve is driven by proportional
+level controller, which gives normal flow at middle of LAL-LAH band and full opening at LAH.
+Vessel without band (t2 is 0 or LAL-LAH height is rewritten to 0) has on/off level control: valve is
+fully open above normal level and closed below it.
+
+Liquid volume change is divided by cross area of vessel (calculate_cross_area), levels are
+measured from bottom tangent line with zone heights of sizing chain. All scenarios of all vessels
+are stepped together, one pass over flat lists per time step."""
+
+from vessel_strapping import alarm_levels, head_depth
+
+# Outlet valve capacity as multiple of normal liquid flow:
+VALVE_CAPACITY = 2.0
+
+
+def vessel_levels(case, result, valve_capacity=VALVE_CAPACITY):
+    """Data of one vessel for simulation: cross area, alarm levels from bottom tangent line and
+    normal liquid flow in m^3/s. None for vessel without alarm levels (see alarm_levels), which
+    cannot be simulated."""
+    levels = alarm_levels(case, result)
+    if levels is None:
+        return None
+    depth = head_depth(float(case['vessel_diameter']), case['head_and_bottom'])
+    levels = {alarm: level - depth for alarm, level in levels.items()}
+    levels['bottom'] = -depth
+    levels['cross_area'] = float(result['cross_area'])
+    levels['liquid_flow'] = float(case['liquid1_mass_flow']) / float(case['liquid1_density']) / 3600
+    levels['valve_capacity'] = valve_capacity
+    return levels
+
+
+def scenario(surge_factor=1.0, surge_start=0.0, surge_duration=0.0, valve_failure=None, failure_time=0.0):
+    """Disturbance: inflow is multiplied by surge_factor from surge_start during surge_duration (s),
+    outlet valve fails 'closed' or 'open' at failure_time (s), valve_failure None is no failure"""
+    return {'surge_factor': surge_factor, 'surge_start': surge_start, 'surge_duration': surge_duration,
+            'valve_failure': valve_failure, 'failure_time': failure_time}
+
+
+def surge_scenarios(factors, durations, start=60.0):
+    """Grid of inlet surge scenarios"""
+    return [scenario(factor, start, duration) for factor in factors for duration in durations]
+
+
+def simulate(vessels, scenarios, duration=1800.0, time_step=1.0):
+    """Runs every scenario for every vessel. Returns list (one item per vessel) of dictionaries of
+    columns over scenarios: min_level, max_level, time_to_lsal, time_to_lsah (s, None if alarm is
+    not reached) and ok (level stayed between LSAL and LSAH)."""
+    if not scenarios:
+        return [{'min_level': [], 'max_level': [], 'time_to_lsal': [], 'time_to_lsah': [], 'ok': []}
+                for vessel in vessels]
+    area, flow, capacity, normal, band, lsal, lsah, bottom = [], [], [], [], [], [], [], []
+    factor, surge_start, surge_end, fail_mode, fail_time = [], [], [], [], []
+    for vessel in vessels:
+        for item in scenarios:
+            area.append(vessel['cross_area'])
+            flow.append(vessel['liquid_flow'])
+            capacity.append(vessel['liquid_flow'] * vessel['valve_capacity'])
+            normal.append((vessel['LAL'] + vessel['LAH']) / 2)
+            band.append((vessel['LAH'] - vessel['LAL']) / 2)
+            lsal.append(vessel['LSAL'])
+            lsah.append(vessel['LSAH'])
+            bottom.append(vessel['bottom'])
+            factor.append(item['surge_factor'])
+            surge_start.append(item['surge_start'])
+            surge_end.append(item['surge_start'] + item['surge_duration'])
+            fail_mode.append({None: 0, 'closed': 1, 'open': 2}[item['valve_failure']])
+            fail_time.append(item['failure_time'] if item['valve_failure'] else float('inf'))
+    count = len(area)
+    level = list(normal)
+    low, high = list(normal), list(normal)
+    time_low, time_high = [None] * count, [None] * count
+    steps = int(round(duration / time_step))
+    for step in range(steps):
+        time = step * time_step
+        for i in range(count):
+            h = level[i]
+            inflow = flow[i] * factor[i] if surge_start[i] <= time < surge_end[i] else flow[i]
+            if time >= fail_time[i]:
+                outflow = 0.0 if fail_mode[i] == 1 else capacity[i]
+            elif band[i]:
+                # Proportional controller: normal flow at middle of band, full opening at LAH
+                outflow = flow[i] + (capacity[i] - flow[i]) * (h - normal[i]) / band[i]
+                outflow = min(max(outflow, 0.0), capacity[i])
+            else:
+                outflow = capacity[i] if h > normal[i] else 0.0 if h < normal[i] else flow[i]
+            h += (inflow - outflow) * time_step / area[i]
+            if h < bottom[i]:
+                h = bottom[i]
+            level[i] = h
+            if h < low[i]:
+                low[i] = h
+                if h <= lsal[i] and time_low[i] is None:
+                    time_low[i] = time + time_step
+            elif h > high[i]:
+                high[i] = h
+                if h >= lsah[i] and time_high[i] is None:
+                    time_high[i] = time + time_step
+    results = []
+    per_vessel = len(scenarios)
+    for start in range(0, count, per_vessel):
+        part = slice(start, start + per_vessel)
+        results.append({'min_level': low[part], 'max_level': high[part], 'time_to_lsal': time_low[part],
+                        'time_to_lsah': time_high[part],
+                        'ok': [a is None and b is None for a, b in zip(time_low[part], time_high[part])]})
+    return results
@@ -0,0 +1,50 @@
+import unittest
+from vessel_engine import size_cases
+from vessel_golden import generate_cases
+from vessel_transient import vessel_levels, scenario, surge_scenarios, simulate
+
+
+class TransientTestCase(unittest.TestCase):
+    def setUp(self):
+        cases = generate_cases(2)
+        self.vessels = [vessel_levels(case, result) for case, result in zip(cases, size_cases(cases))]
+
+    def test_steady_level_without_disturbance(self):
+        result = simulate(self.vessels[:1], [scenario()], duration=600)[0]
+        normal = (self.vessels[0]['LAL'] + self.vessels[0]['LAH']) / 2
+        self.assertAlmostEqual(result['min_level'][0], normal, 9)
+        self.assertAlmostEqual(result['max_level'][0], normal, 9)
+        self.assertTrue(result['ok'][0])
+
+    def test_valve_failures_reach_alarms(self):
+        vessel = self.vessels[0]
+        result = simulate([vessel], [scenario(valve_failure='closed', failure_time=10),
+                                     scenario(valve_failure='open', failure_time=10)], duration=7200)[0]
+        self.assertEqual(result['ok'], [False, False])
+        # Inventory between normal level and LSAH is filled by normal flow:
+        to_lsah = (vessel['LSAH'] - (vessel['LAL'] + vessel['LAH']) / 2) * vessel['cross_area'] / \
+            vessel['liquid_flow']
+        self.assertAlmostEqual(result['time_to_lsah'][0], 10 + to_lsah, delta=2)
+        self.assertIsNotNone(result['time_to_lsal'][1])
+
+    def test_many_scenarios_of_many_vessels(self):
+        scenarios = surge_scenarios([1 + i / 10 for i in range(20)], [60 * i for i in range(10)])
+        results = simulate(self.vessels, scenarios, duration=900, time_step=2)
+        self.assertEqual([len(result['ok']) for result in results], [200, 200])
+        # Longer surge of the same size gives higher level:
+        self.assertLessEqual(results[0]['max_level'][51], results[0]['max_level'][52])
+
+    def test_vessel_without_band(self):
+        vessel = dict(self.vessels[0], LAH=self.vessels[0]['LAL'])
+        result = simulate([vessel], [scenario(), scenario(1.5, 60, 120)], duration=600)[0]
+        self.assertEqual(result['ok'], [True, True])
+        self.assertAlmostEqual(result['max_level'][0], vessel['LAL'], 9)
+        self.assertGreater(result['max_level'][1], vessel['LAL'])
+
+    def test_vessel_without_levels(self):
+        case = dict(generate_cases(1)[0], t2='')
+        self.assertIsNone(vessel_levels(case, size_cases([case])[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Watch of Data workbook chosen by Fetch button: when file is saved again, process data of N column
+is read again and only changed data input boxes are filled, so only vessel which watches the file
+is recalculated. File is polled by its modification time and size, which is one os.stat call per
+poll, unchanged file is not opened. Changed file is read in read-only mode, only N3:N15 cells."""
+
+import os
+from zipfile import BadZipFile
+
+import openpyxl
+
+from vessel_calc import DATA_FIELDS
+from vessel_properties import FIRST_ROW
+
+# N column of Data file, which fetch button reads, and period of polling of watched files, ms:
+DATA_COLUMN = 14
+WATCH_PERIOD = 1000
+
+
+def read_data_column(path):
+    """Process data of N column as dictionary of DATA_FIELDS, rounded to text as fetch button does.
+    Cells which are not numbers are left out."""
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        cells = [row[0] for row in wb.active.iter_rows(min_row=FIRST_ROW, max_row=FIRST_ROW + len(DATA_FIELDS) - 1,
+                                                        min_col=DATA_COLUMN, max_col=DATA_COLUMN, values_only=True)]
+    finally:
+        wb.close()
+    return {field: str(round(value, 3)) for field, value in zip(DATA_FIELDS, cells)
+            if isinstance(value, (int, float)) and not isinstance(value, bool)}
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class DataWatcher:
+    """Watched Data file and process data last read from it"""
+
+    def __init__(self, path, values=None):
+        self.path = path
+        self.signature = file_signature(path)
+        self.values = read_data_column(path) if values is None else dict(values)
+
+    def poll(self):
+        """Process data which changed since last poll, empty dictionary if file is not changed.
+        File which is missing or being saved by Excel is tried again on next poll."""
+        try:
+            signature = file_signature(self.path)
+            if signature == self.signature:
+                return {}
+            values = read_data_column(self.path)
+        except (OSError, BadZipFile, KeyError, ValueError):
+            return {}
+        self.signature = signature
+        changes = {field: value for field, value in values.items() if self.values.get(field) != value}
+        self.values = values
+        return changes
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import unittest
+import openpyxl
+import vessel_watch
+from vessel_watch import DataWatcher, read_data_column
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Data.xlsx')
+
+
+class WatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'Data.xlsx')
+        shutil.copy(DATA_FILE, self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def save_cell(self, cell, value):
+        wb = openpyxl.load_workbook(self.path)
+        wb.active[cell] = value
+        wb.save(self.path)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    def test_values_as_fetch_gives(self):
+        values = read_data_column(self.path)
+        sheet = openpyxl.load_workbook(self.path).active
+        self.assertEqual(values['vapor_density'], str(round(sheet['N6'].value, 3)))
+        self.assertEqual(values['liquid2_density'], '0')
+        self.assertEqual(len(values), 13)
+
+    def test_only_changed_fields(self):
+        watcher = DataWatcher(self.path)
+        reads = []
+        original = vessel_watch.read_data_column
+        vessel_watch.read_data_column = lambda path: reads.append(path) or original(path)
+        try:
+            self.assertEqual(watcher.poll(), {})
+            self.assertEqual(reads, [])
+            self.save_cell('N5', 60000.12345)
+            self.assertEqual(watcher.poll(), {'vapor_mass_flow': '60000.123'})
+            self.assertEqual(len(reads), 1)
+            # File saved again without changes of data:
+            self.save_cell('B20', 'note')
+            self.assertEqual(watcher.poll(), {})
+            os.remove(self.path)
+            self.assertEqual(watcher.poll(), {})
+        finally:
+            vessel_watch.read_data_column = original
+
+
+if __name__ == '__main__':
+    unittest.main()
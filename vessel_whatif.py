@@ -0,0 +1,102 @@
+"""What-if curves of one vessel: total weight, tangent to tangent height and L/D ratio over range of
+diameters, for What-if tab of GUI. All points of curve are one column of batch engine, and only
+stages which curves need (velocity, zones, wall thickness and weight) are calculated, so curve is
+recalculated and drawn on every move of slider within one frame of screen.
+
+Heights rewritten in GUI are not used on curves, they follow diameter. Range of diameters starts at
+minimal diameter of case, which does not depend on sliders, so curves do not jump while dragging.
+Sliders snap values to their step and range, so only sliders moved since inputs were taken change
+the case (moved_sliders), other inputs keep their exact values on curves and in vessel entries."""
+
+from vessel_calc import CASE_FIELDS
+from vessel_engine import to_columns, to_float, velocity_stage, zone_stage, mechanical_stage
+from vessel_records import format_number
+
+CURVE_POINTS = 60
+CURVE_FIELDS = ('total_weight', 'tan_to_tan', 'l_d_ratio')
+CURVE_COLORS = {'total_weight': 'firebrick', 'tan_to_tan': 'navy', 'l_d_ratio': 'darkgreen'}
+# Inputs of sliders, their limits and steps:
+SLIDERS = (('vessel_diameter', 'Vessel diameter, m', 0.1, 10, 0.01), ('t1', 'LZAL to LAL, min', 0, 30, 0.5),
+           ('t2', 'LAL to LAH, min', 0, 30, 0.5), ('t3', 'LAH to LZAH, min', 0, 30, 0.5),
+           ('design_pressure', 'Design pressure, kg/cm^2', 0, 100, 0.1))
+HEIGHT_REWRITES = tuple(field for field in CASE_FIELDS if field.endswith('_rewrite') and field != 'k_value_rewrite')
+
+
+def moved_sliders(taken, values):
+    """Values of sliders, which differ from their values right after inputs were taken, as texts of
+    entries"""
+    return {field: format_number(float(value)) for field, value in values.items() if value != taken.get(field)}
+
+
+def diameter_range(case, points=CURVE_POINTS, span=3.0):
+    """Diameters from minimal diameter of case to span times it, around diameter of case if minimal
+    one can not be found"""
+    low = velocity_stage(to_columns([case]))['min_diameter'][0][0]
+    if not low:
+        try:
+            low = float(case.get('vessel_diameter', '')) / 2
+        except ValueError:
+            low = 0.5
+    low = max(low, 0.1)
+    return [low + (span - 1) * low * i / (points - 1) for i in range(points)]
+
+
+def curves(case, diameters):
+    """CURVE_FIELDS of case at every diameter, None where chain fails"""
+    columns = {field: column * len(diameters) for field, column in to_columns([case]).items()}
+    columns['vessel_diameter'] = list(diameters)
+    for field in HEIGHT_REWRITES:
+        columns[field] = [''] * len(diameters)
+    velocity = velocity_stage(columns)
+    zones = zone_stage(columns, velocity)
+    mechanical = mechanical_stage(columns, velocity, zones)
+    return {'tan_to_tan': zones['tan_to_tan'][0], 'total_weight': mechanical['total_weight'][0],
+            'l_d_ratio': mechanical['l_d_ratio'][0]}
+
+
+def chart_points(xs, ys, width, height, margin=30):
+    """Flat list of canvas coordinates of curve, every curve is scaled to its own maximum.
+    Points without value are left out."""
+    known = [(x, y) for x, y in zip(xs, ys) if y is not None]
+    if len(known) < 2:
+        return []
+    x_low, x_high = xs[0], xs[-1]
+    y_high = max(y for x, y in known) or 1.0
+    coordinates = []
+    for x, y in known:
+        coordinates.append(margin + (x - x_low) / ((x_high - x_low) or 1.0) * (width - 2 * margin))
+        coordinates.append(height - margin - max(y, 0) / y_high * (height - 2 * margin))
+    return coordinates
+
+
+class CurveChart:
+    """Curves of CURVE_FIELDS on Tk canvas. Items are created once, on redraw only their
+    coordinates and texts are changed."""
+
+    def __init__(self, canvas, width=600, height=360):
+        self.canvas, self.width, self.height = canvas, width, height
+        canvas.create_rectangle(30, 30, width - 30, height - 30, outline='grey')
+        self.lines = {field: canvas.create_line(0, 0, 0, 0, fill=CURVE_COLORS[field], width=2)
+                      for field in CURVE_FIELDS}
+        self.legend = {field: canvas.create_text(40 + 180 * i, 15, anchor='w', fill=CURVE_COLORS[field], text='')
+                       for i, field in enumerate(CURVE_FIELDS)}
+        self.marker = canvas.create_line(0, 30, 0, height - 30, fill='grey', dash=(4, 2))
+        self.axis = canvas.create_text(width / 2, height - 12, text='')
+
+    def draw(self, diameters, values, diameter):
+        """Draws curves and marker of chosen diameter, which is number or text of entry. Marker is
+        hidden when diameter is empty or not a number."""
+        for field in CURVE_FIELDS:
+            coordinates = chart_points(diameters, values[field], self.width, self.height)
+            self.canvas.coords(self.lines[field], *(coordinates or (0, 0, 0, 0)))
+            known = [value for value in values[field] if value is not None]
+            self.canvas.itemconfigure(self.legend[field], text='%s, max %g' % (field, max(known) if known else 0))
+        text = 'Vessel diameter %.2f to %.2f m' % (diameters[0], diameters[-1])
+        diameter = to_float(diameter)
+        if diameter is None:
+            self.canvas.coords(self.marker, 0, 0, 0, 0)
+        else:
+            x = 30 + (diameter - diameters[0]) / ((diameters[-1] - diameters[0]) or 1.0) * (self.width - 60)
+            self.canvas.coords(self.marker, x, 30, x, self.height - 30)
+            text += ', chosen %.2f m' % diameter
+        self.canvas.itemconfigure(self.axis, text=text)
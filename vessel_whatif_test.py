@@ -0,0 +1,75 @@
+import time
+import unittest
+from vessel_engine import size_cases
+from vessel_golden import generate_cases
+from vessel_whatif import curves, diameter_range, chart_points, moved_sliders, CurveChart, CURVE_FIELDS, HEIGHT_REWRITES
+
+
+class Canvas:
+    """Canvas, which keeps coordinates and options of items"""
+
+    def __init__(self):
+        self.items = []
+
+    def create(self, *coordinates, **options):
+        self.items.append([list(coordinates), options])
+        return len(self.items) - 1
+
+    create_rectangle = create_line = create_text = create
+
+    def coords(self, item, *coordinates):
+        self.items[item][0] = list(coordinates)
+
+    def itemconfigure(self, item, **options):
+        self.items[item][1].update(options)
+
+
+class WhatIfTestCase(unittest.TestCase):
+    def test_curves_match_engine(self):
+        case = dict(generate_cases(1)[0], tan_to_tan_rewrite='7', t1='3')
+        diameters = diameter_range(case)
+        values = curves(case, diameters)
+        expected = size_cases([dict(case, vessel_diameter=d, **dict.fromkeys(HEIGHT_REWRITES, ''))
+                               for d in diameters])
+        for field in CURVE_FIELDS:
+            self.assertEqual(values[field], [result[field] for result in expected])
+        self.assertGreaterEqual(diameters[0], size_cases([case])[0]['min_diameter'])
+
+    def test_redraw_within_frame(self):
+        for case in generate_cases(20):
+            start = time.perf_counter()
+            diameters = diameter_range(case)
+            values = curves(dict(case, t2='7.5', design_pressure=12.4), diameters)
+            points = [chart_points(diameters, values[field], 600, 360) for field in CURVE_FIELDS]
+            self.assertLess(time.perf_counter() - start, 0.016)
+            self.assertEqual(len(points[0]), 2 * len(diameters))
+
+    def test_chart_points_skip_missing(self):
+        points = chart_points([1, 2, 3, 4], [10, None, 20, 40], 100, 100, margin=0)
+        for point, expected in zip(points, [0, 75, 200 / 3, 50, 100, 0]):
+            self.assertAlmostEqual(point, expected)
+        self.assertEqual(len(points), 6)
+
+    def test_only_moved_sliders_are_applied(self):
+        # t1 of 3.3 is snapped to 3.5, design pressure of 150 is limited to 100 and empty t3 is 0:
+        taken = {'vessel_diameter': 1.8, 't1': 3.5, 't2': 5.0, 't3': 0.0, 'design_pressure': 100.0}
+        self.assertEqual(moved_sliders(taken, dict(taken)), {})
+        self.assertEqual(moved_sliders(taken, dict(taken, t2=7.5, vessel_diameter=2.0)),
+                         {'t2': '7.5', 'vessel_diameter': '2'})
+
+    def test_draw_with_entry_texts(self):
+        # Case of Take inputs keeps texts of entries, moved sliders are texts too:
+        case = dict(generate_cases(1)[0], **moved_sliders({'t2': 5.0}, {'t2': 7.5}))
+        diameters = diameter_range(case)
+        canvas = Canvas()
+        chart = CurveChart(canvas)
+        chart.draw(diameters, curves(case, diameters), case['vessel_diameter'])
+        self.assertIn('chosen %.2f m' % float(case['vessel_diameter']), canvas.items[chart.axis][1]['text'])
+        self.assertGreater(len(canvas.items[chart.lines['total_weight']][0]), 4)
+        chart.draw(diameters, curves(dict(case, vessel_diameter=''), diameters), '')
+        self.assertEqual(canvas.items[chart.marker][0], [0, 0, 0, 0])
+        self.assertNotIn('chosen', canvas.items[chart.axis][1]['text'])
+
+
+if __name__ == '__main__':
+    unittest.main()
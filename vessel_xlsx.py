@@ -0,0 +1,140 @@
+"""Export of many results to Excel workbook in write-only mode of openpyxl: rows are written to
+file as they come and are not kept in memory, unlike cells of normal workbook (as OUTPUT button
+fills Spec file), so memory stays the same for 500 000 rows as for 1000. Records are taken by
+chunks from any iterable (NDJSON file, vessel_queue study), sheet is full at Excel row limit and
+next rows go to new sheet with the same header. Numbers and result fields kept as numeric text
+(material density, nozzle ID) are written as numeric cells, other texts (case ids, tags) stay text.
+Excel has no NaN or infinity, such values are written as text. openpyxl writes several times faster
+when lxml is installed, benchmark shows whether it is.
+
+Usage:
+    python vessel_xlsx.py results.ndjson results.xlsx
+    python vessel_xlsx.py --benchmark 500000
+"""
+
+import argparse
+import json
+import math
+import os
+import tempfile
+import time
+import tracemalloc
+from itertools import chain, islice
+
+import openpyxl
+from openpyxl.xml import LXML
+
+from vessel_calc import RESULT_FIELDS, NOZZLE_NAMES
+from vessel_engine import size_cases
+from vessel_golden import generate_cases
+
+# Rows of Excel sheet, header included, and records converted at once:
+EXCEL_ROWS = 1048576
+XLSX_CHUNK = 1000
+SHEET_NAME = 'Results'
+# Result fields, which engine gives as text of number:
+NUMERIC_TEXT_FIELDS = ('material_density',) + tuple(name + '_id' for name in NOZZLE_NAMES)
+
+
+def cell_value(value, numeric_text=False):
+    """Value of typed cell: number for finite numbers and, if numeric_text is set, for text of
+    finite number, None for empty value, text for other values"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value if math.isfinite(value) else repr(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if numeric_text:
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return value
+        return number if math.isfinite(number) else value
+    return value
+
+
+def export_xlsx(path, records, columns=None, chunk_size=XLSX_CHUNK, sheet_rows=EXCEL_ROWS):
+    """Writes records (dictionaries) to workbook, columns are keys of the first record if not given.
+    Returns amount of written records."""
+    records = iter(records)
+    first = next(records, None)
+    if columns is None:
+        columns = list(first) if first is not None else []
+    records = chain([first], records) if first is not None else records
+    wb = openpyxl.Workbook(write_only=True)
+    sheet, row, count = None, sheet_rows, 0
+    numeric = [column in NUMERIC_TEXT_FIELDS for column in columns]
+    while True:
+        chunk = [[cell_value(record.get(column), flag) for column, flag in zip(columns, numeric)]
+                 for record in islice(records, chunk_size)]
+        if not chunk:
+            break
+        for values in chunk:
+            if row == sheet_rows:
+                name = SHEET_NAME if sheet is None else '%s %d' % (SHEET_NAME, len(wb.sheetnames) + 1)
+                sheet = wb.create_sheet(name)
+                sheet.freeze_panes = 'A2'
+                sheet.append(list(columns))
+                row = 1
+            sheet.append(values)
+            row += 1
+        count += len(chunk)
+    if sheet is None:
+        wb.create_sheet(SHEET_NAME).append(list(columns))
+    wb.save(path)
+    return count
+
+
+def read_ndjson(path):
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def benchmark_records(rows, results):
+    """Rows of results repeated over and over, as many as given"""
+    for i in range(rows):
+        yield dict(results[i % len(results)], case=i)
+
+
+def run_benchmark(rows, sample=20000):
+    """Rows per second of export, and peak of Python memory for tenth of rows and for all rows
+    (which shall be near each other)"""
+    results = size_cases(generate_cases(min(rows, sample), seed=1))
+    columns = ('case',) + RESULT_FIELDS
+    report = {'rows': rows, 'columns': len(columns), 'lxml': LXML}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'results.xlsx')
+        start = time.perf_counter()
+        export_xlsx(path, benchmark_records(rows, results), columns)
+        elapsed = time.perf_counter() - start
+        report.update({'seconds': round(elapsed, 2), 'rows_per_s': round(rows / elapsed),
+                       'file_mb': round(os.path.getsize(path) / 2 ** 20, 1)})
+        for name, amount in (('peak_mb_tenth', rows // 10), ('peak_mb', rows)):
+            tracemalloc.start()
+            export_xlsx(path, benchmark_records(amount, results), columns)
+            report[name] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+            tracemalloc.stop()
+    return report
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Writes NDJSON results to xlsx workbook in write-only mode')
+    arguments.add_argument('input', nargs='?', help='NDJSON file of vessel_stream or vessel_queue export')
+    arguments.add_argument('output', nargs='?')
+    arguments.add_argument('--benchmark', type=int, metavar='ROWS', help='measure export of so many rows')
+    options = arguments.parse_args()
+    if options.benchmark:
+        print(json.dumps(run_benchmark(options.benchmark), indent=2))
+    elif options.input and options.output:
+        print('%d rows written' % export_xlsx(options.output, read_ndjson(options.input)))
+    else:
+        arguments.error('input and output files are needed')
+
+
+if __name__ == '__main__':
+    main()
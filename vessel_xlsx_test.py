@@ -0,0 +1,67 @@
+import os
+import tempfile
+import tracemalloc
+import unittest
+import openpyxl
+from vessel_engine import size_cases
+from vessel_golden import generate_cases
+from vessel_xlsx import export_xlsx, benchmark_records, cell_value
+
+COLUMNS = ('case', 'min_diameter', 'material_density', 'inlet_id', 'separation', 'errors')
+
+
+class XlsxTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.results = size_cases(generate_cases(200))
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'results.xlsx')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_typed_cells_and_sheets(self):
+        records = [dict(result, case=i) for i, result in enumerate(self.results)]
+        records[3]['errors'] = {'material': 'unknown_choice'}
+        self.assertEqual(export_xlsx(self.path, records, COLUMNS, chunk_size=7, sheet_rows=51), 200)
+        wb = openpyxl.load_workbook(self.path, read_only=True)
+        self.assertEqual(wb.sheetnames, ['Results', 'Results 2', 'Results 3', 'Results 4'])
+        rows = []
+        for sheet in wb.worksheets:
+            sheet_rows = list(sheet.iter_rows(values_only=True))
+            self.assertEqual(sheet_rows[0], COLUMNS)
+            rows += sheet_rows[1:]
+        wb.close()
+        self.assertEqual([row[0] for row in rows], list(range(200)))
+        for row, result in zip(rows, self.results):
+            self.assertEqual(row[1], result['min_diameter'])
+            self.assertEqual(row[2], float(result['material_density']))
+            self.assertEqual(row[3], float(result['inlet_id']) if result['inlet_id'] else None)
+            self.assertEqual(row[4], result['separation'])
+        self.assertEqual(rows[3][5], '{"material": "unknown_choice"}')
+
+    def test_identifiers_and_special_numbers(self):
+        records = [{'case': '00123', 'tag': '1_000', 'min_diameter': float('nan'), 'material_density': 'inf',
+                    'inlet_id': '0.102', 'total_weight': float('inf')}]
+        columns = ('case', 'tag', 'min_diameter', 'material_density', 'inlet_id', 'total_weight')
+        export_xlsx(self.path, records, columns)
+        wb = openpyxl.load_workbook(self.path, read_only=True)
+        self.assertEqual(list(wb.active.iter_rows(values_only=True))[1], ('00123', '1_000', 'nan', 'inf', 0.102, 'inf'))
+        wb.close()
+        self.assertEqual(cell_value('7840', numeric_text=True), 7840.0)
+        self.assertEqual(cell_value('7840'), '7840')
+
+    def test_constant_memory(self):
+        peaks = []
+        for rows in (2000, 8000):
+            tracemalloc.start()
+            export_xlsx(self.path, benchmark_records(rows, self.results), COLUMNS)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        self.assertLess(peaks[1], peaks[0] * 1.2)
+
+
+if __name__ == '__main__':
+    unittest.main()